@@ -6,7 +6,6 @@ from variants_utils import clean_translated_text
 from variants_utils import get_product_option_values, update_product_option_values
 from translation import deepseek_translate_title, deepl_translate, deepseek_translate, chatgpt_translate, chatgpt_translate_title
 import unicodedata
-import html
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -19,6 +18,7 @@ print("PYTHONPATH:", sys.path)  # Debugging output
 
 import sqlite3
 import requests
+from concurrent.futures import ThreadPoolExecutor
 import json
 import logging
 logging.basicConfig(level=logging.INFO)
@@ -28,9 +28,17 @@ from translation import chatgpt_translate, google_translate, deepl_translate
 from flask import Flask, render_template, request, jsonify
 from flask_cors import CORS
 from variants_utils import get_product_option_values, update_product_option_values
-from bs4 import BeautifulSoup  # Add this here
 from variants_utils import get_predefined_translation  # ✅ Import the function
+from variants_utils import COLOR_NAME_MAP
 from google_sheets import process_google_sheet
+from upload_ingest import UploadError
+from provider_router import route_translation
+from model_policy import store_model_policy
+import near_duplicate_index
+import html_utils
+import content_hashes
+import type_classifier
+from post_processing_engine import post_process_description, post_process_batch
 
 # --- CORRECTED IMPORT BLOCK ---
 try:
@@ -96,10 +104,9 @@ def sanitize_shopify_product(product):
 # Define clean_html function here
 def clean_html(html):
     """
-    Fixes broken HTML by parsing and reformatting using BeautifulSoup.
+    Fixes broken HTML by parsing and reformatting it (lxml when installed, else html.parser).
     """
-    soup = BeautifulSoup(html, "html.parser")
-    return str(soup)
+    return html_utils.sanitize(html)
 
 # If your modules are located one directory up
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -230,272 +237,6 @@ def extract_name_from_title(title: str) -> str | None:
 logger = logging.getLogger(__name__)
 
 
-def post_process_description(original_html, new_html, method, product_data=None, target_lang='en', final_product_title=None, product_name=None):
-    """
-    Post-process a translated product description:
-    - ChatGPT & DeepSeek: Full formatting (title, intro, bullets, images, CTA).
-      Uses final_product_title (if provided) for the H3 heading.
-      Uses product_name (if provided) for name injection/consistency checks.
-    - Google/DeepL: Inject product images into cleaned HTML and apply name consistency.
-    """
-    try:
-        # Use product ID in logs if available
-        current_product_id = product_data.get("id", "UnknownID") if product_data else "UnknownID"
-        logger.debug(f"[{current_product_id}] [post_process_description] Starting.")
-
-        # Normalize method name
-        if isinstance(method, dict):
-            method_name = method.get("method", "").lower()
-        else:
-            method_name = method.lower()
-
-        # --- Determine the name to use (Prioritize passed-in name) ---
-        name_to_use = product_name # Use the name passed from the main loop if available
-        if not name_to_use and product_data:
-             original_title_for_name = product_data.get("title", "")
-             if original_title_for_name:
-                  # Clean title before extracting name
-                  cleaned_title_for_name = re.sub(r"<.*?>|\(Note:.*?\)|:\s*$", "", original_title_for_name, flags=re.IGNORECASE).strip()
-                  name_to_use = extract_name_from_title(cleaned_title_for_name) # Fallback: extract from product data
-                  logger.info(f"[{current_product_id}] Extracted name inside post_process_description (fallback): '{name_to_use}'")
-             else:
-                  logger.warning(f"[{current_product_id}] Cannot determine name: product_name not passed and product_data has no title.")
-        elif not name_to_use:
-             logger.warning(f"[{current_product_id}] Cannot determine name: product_name not passed and no product_data.")
-        else:
-             logger.info(f"[{current_product_id}] Using explicitly passed product_name for consistency: '{name_to_use}'")
-        # --- End Name Determination ---
-
-
-        # --- HTML Cleaning ---
-        if new_html:
-             new_html = html.unescape(new_html)
-             new_html = re.sub(r'(&#x2714;|&#10003;|&#9989;|\u2714|\u2713|\u2705|✔️|✔|✓|✅)\s*', '', new_html)
-             new_html = re.sub(r'\*\*', '', new_html)
-        else:
-             logger.warning(f"[{current_product_id}] [post_process_description] new_html input was empty or None.")
-             return ""
-
-
-        # --- Product image setup ---
-        images = product_data.get("images", []) if product_data else []
-        image1_url = images[0].get("src") if len(images) > 0 else ""
-        image2_url = images[1].get("src") if len(images) > 1 else ""
-        alt_text_base = f"{name_to_use} product image" if name_to_use else "Product image"
-
-
-        # --- CHATGPT / DEEPSEEK → Structured formatting ---
-        if method_name in ["chatgpt", "deepseek"]:
-            logger.info(f"[{current_product_id}] DEBUG: Entering ChatGPT/DeepSeek processing block.")
-            logger.info(f"[{current_product_id}] Parsing structured description (Method: {method_name}).")
-            parsed = _parse_chatgpt_description(new_html)
-            parsed_features = parsed.get("features", [])
-            logger.info(f"[{current_product_id}] DEBUG: Parsed features result: {parsed_features}")
-            logger.debug(f"[{current_product_id}] 📊 Output from _parse_chatgpt_description: {parsed}")
-
-            # *** Determine H3 Title ***
-            description_h3_title = parsed.get("title", "").strip()
-            if final_product_title:
-                if description_h3_title and description_h3_title != final_product_title:
-                     logger.info(f"[{current_product_id}] Overriding description H3 ('{description_h3_title}') with final product title: '{final_product_title}'")
-                description_h3_title = final_product_title
-            elif not description_h3_title:
-                logger.warning(f"[{current_product_id}] No title in parsed description & no final_product_title provided. Using empty H3.")
-
-            # *** Inject/Replace Name using name_to_use ***
-            if name_to_use:
-                 # Introduction
-                 intro_text = parsed.get("introduction", "")
-                 if intro_text:
-                      modified_intro = intro_text
-                      # Regex to find likely placeholder (Capitalized word before common product type descriptors)
-                      match = re.search(r"\b([A-Z][a-z]{3,})\b(?=\s+(?:3-teilige|Set|Collection|Outfit|Mode|Kapuzenpullover|Lingerie|Dessous|Besteckset|Spitzenset))", intro_text)
-                      placeholder_name_found = None
-                      if match: placeholder_name_found = match.group(1)
-
-                      if placeholder_name_found and placeholder_name_found.lower() != name_to_use.lower():
-                            logging.info(f"[{current_product_id}] Replacing name in parsed intro: '{placeholder_name_found}' -> '{name_to_use}'")
-                            modified_intro = re.sub(r'\b' + re.escape(placeholder_name_found) + r'\b', name_to_use, intro_text, count=1)
-                      elif name_to_use.lower() not in modified_intro.lower():
-                            logging.warning(f"[{current_product_id}] Name '{name_to_use}' not found in intro & no clear placeholder replaced.")
-                      parsed['introduction'] = modified_intro # Update dict
-
-                 # Features (less likely to need name, but include for completeness)
-                 updated_features = []
-                 for feature in parsed_features: # Use the variable defined earlier
-                      modified_feature = feature
-                      # Add similar replacement logic if needed, e.g., checking for placeholders in feature text
-                      # match_feature = re.search(...)
-                      # if match_feature and match_feature.group(1).lower() != name_to_use.lower():
-                      #    modified_feature = re.sub(...)
-                      #    logging.info(f"[{current_product_id}] Replacing name in feature: ...")
-                      updated_features.append(modified_feature)
-                 parsed['features'] = updated_features # Update dict
-
-            # --- Build HTML ---
-            labels = _get_localized_labels(target_lang)
-            bullet_html = _build_bullet_points(parsed.get("features", [])) # Use potentially updated features
-            logger.info(f"[{current_product_id}] DEBUG: Generated bullet_html (first 100 chars): {bullet_html[:100]}")
-
-            final_html_parts = [
-                '<div style="text-align:center; margin:0 auto; max-width:800px;">',
-                f'<h3 style="font-weight:bold;">{description_h3_title}</h3>' if description_h3_title else "",
-                f'<p>{parsed.get("introduction", "").strip()}</p>' if parsed.get("introduction", "").strip() else "", # Use updated intro
-            ]
-
-            if image1_url:
-                final_html_parts.append(
-                    f"<div style='margin:1em 0;'><img src='{image1_url}' style='width:480px; max-width:100%;' loading='lazy' alt='{alt_text_base} 1'/></div>"
-                )
-
-            # --- Bullet Point Section ---
-            # --- Add this NEW structure for the list ---
-          #  if bullet_html:
-              #  final_html_parts += [
-                    # Keep your H4 heading for "Product Advantages"
-               #     f'<h4 class="advantages-heading" style="font-weight:bold; margin-top: 1.5em; margin-bottom: 0.5em;">{labels.get("advantages", "Product Advantages")}</h4>',
-
-                    # ---> ADDED WRAPPER DIV <---
-                    # This div centers the list block itself because it's inline-block
-                    # within a text-align:center parent. text-align:left keeps list text readable.
-                 #   '<div class="centered-list-wrapper" style="display: inline-block; text-align: left;">',
-
-                        # The UL inside the wrapper. Keep necessary list styles.
-                        # Padding creates space for bullets; margin:0 removes default space.
-              #          '<ul class="advantages-list" style="list-style-position: outside; padding-left: 1.5em; margin: 0;">',
-                #            bullet_html, # Your generated <li> items
-                  #      '</ul>',
-#
-              #      # ---> END ADDED WRAPPER <---
-            #    ]
-            # --- End New Structure ---
-          #  else:
-             #   logger.info(f"[{current_product_id}] DEBUG: Skipping bullet point section (bullet_html is empty).")
-
-
-                # --- Bullet Point Section ---
-            if bullet_html:
-                final_html_parts += [
-                    # Keep your H4 heading for "Product Advantages"
-                    f'<h4 class="advantages-heading" style="font-weight:bold; margin-top: 1.5em; margin-bottom: 0.5em;">{labels.get("advantages", "Product Advantages")}</h4>',
-
-                    # ---> REPLACED WITH SIMPLER UL STRUCTURE <---
-                    # Add the desired class, relying on external CSS for ALL styling (centering, list appearance)
-                    '<ul class="product-bulletpoints">',
-                        bullet_html, # Your generated <li> items
-                    '</ul>',
-                    # ---> END REPLACEMENT <---
-                ]
-            else:
-                logger.info(f"[{current_product_id}] DEBUG: Skipping bullet point section (bullet_html is empty).")
-            # --- End Bullet Point Section ---
-                # --- End Bullet Point Section ---
-            
-            if image2_url:
-                final_html_parts.append(
-                    f"<div style='margin:2em 0;'><img src='{image2_url}' style='width:480px; max-width:100%;' loading='lazy' alt='{alt_text_base} 2'/></div>"
-                )
-
-            cta_html = parsed.get('cta', '').strip() or labels.get('cta', 'Jetzt entdecken!')
-            if cta_html:
-                 final_html_parts.append(
-                     f'<h4 style="font-weight:bold; margin:1.5em 0; font-size:1.2em;">{cta_html}</h4>'
-                 )
-
-            final_html_parts.append('</div>')
-
-            final_html_output = "\n".join(filter(None, final_html_parts)).strip()
-            logger.info(f"✅ [{current_product_id}] DEBUG: Final HTML output (ChatGPT/DeepSeek):\n'''\n{final_html_output}\n'''")
-            return final_html_output
-
-        # --- GOOGLE / DEEPL → Clean + inject images + inject name ---
-        elif method_name in ["google", "deepl"]:
-            logger.info(f"[{current_product_id}] Processing Google/DeepL output.")
-            soup = BeautifulSoup(new_html, "html.parser")
-
-            # Remove old <img> tags
-            img_removed_count = 0
-            for img in soup.find_all('img'):
-                img.decompose(); img_removed_count += 1
-            if img_removed_count > 0:
-                 logger.info(f"[{current_product_id}] Removed {img_removed_count} pre-existing img tag(s).")
-
-            # *** Inject/Replace Name using name_to_use ***
-            if name_to_use:
-                   replaced_in_para = False
-                   # Iterate through likely text containers
-                   for tag in soup.find_all(['p', 'li', 'span', 'div']): # Add other relevant tags if needed
-                       if not tag.string: continue # Skip tags with no direct string content
-
-                       original_text = tag.string.strip()
-                       if not original_text: continue # Skip empty strings
-
-                       # Example replacement logic: Find capitalized word before common product type words
-                       match = re.search(r"\b([A-Z][a-z]{3,})\b(?=\s+(?:3-teilige|Set|Collection|Outfit|Mode|Kapuzenpullover|Lingerie|Dessous|Besteckset|Spitzenset))", original_text)
-                       placeholder_name_found = None
-                       if match: placeholder_name_found = match.group(1)
-
-                       if placeholder_name_found and placeholder_name_found.lower() != name_to_use.lower():
-                           new_text = re.sub(r'\b' + re.escape(placeholder_name_found) + r'\b', name_to_use, original_text, count=1)
-                           logging.info(f"[{current_product_id}] Replacing name in G/D {tag.name}: '{placeholder_name_found}' -> '{name_to_use}'")
-                           tag.string.replace_with(new_text) # Use replace_with for NavigableString
-                           replaced_in_para = True
-                           # Consider breaking or continuing based on desired behavior
-                       elif name_to_use.lower() not in original_text.lower() and tag.name == 'p': # Only check primary paragraphs for absence
-                            # This warning might be too noisy, consider removing or making debug level
-                            logger.debug(f"[{current_product_id}] Name '{name_to_use}' not found in G/D paragraph and no placeholder replaced: '{original_text[:50]}...'")
-
-                   if replaced_in_para:
-                        logger.info(f"[{current_product_id}] Name replacement applied to Google/DeepL output.")
-
-
-            # --- Inject images ---
-            paragraphs = soup.find_all('p') # Re-find paragraphs
-            if paragraphs and image1_url and not soup.find('img', src=image1_url):
-                    img_div_1 = soup.new_tag('div', style='text-align:center; margin:1em 0;')
-                    img_1 = soup.new_tag('img', src=image1_url, style='width:480px; max-width:100%;', loading='lazy', alt=f'{alt_text_base} 1')
-                    img_div_1.append(img_1)
-                    paragraphs[0].insert_after(img_div_1) # Insert after first paragraph
-                    logging.info(f"✅ [{current_product_id}] Inserted first image (Google/DeepL).")
-
-            if image2_url and not soup.find('img', src=image2_url):
-                    last_p = soup.find_all('p')[-1] if soup.find_all('p') else None
-                    img_div_2 = soup.new_tag('div', style='text-align:center; margin:2em 0;')
-                    img_2 = soup.new_tag('img', src=image2_url, style='width:480px; max-width:100%;', loading='lazy', alt=f'{alt_text_base} 2')
-                    img_div_2.append(img_2)
-                    if last_p and hasattr(last_p, 'insert_before'):
-                         try: last_p.insert_before(img_div_2); logging.info(f"✅ [{current_product_id}] Inserted second image (Google/DeepL).")
-                         except Exception as insert_err: soup.append(img_div_2); logging.warning(f"[{current_product_id}] Failed image 2 insert, appended: {insert_err}")
-                    else: soup.append(img_div_2); logging.warning(f"⚠️ [{current_product_id}] Appended second image (Google/DeepL fallback - no last p).")
-
-            # --- Final wrapping ---
-            final_inner_html = str(soup)
-            direct_wrapper = soup.find('div', recursive=False, style=lambda v: v and 'max-width:800px' in v)
-            if not direct_wrapper:
-                 body = soup.find('body'); content_root = body if body else soup
-                 if not content_root.name == 'div' or 'max-width:800px' not in content_root.get('style',''):
-                      logging.info(f"[{current_product_id}] Adding final wrapper div for Google/DeepL.")
-                      final_inner_html = f'<div style="text-align: center; margin: 0 auto; max-width: 800px;">{content_root.decode_contents()}</div>'
-                 else: final_inner_html = str(content_root)
-
-            logger.info(f"✅ [{current_product_id}] Final HTML generated (Google/DeepL).")
-            return final_inner_html.strip()
-
-        else:
-            logger.warning(f"⚠️ [{current_product_id}] Unknown method '{method_name}'.")
-            return new_html # Return cleaned HTML
-
-    except Exception as e:
-        logger.exception(f"❌ [{product_data.get('id', 'UnknownID') if product_data else 'UnknownID'}] [post_process_description] Exception occurred: {e}")
-        # Attempt to return cleaned HTML as fallback
-        try:
-             cleaned_fallback = html.unescape(new_html or "")
-             cleaned_fallback = re.sub(r'(&#x2714;|&#10003;|...)\s*', '', cleaned_fallback) # Ensure entities list is correct
-             cleaned_fallback = re.sub(r'\*\*', '', cleaned_fallback)
-             return cleaned_fallback.strip()
-        except:
-             return new_html if new_html else ""
-        
 def post_process_title(ai_output: str) -> str:
     """
     Extracts and cleans the product title from potentially messy AI output.
@@ -512,9 +253,9 @@ def post_process_title(ai_output: str) -> str:
     # Step 1: Basic Cleanup (HTML, Markdown, extra spaces)
     try:
         # Use html.parser for robustness, separate lines with spaces
-        text = BeautifulSoup(ai_output, "html.parser").get_text(separator=' ')
+        text = html_utils.strip_text(ai_output, separator=' ', strip=False)
     except Exception as e:
-        logger.warning(f"⚠️ BeautifulSoup parsing failed: {e}. Using raw text.")
+        logger.warning(f"⚠️ HTML parsing failed: {e}. Using raw text.")
         text = ai_output # Fallback
 
     # Remove markdown bold, convert multiple spaces/newlines to single space
@@ -604,237 +345,6 @@ def post_process_title(ai_output: str) -> str:
        # Returning empty is safer than returning the whole junk string
        return ""
     
-def _parse_chatgpt_description(ai_text):
-    """
-    Robust parser for AI-generated structured descriptions from ChatGPT or DeepSeek.
-    Extracts: Product Title, Short Introduction, Product Advantages, Call to Action.
-    Supports both markdown and plain text formats.
-    """
-
-    parsed_data = {
-        'title': '',
-        'introduction': '',
-        'features': [],
-        'cta': ''
-    }
-
-    # Remove any HTML and clean up text
-    ai_text = BeautifulSoup(ai_text, "html.parser").get_text(separator="\n")
-    ai_text = ai_text.lstrip('\ufeff').strip()
-
-    # --- Define section label aliases ---
-    label_map = {
-        "title": [r"Product Title", r"Produkt[-\s]?Titel", r"Title"],
-        "introduction": [r"Short Introduction", r"Kurze Einführung"],
-        "advantages": [r"Product Advantages", r"Produktvorteile"],
-        "cta": [r"Call to Action", r"Handlungsaufforderung"]
-    }
-
-    # --- Create a combined regex pattern ---
-    label_section_map = {}
-    for section, patterns in label_map.items():
-        for p in patterns:
-            label_section_map[p] = section
-
-    combined_pattern = "|".join(label_section_map.keys())
-
-    # --- Compile regex to match sections with optional **bold** and flexible colons ---
-    section_regex = re.compile(
-        rf"(?i)(?:\*\*)?\s*({combined_pattern})\s*:?\s*(?:\*\*)?\s*\n?(.*?)(?=(?:\n\s*(?:\*\*)?\s*(?:{combined_pattern})\s*:?)|\Z)",
-        flags=re.DOTALL
-    )
-
-    matches = section_regex.findall(ai_text)
-
-    raw_advantages = ""
-    for label, content in matches:
-        section_key = None
-        for pattern, key in label_section_map.items():
-            if re.fullmatch(pattern, label.strip(), flags=re.IGNORECASE):
-                section_key = key
-                break
-
-        if section_key == "advantages":
-            raw_advantages = content.strip()
-        elif section_key:
-            parsed_data[section_key] = content.strip()
-
-    # --- Extract bullet points from advantages ---
-    if raw_advantages:
-        bullet_lines = re.findall(r"^\s*[-*•]\s*(.+)", raw_advantages, re.MULTILINE)
-        parsed_data["features"] = [line.strip() for line in bullet_lines if line.strip()]
-
-    # --- Fallback if everything failed ---
-    if not any([parsed_data['title'], parsed_data['introduction'], parsed_data['features']]):
-        logging.warning("⚠️ Structured parsing failed. Trying fallback split.")
-        lines = [line.strip() for line in ai_text.strip().split("\n") if line.strip()]
-        if lines:
-            parsed_data["title"] = lines[0]
-            parsed_data["introduction"] = "\n".join(lines[1:])
-
-    # --- Debug Logging ---
-    logging.debug(f"🔍 Parsed Title: {parsed_data['title']}")
-    logging.debug(f"📝 Parsed Introduction: {parsed_data['introduction'][:80]}...")
-    logging.debug(f"✅ Parsed Features: {parsed_data['features']}")
-    logging.debug(f"📣 Parsed CTA: {parsed_data['cta']}")
-
-    return parsed_data
-
-# --- Ensure _get_localized_labels and _build_bullet_points are defined/imported ---
-def _get_localized_labels(target_lang): # Placeholder
-    return {'advantages': 'Product Advantages', 'cta': 'Buy Now'}
-def _build_bullet_points(features): # Placeholder
-    return "\n".join([f"<li>{f}</li>" for f in features])
-def _get_first_two_images(product_data): # Placeholder Helper
-     if not product_data or 'images' not in product_data: return "", ""
-     imgs = product_data['images']; img1 = imgs[0].get('src','') if len(imgs)>0 else ""; img2 = imgs[1].get('src','') if len(imgs)>1 else ""; return img1, img2
-
-
-# --- Main Function ---
-def post_process_description(original_html, new_html, method, product_data=None, target_lang='en', final_product_title=None, product_name=None):
-    """
-    Post-process description. Applies structure for ChatGPT AND DeepSeek.
-    """
-    current_product_id = product_data.get("id", "UnknownID") if product_data else "UnknownID"
-    logger.info(f"[{current_product_id}] === ENTERING post_process_description (Method received: '{method}') ===")
-    try:
-        # Normalize method name
-        if isinstance(method, dict): method_name = method.get("method", "").lower()
-        else: method_name = str(method).lower()
-        logger.info(f"[{current_product_id}] Normalized method_name: '{method_name}'")
-
-        # Determine Name
-        name_to_use = product_name # ... (keep your name logic) ...
-        logger.info(f"[{current_product_id}] Using name: '{name_to_use}'")
-
-        # HTML Cleaning
-        if new_html: new_html = html.unescape(re.sub(r'\*\*', '', new_html)); # Simplified
-        else: return ""
-
-        # Image Setup
-        image1_url, image2_url = _get_first_two_images(product_data)
-        alt_text_base = f"{name_to_use} product image" if name_to_use else "Product image"
-
-        # --->>> CORRECTED CONDITION BELOW <<<---
-        if method_name in ["chatgpt", "deepseek"]:
-            logger.info(f"[{current_product_id}] Applying structured formatting for {method_name}.")
-
-            # Ensure robust parser is called
-            parsed = _parse_chatgpt_description(new_html)
-            logger.info(f"[{current_product_id}] DEBUG: Parsed features count: {len(parsed.get('features',[]))}")
-
-            if not parsed.get('introduction') and not parsed.get('features'):
-                 logger.error(f"[{current_product_id}] PARSING FAILED for {method_name}.")
-                 return new_html # Return cleaned raw text if parse fails
-
-            # Determine H3 Title
-            description_h3_title = parsed.get("title", "").strip()
-            if final_product_title: description_h3_title = final_product_title
-            elif not description_h3_title: logger.warning(f"[{current_product_id}] No title determined for H3.")
-
-            # Inject/Replace Name if needed
-            if name_to_use:
-                 # Apply your name replacement logic to parsed['introduction'] / parsed['features']
-                 pass # Placeholder for your name injection logic
-
-            # Build HTML structure
-            labels = _get_localized_labels(target_lang)
-            bullet_html = _build_bullet_points(parsed.get("features", []))
-
-            # Using the CORRECT centering structure for bullets
-            final_html_parts = [
-                '<div style="text-align:center; margin:0 auto; max-width:800px;">',
-                f'<h3 style="font-weight:bold;">{description_h3_title}</h3>' if description_h3_title else "",
-                f'<p>{parsed.get("introduction", "").strip()}</p>' if parsed.get("introduction", "").strip() else "",
-                (f"<div style='margin:1em 0;'><img src='{image1_url}' style='width:480px; max-width:100%;' loading='lazy' alt='{alt_text_base} 1'/></div>" if image1_url else ""),
-            ]
-            if bullet_html:
-                final_html_parts += [
-                    f'<h4 class="advantages-heading" style="font-weight:bold; margin-top: 1.5em; margin-bottom: 0.5em;">{labels.get("advantages", "Product Advantages")}</h4>',
-                    '<div class="centered-list-wrapper" style="display: inline-block; text-align: left;">',
-                    '<ul class="advantages-list" style="list-style-position: outside; padding-left: 1.5em; margin: 0;">',
-                    bullet_html, '</ul>', '</div>'
-                ]
-            if image2_url: final_html_parts.append(f"<div style='margin:2em 0;'><img src='{image2_url}' style='width:480px; max-width:100%;' loading='lazy' alt='{alt_text_base} 2'/></div>")
-            cta_html = parsed.get('cta', '').strip() or labels.get('cta', 'Jetzt entdecken!')
-            if cta_html: final_html_parts.append(f'<h4 style="font-weight:bold; margin:1.5em 0; font-size:1.2em;">{cta_html}</h4>')
-            final_html_parts.append('</div>')
-
-            final_html_output = "\n".join(filter(None, final_html_parts)).strip()
-            logger.info(f"✅ [{current_product_id}] Built structured HTML ({method_name}). Length: {len(final_html_output)}")
-            return final_html_output
-
-        else: # Fallback for Google, DeepL, others
-            logger.info(f"[{current_product_id}] Using basic image injection path for method '{method_name}'.")
-            # ... (Keep your existing BeautifulSoup logic for Google/DeepL here) ...
-            soup = BeautifulSoup(new_html, "html.parser"); # Example start
-            # ... logic to remove existing images ...
-            # ... logic to inject image1_url / image2_url ...
-            # ... logic to wrap in centered div ...
-            final_wrapped_html = f'<div style="text-align: center; margin: 0 auto; max-width: 800px;">{str(soup)}</div>' # Example wrap
-            logger.info(f"✅ [{current_product_id}] Finished basic processing ({method_name}).")
-            return final_wrapped_html.strip()
-
-    except Exception as e:
-        logger.exception(f"❌ [{current_product_id}] Exception in post_process_description: {e}")
-        # Fallback
-        try: return html.unescape(new_html or "").strip()
-        except: return new_html if new_html else ""
-
-def _get_localized_labels(target_lang):
-    """Localizes 'Product Advantages' heading and a fallback CTA."""
-    localized_map = {
-        'en': {'advantages': 'Product Advantages', 'cta': 'Buy Now!'},
-        'de': {'advantages': 'Produktvorteile', 'cta': 'Jetzt kaufen!'},
-        'es': {'advantages': 'Ventajas del producto', 'cta': '¡Compra ahora!'},
-        'fr': {'advantages': 'Avantages du produit', 'cta': 'Achetez maintenant !'},
-        'it': {'advantages': 'Vantaggi del prodotto', 'cta': 'Acquista ora!'},
-        'nl': {'advantages': 'Productvoordelen', 'cta': 'Koop nu!'},
-        'pt': {'advantages': 'Vantagens do produto', 'cta': 'Compre agora!'},
-        'ru': {'advantages': 'Преимущества товара', 'cta': 'Купить сейчас!'},
-        'ja': {'advantages': '製品の特長', 'cta': '今すぐ購入！'},
-        'zh': {'advantages': '产品优势', 'cta': '立即购买！'},
-    }
-    return localized_map.get(target_lang.lower(), localized_map['en'])
-
-
-def _build_bullet_points(features):
-    """
-    Converts feature lines into clean <li> HTML list items.
-    Removes markdown, emojis, and excess symbols.
-    """
-    bullet_li_list = []
-    for line in features:
-        # Clean leading emojis, dashes, stars, markdown bold
-        line = re.sub(r"^[✔️•\-* ]+", "", line)
-        line = re.sub(r"\*\*(.*?)\*\*", r"\1", line)
-
-        # Optional: bold up to first colon/dash
-        parts = re.split(r'[:\-]', line, maxsplit=1) # Use keyword argument
-        if len(parts) == 2:
-            bold, rest = parts
-            bullet_li_list.append(f"<li><strong>{bold.strip()}</strong>: {rest.strip()}</li>")
-        else:
-            bullet_li_list.append(f"<li>{line.strip()}</li>")
-    return "\n".join(bullet_li_list)
-
-
-
-def _get_first_two_images(product_data):
-    """
-    Returns the URLs of the first two images from product_data['images'],
-    or empty strings if none exist.
-    """
-    image1_url = ""
-    image2_url = ""
-    if product_data and 'images' in product_data:
-        imgs = product_data['images']
-        if len(imgs) > 0:
-            image1_url = imgs[0].get('src', '')
-        if len(imgs) > 1:
-            image2_url = imgs[1].get('src', '')
-    return image1_url, image2_url
-
 # ------------------------------ #
 # slugify
 # ------------------------------ #
@@ -907,29 +417,40 @@ def apply_translation_method(
         return original_text
 
 
-    try:
-        # Handle ChatGPT and DeepSeek first (direct returns)
-        if method_name == "chatgpt":
-            logging.info("🤖 Using ChatGPT — calling once for full HTML...")
-            return chatgpt_translate(
-    original_text,
-    prompt,
-    target_lang,
-    field_type,
-    product_title
-)
-        if method_name == "deepseek":
-            logging.info("🚀 Using DeepSeek translation")
-            result = deepseek_translate(
-                original_text,
-                target_language=target_lang,
-                style="ecommerce"
-            )
-            if "<" not in result:
-                result = f"<p>{result.strip()}</p>"
-            return result
+    def _translate_llm_chatgpt():
+        logging.info("🤖 Using ChatGPT — calling once for full HTML...")
+        return chatgpt_translate(original_text, prompt, target_lang, field_type, product_title, raise_errors=True)
 
-        # Existing Google/DeepL handling below
+    def _translate_llm_deepseek():
+        logging.info("🚀 Using DeepSeek translation")
+        result = deepseek_translate(
+            original_text,
+            target_language=target_lang,
+            style="ecommerce",
+            raise_errors=True
+        )
+        if result and result != original_text and "<" not in result:
+            result = f"<p>{result.strip()}</p>"
+        return result
+
+    def _translate_html_nodes(provider):
+        # Translate text nodes individually; html_utils keeps the HTML structure and drops empty divs
+        translate = google_translate if provider == "google" else deepl_translate
+        node_source = "" if provider == "deepl" and source_lang.lower() == "auto" else source_lang  # DeepL detects on ""
+        translated_nodes = 0
+
+        def _translate_node(stripped):
+            nonlocal translated_nodes
+            translated = translate(stripped, node_source, target_lang, raise_errors=True)
+            translated_nodes += 1
+            logging.debug(f"🔤 Node {translated_nodes}: '{stripped[:40]}' → '{(translated or '')[:40]}'")
+            return translated
+
+        result = html_utils.replace_text_nodes(original_text, _translate_node, drop_empty_divs=True)
+        logging.info(f"✅ [{provider}] HTML translation complete with structure preserved ({translated_nodes} text nodes).")
+        return result
+
+    try:
         # For Google or DeepL, do language detection if needed
         if method_name in ["google", "deepl"] and source_lang.lower() == "auto" and description:
             try:
@@ -939,43 +460,15 @@ def apply_translation_method(
                 logging.info(f"🌍 Detected source_lang: {source_lang}")
             except Exception as e:
                 logging.warning(f"⚠️ Language detection failed: {e}")
-        
-        # Parse HTML & translate text nodes individually
-        soup = BeautifulSoup(original_text, "html.parser")
-        text_nodes = soup.find_all(string=True)
-        logging.info(f"📄 Found {len(text_nodes)} text nodes inside HTML.")
-
-        # Clean up empty divs
-        empty_divs = 0
-        for div in soup.find_all('div'):
-            if not div.text.strip() and not div.find(['img', 'ul', 'p', 'h1', 'h2', 'h3']):
-                div.decompose()
-                empty_divs += 1
-        logging.info(f"🧼 Removed {empty_divs} empty <div> elements.")
-
-        translated_parts = {}
-
-        for i, node in enumerate(text_nodes):
-            stripped = node.strip()
-            if not stripped:
-                translated_parts[i] = node
-                continue
-
-            if method_name == "google":
-                translated = google_translate(stripped, source_lang, target_lang)
-            elif method_name == "deepl":
-                translated = deepl_translate(stripped, source_lang, target_lang)
 
-            translated_parts[i] = translated
-            logging.debug(f"🔤 Node {i}: '{stripped[:40]}' → '{translated[:40]}'")
-
-        # Replace text nodes with translated versions
-        for i, new_text in translated_parts.items():
-            text_nodes[i].replace_with(new_text)
-
-        result_html = str(soup)
-        logging.info("✅ HTML translation complete with structure preserved.")
-        return result_html
+        # The router tries the chosen method first and hedges/falls back to an equivalent one
+        provider_calls = {
+            "chatgpt": _translate_llm_chatgpt,
+            "deepseek": _translate_llm_deepseek,
+            "google": lambda: _translate_html_nodes("google"),
+            "deepl": lambda: _translate_html_nodes("deepl"),
+        }
+        return route_translation(field_type, method_name, provider_calls, original_text)
 
     except Exception as e:
         logging.error(f"❌ Translation failed: {e}")
@@ -1087,14 +580,24 @@ def upload_google_sheet():
 
     file = request.files["file"]
     image_column = request.form.get("image_column", "A")
+    id_column = request.form.get("id_column") or None  # Default: found by header ("Product ID")
     starting_row = int(request.form.get("starting_row", 2))
     if starting_row < 2:
         return jsonify({"error": "Starting row must be at least 2."}), 400
 
-    processed_count = process_google_sheet(file, image_column, starting_row)
+    try:
+        summary = process_google_sheet(file, image_column, starting_row, id_column)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+
+    counts = (f"{summary['rows']} rows: {summary['enqueued']} enqueued, "
+              f"{summary['duplicates']} duplicates, {summary['invalid']} invalid")
+    if "error" in summary:
+        return jsonify({"error": f"Upload import failed ({counts}): {summary['error']}", **summary}), 500
     return jsonify({
         "success": True,
-        "message": f"Processed {processed_count} products from the Google Sheet."
+        "message": f"Enqueued {summary['enqueued']} new products from the Google Sheet for translation ({counts}).",
+        **summary
     })
 
 # --- Test Product Endpoint ---
@@ -1446,10 +949,13 @@ def translate_test_product():
                 else:
                     logging.info(f" Calling translation function for body_html (method: {chosen_method})...")
                     # --- Direct calls based on method string ---
+                    # Stream structured output for previews: sections are logged as they arrive
+                    # and malformed generations are retried before the full completion finishes.
+                    log_section = lambda label, text: logging.info(f"📋 [{label}] {text[:120]}")
                     if chosen_method == "chatgpt":
-                         translated = chatgpt_translate(original_value, custom_prompt=prompt, target_language=target_lang, product_title=final_processed_title, required_name=chosen_random_name_for_product)
+                         translated = chatgpt_translate(original_value, custom_prompt=prompt, target_language=target_lang, product_title=final_processed_title, required_name=chosen_random_name_for_product, stream=True, on_section=log_section)
                     elif chosen_method == "deepseek":
-                         translated = deepseek_translate(original_value, custom_prompt=prompt, target_language=target_lang, product_title=final_processed_title, required_name=chosen_random_name_for_product)
+                         translated = deepseek_translate(original_value, custom_prompt=prompt, target_language=target_lang, product_title=final_processed_title, required_name=chosen_random_name_for_product, stream=True, on_section=log_section)
                     elif chosen_method == "google":
                          translated = google_translate(original_value, source_language=source_lang, target_language=target_lang)
                     elif chosen_method == "deepl":
@@ -1662,6 +1168,39 @@ translation_progress = {
     "errors": 0
 }
 
+# Parallel field mode: body translation and type classification run while the title is translated.
+# The final title is injected into the description afterwards by post_process_description.
+TRANSLATE_FIELDS_PARALLEL = os.getenv("TRANSLATE_FIELDS_PARALLEL", "false").lower() in ("1", "true", "yes")
+field_executor = ThreadPoolExecutor(max_workers=int(os.getenv("TRANSLATE_FIELDS_WORKERS", "8")), thread_name_prefix="product-fields")
+
+
+def translate_body_raw(product_id, original_body, chosen_method, prompt, target_lang, source_lang, title_context, required_name, model_policy=None):
+    """Translates body_html with the chosen method (before post-processing). Returns "" if the body is empty."""
+    translated_body = ""
+    if not original_body:
+        logger.warning(f"  [{product_id}] Skipping body: Original is empty.")
+    # --- Method-specific calls ---
+    elif chosen_method in ("chatgpt", "deepseek"):
+        # Near-duplicate of an already translated product? Reuse it, patching name/colors
+        near_dup_scope = near_duplicate_index.make_scope(chosen_method, target_lang, prompt)
+        near_dup = near_duplicate_index.find_similar(near_dup_scope, original_body, product_id=product_id, glossary=COLOR_NAME_MAP)
+        if near_dup:
+            translated_body = near_duplicate_index.patch_translation(near_dup, original_body, target_lang, required_name=required_name, glossary=COLOR_NAME_MAP)
+        if not translated_body:
+            llm_translate = chatgpt_translate if chosen_method == "chatgpt" else deepseek_translate
+            translated_body = llm_translate(original_body, custom_prompt=prompt, target_language=target_lang, product_title=title_context, required_name=required_name, model_policy=model_policy)
+            if translated_body and translated_body != original_body:
+                near_duplicate_index.add(near_dup_scope, product_id, original_body, translated_body, required_name=required_name, glossary=COLOR_NAME_MAP)
+    elif chosen_method == "google":
+        translated_body = google_translate(original_body, source_language=source_lang, target_language=target_lang)
+    elif chosen_method == "deepl":
+        translated_body = deepl_translate(original_body, source_language=source_lang, target_language=target_lang)
+    else:
+        logger.warning(f"  [{product_id}] Unknown method '{chosen_method}' for body_html.")
+        translated_body = original_body
+    return translated_body
+
+
 # --- Translate Entire Collection ---
 # In your app.py
 
@@ -1683,6 +1222,10 @@ def translate_collection_fields():
         source_lang = data.get("source_language", "auto")
         prompt_title = data.get("prompt_title", "")
         prompt_desc = data.get("prompt_desc", "")
+        force_retranslate = bool(data.get("force", False)) # Ignore content hashes and translate everything
+        parallel_fields = bool(data.get("parallel_fields", TRANSLATE_FIELDS_PARALLEL)) # Title, body and type concurrently
+        # Per-store models/max_tokens, as export_weekly uses them (store from the request, else this shop)
+        store_policy = store_model_policy(store_value=data.get("store"), store_url=SHOPIFY_STORE_URL)
         chosen_random_name_for_product = None
         # prompt_variants = data.get("prompt_variants", "") # If needed
 
@@ -1699,7 +1242,7 @@ def translate_collection_fields():
         logger.info(f"Bulk translate request for collection {collection_id}, fields: {fields_to_translate}, methods: {field_methods}")
         # --- Fetch products ---
         # Fetch required fields, including handle if needed for comparison or update
-        fetch_fields = "id,title,body_html,handle,images,variants,options"
+        fetch_fields = "id,title,body_html,handle,images,variants,options,tags"
         # --- Modify this section ---
         try:
             # Extract numeric ID from GID (e.g., "gid://shopify/Collection/644626448708")
@@ -1739,6 +1282,11 @@ def translate_collection_fields():
         successful_removals = 0
         successful_type_assignments = 0
         successful_moves = 0
+        skipped_unchanged = 0
+        config_hash = content_hashes.hash_config(
+            fields=sorted(fields_to_translate), methods=field_methods, source_language=source_lang,
+            prompt_title=prompt_title, prompt_desc=prompt_desc
+        )
 
 
         # --- Loop through products ---
@@ -1751,6 +1299,15 @@ def translate_collection_fields():
              # ... (after initializing product_id, original_title, original_body etc.) ...
             logger.debug(f"--- Starting processing for Product ID: {product_id} ---") # ADDED DEBUG
 
+            # --- Skip products unchanged since their last successful translation ---
+            source_hash = content_hashes.hash_source_fields(product_data)
+            if content_hashes.is_unchanged(product_id, target_lang, source_hash, config_hash, force=force_retranslate):
+                logger.info(f"⏭️ [{product_id}] Unchanged since last successful translation to '{target_lang}', skipping.")
+                skipped_unchanged += 1
+                processed_count += 1
+                translation_progress["completed"] = processed_count
+                continue
+
             # --->>> STEP 1: DETERMINE GENDER <<<---
             product_gender = determine_product_gender(product_data) # Call the function from random_name.py
             logger.info(f"[{product_id}] Determined Product Gender: {product_gender}")
@@ -1821,6 +1378,25 @@ def translate_collection_fields():
             if original_title:
                 current_title_for_processing = re.sub(r"<.*?>|\(Note:.*?\)", "", original_title).strip()
 
+            # --- Parallel mode: start body and type classification now, title runs below ---
+            body_future = type_future = None
+            if parallel_fields:
+                if "body_html" in fields_to_translate:
+                    body_future = field_executor.submit(
+                        translate_body_raw, product_id, original_body, field_methods.get("body_html", "chatgpt").lower(),
+                        prompt_desc, target_lang, source_lang, current_title_for_processing, chosen_random_name_for_product,
+                        model_policy=store_policy
+                    )
+                type_future = field_executor.submit(
+                    get_ai_type_from_description,
+                    product_description=original_body,
+                    allowed_types_list=ALLOWED_PRODUCT_TYPES,
+                    product_title=current_title_for_processing,
+                    product_tags=product_data.get("tags"),
+                    product_gender=product_gender,
+                    model_policy=store_policy
+                )
+
             # --- TITLE Processing ---
             if "title" in fields_to_translate:
                 chosen_method = field_methods.get("title", "google").lower()
@@ -1832,9 +1408,9 @@ def translate_collection_fields():
                         logger.warning(f"  [{product_id}] Skipping title: Original is empty.")
                     # --- Method-specific translation calls ---
                     elif chosen_method == "chatgpt":
-                        translated_title_raw = chatgpt_translate_title(original_title, custom_prompt=prompt, target_language=target_lang, required_name=chosen_random_name_for_product)
+                        translated_title_raw = chatgpt_translate_title(original_title, custom_prompt=prompt, target_language=target_lang, required_name=chosen_random_name_for_product, model_policy=store_policy)
                     elif chosen_method == "deepseek":
-                        raw_output = deepseek_translate_title(original_title, custom_prompt=prompt, target_language=target_lang, required_name=chosen_random_name_for_product)
+                        raw_output = deepseek_translate_title(original_title, custom_prompt=prompt, target_language=target_lang, required_name=chosen_random_name_for_product, model_policy=store_policy)
                         translated_title_raw = post_process_title(raw_output) # post_process_title cleans DeepSeek output
                     elif chosen_method == "google":
                          translated_title_raw = google_translate(original_title, source_language=source_lang, target_language=target_lang)
@@ -1899,21 +1475,10 @@ def translate_collection_fields():
                 prompt = prompt_desc
                 logger.info(f"  [{product_id}] Translating Body HTML using: {chosen_method}")
                 try:
-                    translated_body = ""
-                    if not original_body:
-                         logger.warning(f"  [{product_id}] Skipping body: Original is empty.")
-                    # --- Method-specific calls ---
-                    elif chosen_method == "chatgpt":
-                         translated_body = chatgpt_translate(original_body, custom_prompt=prompt, target_language=target_lang, product_title=final_processed_title, required_name=chosen_random_name_for_product) # Pass final title
-                    elif chosen_method == "deepseek":
-                         translated_body = deepseek_translate(original_body, custom_prompt=prompt, target_language=target_lang, product_title=final_processed_title, required_name=chosen_random_name_for_product) # Pass final title
-                    elif chosen_method == "google":
-                         translated_body = google_translate(original_body, source_language=source_lang, target_language=target_lang)
-                    elif chosen_method == "deepl":
-                         translated_body = deepl_translate(original_body, source_language=source_lang, target_language=target_lang)
+                    if body_future is not None:
+                         translated_body = body_future.result() # Started in parallel with the title
                     else:
-                         logger.warning(f"  [{product_id}] Unknown method '{chosen_method}' for body_html.")
-                         translated_body = original_body
+                         translated_body = translate_body_raw(product_id, original_body, chosen_method, prompt, target_lang, source_lang, final_processed_title, chosen_random_name_for_product, model_policy=store_policy) # Pass final title
 
                     # --- Post-process ---
                     if translated_body:
@@ -2001,11 +1566,17 @@ def translate_collection_fields():
 
             determined_type = None # Initialize for this product iteration
             try:
-                 determined_type = get_ai_type_from_description(
-                    product_description=description_for_type,
-                    allowed_types_list=ALLOWED_PRODUCT_TYPES, # Pass the imported set/list
-                    product_title=title_for_context
-                 )
+                 if type_future is not None:
+                     determined_type = type_future.result() # Started in parallel with the title
+                 else:
+                     determined_type = get_ai_type_from_description(
+                        product_description=description_for_type,
+                        allowed_types_list=ALLOWED_PRODUCT_TYPES, # Pass the imported set/list
+                        product_title=title_for_context,
+                        product_tags=product_data.get("tags"),
+                        product_gender=product_gender, # Picks "... Women" vs "... Men" on the local fast path
+                        model_policy=store_policy
+                     )
                  # determined_type will be None if AI fails or returns invalid type
             except Exception as ai_type_err:
                  logger.error(f"  [{product_id}] Exception calling get_ai_type_from_description: {ai_type_err}", exc_info=True)          
@@ -2026,6 +1597,7 @@ def translate_collection_fields():
                 if update_resp.status_code in (200, 201):
                     logger.info(f"✅ Successfully updated product {product_id} via REST.")
                     successful_updates += 1
+                    post_update_ok = False  # Hashed as done only once the product has left the source collection
 
                     # --- Post-Update Actions (Type Assignment, Move, Remove) ---
                     if determined_type: # Check if AI determined a type
@@ -2056,6 +1628,17 @@ def translate_collection_fields():
                                 successful_removals += 1
                             else:
                                 logger.error(f"  [{product_id}] ❌ Failed to remove product from source collection '{SOURCE_COLLECTION_ID}'.")
+                            post_update_ok = moved_to_target and removed_from_source
+
+                    if post_update_ok:
+                        # The product now holds its translation; hash that too so a rerun recognises it
+                        content_hashes.record_success(
+                            product_id, target_lang, source_hash, config_hash,
+                            output_hash=content_hashes.hash_source_fields({**product_data, **updates}),
+                            output_title=updates.get("title")
+                        )
+                    else:
+                        logger.warning(f"  [{product_id}] Post-update steps incomplete; not marking it unchanged so the next run retries it.")
 
                 else: # Main product update failed
                     logger.error(f"❌ Error updating product {product_id} via REST: {update_resp.status_code} {update_resp.text}")
@@ -2083,7 +1666,9 @@ def translate_collection_fields():
             f"Type assignments: {successful_type_assignments}. "
             f"Moves: {successful_moves}. "
             f"Removals: {successful_removals}. "
-            f"Errors encountered: {error_count}."
+            f"Skipped unchanged: {skipped_unchanged}. "
+            f"Errors encountered: {error_count}. "
+            f"{type_classifier.report()}."
         )
         logger.info(final_message)
         print(final_message)
@@ -2095,7 +1680,9 @@ def translate_collection_fields():
             "successful_updates": successful_updates,
             "successful_type_assignments": successful_type_assignments,
             "successful_moves": successful_moves,
-            "successful_removals": successful_removals
+            "successful_removals": successful_removals,
+            "skipped_unchanged": skipped_unchanged,
+            "local_type_hit_rate": type_classifier.hit_rate()
         })
     except Exception as e:
         logger.exception(f"❌ Uncaught error in translate_collection_fields: {e}")
@@ -2121,6 +1708,7 @@ def approve_translations():
 
     with sqlite3.connect(DATABASE) as conn:
         cursor = conn.cursor()
+        approved = []  # (pid, translated_title, post_process item)
         for pid in product_ids:
             # Fetch translations
             cursor.execute("""
@@ -2140,35 +1728,36 @@ def approve_translations():
                     continue
 
                 product_data = resp.json().get("product", {})
-                original_description = product_data.get("body_html", "")
-
-                # Post-process description with image reinjection
-                final_description = post_process_description(
-                    original_description,
-                    translated_description,
-                    method="chatgpt",  # You can adapt this if you store the actual method
-                    product_data=product_data,
-                    target_lang=target_lang
-                )
-
-                # Prepare update
-                payload = {
-                    "product": {
-                        "id": pid,
-                        "title": translated_title,
-                        "body_html": final_description
-                    }
+                approved.append((pid, translated_title, {
+                    "original_html": product_data.get("body_html", ""),
+                    "new_html": translated_description,
+                    "method": "chatgpt",  # You can adapt this if you store the actual method
+                    "product_data": product_data,
+                    "target_lang": target_lang,
+                }))
+
+        # Post-process all descriptions (with image reinjection) in one engine call
+        final_descriptions = post_process_batch([item for _, _, item in approved])
+
+        for (pid, translated_title, _item), final_description in zip(approved, final_descriptions):
+            # Prepare update
+            payload = {
+                "product": {
+                    "id": pid,
+                    "title": translated_title,
+                    "body_html": final_description
                 }
+            }
 
-                url_put = f"{ensure_https(SHOPIFY_STORE_URL)}/admin/api/2023-04/products/{pid}.json"
-                update_resp = shopify_request("PUT", url_put, json=payload)
+            url_put = f"{ensure_https(SHOPIFY_STORE_URL)}/admin/api/2023-04/products/{pid}.json"
+            update_resp = shopify_request("PUT", url_put, json=payload)
 
-                if update_resp.status_code in (200, 201):
-                    # Mark as approved in DB
-                    cursor.execute("UPDATE translations SET status='Approved' WHERE product_id=?", (pid,))
-                    log_translation(pid, translated_title, final_description, "Approved")
-                else:
-                    logger.error(f"❌ Failed to update product {pid}: {update_resp.text}")
+            if update_resp.status_code in (200, 201):
+                # Mark as approved in DB
+                cursor.execute("UPDATE translations SET status='Approved' WHERE product_id=?", (pid,))
+                log_translation(pid, translated_title, final_description, "Approved")
+            else:
+                logger.error(f"❌ Failed to update product {pid}: {update_resp.text}")
 
         conn.commit()
 
@@ -2203,7 +1792,7 @@ def reject_translation():
         Description: {product_description}
         User's Custom Instruction: {new_prompt}
         """
-        new_translated_description = chatgpt_translate(new_ai_prompt, new_prompt)
+        new_translated_description = chatgpt_translate(new_ai_prompt, new_prompt, bypass_cache=True)
         cursor.execute("""
             UPDATE translations 
             SET translated_description=?, status='Pending Review'
@@ -0,0 +1,61 @@
+# File: benchmark_html.py
+# Micro-benchmark: BeautifulSoup(html.parser) vs the html_utils backends on supplier-sized descriptions.
+# Usage: python benchmark_html.py [--sizes 10,25,50] [--repeat 20]
+import argparse
+import timeit
+from bs4 import BeautifulSoup
+import html_utils
+
+SAMPLE_BLOCK = (
+    '<div class="desc"><h3>Elegant Lace Lingerie Set</h3>'
+    '<p>Soft, breathable lace with an adjustable strap &amp; a flattering cut for every day.</p>'
+    '<div> </div><ul><li><strong>Material:</strong> 90% polyamide, 10% elastane</li>'
+    '<li><strong>Care:</strong> hand wash at 30°C</li><li>Comfortable fit - all day long</li></ul>'
+    '<p><img src="https://cdn.example.com/img.jpg" alt="Product image"><span>Available in black, white &amp; red.</span></p></div>\n'
+)
+
+
+def make_description(size_kb):
+    return SAMPLE_BLOCK * max(1, (size_kb * 1024) // len(SAMPLE_BLOCK))
+
+
+def bs_strip(markup):
+    return BeautifulSoup(markup, "html.parser").get_text(separator=" ", strip=True)
+
+
+def bs_replace(markup):
+    soup = BeautifulSoup(markup, "html.parser")
+    text_nodes = soup.find_all(string=True)
+    for div in soup.find_all("div"):
+        if not div.text.strip() and not div.find(["img", "ul", "p", "h1", "h2", "h3"]):
+            div.decompose()
+    for node in text_nodes:
+        if node.strip():
+            node.replace_with(node.strip().upper())
+    return str(soup)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="html.parser vs html_utils micro-benchmark")
+    parser.add_argument("--sizes", default="10,25,50", help="Description sizes in KB")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"html_utils backends: read={html_utils.READ_BACKEND}, write={html_utils.WRITE_BACKEND}")
+    print(f"{'size':>6} {'operation':<20} {'html.parser ms':>15} {'html_utils ms':>14} {'speedup':>8}")
+    for size_kb in (int(s) for s in args.sizes.split(",")):
+        markup = make_description(size_kb)
+        cases = [
+            ("strip text", lambda: bs_strip(markup), lambda: html_utils.strip_text(markup)),
+            ("replace text nodes", lambda: bs_replace(markup),
+             lambda: html_utils.replace_text_nodes(markup, str.upper, drop_empty_divs=True)),
+            ("sanitize", lambda: str(BeautifulSoup(markup, "html.parser")), lambda: html_utils.sanitize(markup)),
+        ]
+        for name, baseline, candidate in cases:
+            base_ms = min(timeit.repeat(baseline, number=1, repeat=args.repeat)) * 1000
+            new_ms = min(timeit.repeat(candidate, number=1, repeat=args.repeat)) * 1000
+            print(f"{size_kb:>4}KB {name:<20} {base_ms:>15.2f} {new_ms:>14.2f} {base_ms / new_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
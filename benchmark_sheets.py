@@ -0,0 +1,93 @@
+# File: benchmark_sheets.py
+# Offline benchmark of the Sheets-heavy flows against the in-process fake_sheets backend:
+# API calls (reads/writes, per operation), simulated 429s and wall time per scenario.
+# Usage: python benchmark_sheets.py [--rows 2000] [--latency 0.05] [--error-rate 0.02] [--throttle]
+import os
+import time
+import argparse
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sheets flows against fake_sheets (no network)")
+    parser.add_argument("--rows", type=int, default=2000, help="Products in Sheet1")
+    parser.add_argument("--done-share", type=float, default=0.3, help="Share of Sheet1 rows already DONE/APPROVED")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per API call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls failing with a 429")
+    parser.add_argument("--throttle", action="store_true",
+                        help="Keep the real sheets_scheduler quotas (slow: waits out 60 s windows)")
+    return parser.parse_args()
+
+
+def seed_sheets(fake_sheets, sheet_id, rows, done_share):
+    header = ["Product ID", "Product Title", "Sales Count", "Status", "Cloned Product GID", "Cloned Product Title", "Target Store"]
+    done_every = max(1, round(1 / done_share)) if done_share > 0 else 0
+    sheet1 = [header] + [
+        [str(8000000000 + i), f"Product {i}", str(i % 17), "DONE" if done_every and i % done_every == 0 else "PENDING", "", "", ""]
+        for i in range(rows)
+    ]
+    fake_sheets.seed(sheet_id, "Sheet1", sheet1)
+    fake_sheets.seed(sheet_id, "Sheet2", [header])
+    return sheet1
+
+
+def main():
+    args = parse_args()
+    os.environ["SHEETS_BACKEND"] = "fake"
+    if not args.throttle:
+        os.environ.setdefault("SHEETS_READS_PER_MINUTE", "1000000")
+        os.environ.setdefault("SHEETS_WRITES_PER_MINUTE", "1000000")
+
+    import fake_sheets
+    import sheets_client
+    import sheet_row_index
+    import sheet_snapshot
+    import sheet_write_buffer
+    import google_sheets
+    from google_sheets2 import GoogleSheetManager
+
+    fake_sheets.FAKE_SHEETS_LATENCY = args.latency
+    fake_sheets.FAKE_SHEETS_ERROR_RATE = args.error_rate
+    google_sheets.RETRY_DELAY = 0  # Backoff sleeps would only measure the benchmark's own settings
+    sheet_id = google_sheets.GOOGLE_SHEET_ID
+
+    def fresh():
+        fake_sheets.reset()
+        sheets_client.invalidate()
+        sheet_row_index.invalidate()
+        sheet_snapshot.invalidate()
+        return seed_sheets(fake_sheets, sheet_id, args.rows, args.done_share)
+
+    def status_updates():
+        pending = [row[0] for row in rows[1:] if row[3] == "PENDING"][:200]
+        for product_id in pending:
+            google_sheets.update_product_status_in_sheet(product_id, "PROCESSING")
+        sheet_write_buffer.flush_all()
+
+    def manager_move():
+        manager = GoogleSheetManager(google_sheets.GOOGLE_CREDENTIALS_FILE, sheet_id)
+        done = [(i + 1, row) for i, row in enumerate(rows) if i and row[3] == "DONE"]
+        manager.move_rows([n for n, _ in done], [row for _, row in done], "Sheet1", "Sheet2")
+
+    scenarios = [
+        ("export_sales_to_sheet", lambda: google_sheets.export_sales_to_sheet(
+            [{"product_id": str(8000000000 + i), "title": f"Product {i}", "sales_count": i % 23}
+             for i in range(args.rows // 2, args.rows + args.rows // 2)])),
+        ("status updates (200)", status_updates),
+        ("move_done_to_sheet2", google_sheets.move_done_to_sheet2),
+        ("GoogleSheetManager.move_rows", manager_move),
+    ]
+
+    print(f"fake_sheets: rows={args.rows} latency={args.latency}s error_rate={args.error_rate} throttle={args.throttle}")
+    print(f"{'scenario':<30} {'reads':>6} {'writes':>7} {'429s':>5} {'seconds':>8}  top operations")
+    for name, run in scenarios:
+        rows = fresh()
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        summary = fake_sheets.report()
+        top = ", ".join(f"{op}={n}" for op, n in list(summary["calls"].items())[:4])
+        print(f"{name:<30} {summary['reads']:>6} {summary['writes']:>7} {summary['quota_errors']:>5} {elapsed:>8.2f}  {top}")
+
+
+if __name__ == "__main__":
+    main()
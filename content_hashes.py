@@ -0,0 +1,132 @@
+# content_hashes.py
+
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# CONFIGURATION
+# ---------------------------------- #
+CONTENT_HASH_DB = os.getenv("CONTENT_HASH_DB", "content_hashes.db")
+
+_conn = None
+_lock = threading.Lock()
+
+stats = {"skipped": 0, "changed": 0, "recorded": 0}
+
+
+def _get_conn():
+    """Lazily opens the hash database (shared by all threads, guarded by _lock)."""
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(CONTENT_HASH_DB, check_same_thread=False)
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS product_hashes (
+                product_id TEXT,
+                scope TEXT,
+                source_hash TEXT,
+                config_hash TEXT,
+                output_hash TEXT,
+                output_title TEXT,
+                updated_at REAL,
+                PRIMARY KEY (product_id, scope)
+            )
+        """)
+        _conn.commit()
+        logger.info(f"✅ Content hash store opened: {CONTENT_HASH_DB}")
+    return _conn
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _normalize_tags(tags):
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    return sorted({str(tag).strip() for tag in (tags or []) if str(tag).strip()})
+
+
+def hash_source_fields(product: dict) -> str:
+    """
+    Hash of the translatable source fields of a REST product: title, body_html,
+    option names/values and tags (order-insensitive).
+    """
+    options = [
+        {"name": (option.get("name") or "").strip(), "values": [str(v).strip() for v in option.get("values") or []]}
+        for option in (product.get("options") or [])
+    ]
+    return _digest({
+        "title": (product.get("title") or "").strip(),
+        "body_html": (product.get("body_html") or "").strip(),
+        "options": options,
+        "tags": _normalize_tags(product.get("tags")),
+    })
+
+
+def hash_config(**config) -> str:
+    """Hash of the prompt/method configuration that produced a translation."""
+    return _digest(config)
+
+
+def get_record(product_id, scope):
+    try:
+        with _lock:
+            row = _get_conn().execute(
+                "SELECT source_hash, config_hash, output_hash, output_title, updated_at FROM product_hashes WHERE product_id = ? AND scope = ?",
+                (str(product_id), scope),
+            ).fetchone()
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Content hash read failed: {e}")
+        return None
+    if not row:
+        return None
+    return {"source_hash": row[0], "config_hash": row[1], "output_hash": row[2], "output_title": row[3], "updated_at": row[4]}
+
+
+def is_unchanged(product_id, scope, source_hash, config_hash, force=False):
+    """
+    True if the last successful run for this product/scope used the same configuration and
+    the current fields hash to either its source or its written output (a product translated
+    in place is not treated as changed just because it now holds the translation).
+    """
+    if force:
+        return False
+    record = get_record(product_id, scope)
+    unchanged = bool(record) and record["config_hash"] == config_hash and source_hash in (record["source_hash"], record["output_hash"])
+    stats["skipped" if unchanged else "changed"] += 1
+    return unchanged
+
+
+def record_success(product_id, scope, source_hash, config_hash, output_hash=None, output_title=None):
+    """Stores the hashes of a successfully translated and written product."""
+    try:
+        with _lock:
+            conn = _get_conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO product_hashes (product_id, scope, source_hash, config_hash, output_hash, output_title, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (str(product_id), scope, source_hash, config_hash, output_hash, output_title, time.time()),
+            )
+            conn.commit()
+            stats["recorded"] += 1
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Content hash write failed: {e}")
+
+
+def forget(product_id, scope=None):
+    """Drops stored hashes so the product is translated again on the next run."""
+    with _lock:
+        conn = _get_conn()
+        if scope is None:
+            conn.execute("DELETE FROM product_hashes WHERE product_id = ?", (str(product_id),))
+        else:
+            conn.execute("DELETE FROM product_hashes WHERE product_id = ? AND scope = ?", (str(product_id), scope))
+        conn.commit()
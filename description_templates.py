@@ -0,0 +1,102 @@
+# description_templates.py
+
+import os
+import logging
+import threading
+from jinja2 import Environment, FileSystemLoader, TemplateNotFound, select_autoescape
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# CONFIGURATION
+# ---------------------------------- #
+DESCRIPTION_TEMPLATE_DIR = os.getenv(
+    "DESCRIPTION_TEMPLATE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "descriptions"),
+)
+DEFAULT_LAYOUT = "wrapped"
+
+# Autoescaping is on for every template: LLM text, image URLs and alt text are all escaped.
+_env = Environment(
+    loader=FileSystemLoader(DESCRIPTION_TEMPLATE_DIR),
+    autoescape=select_autoescape(default=True, default_for_string=True),
+    trim_blocks=True,
+    lstrip_blocks=True,
+    keep_trailing_newline=False,
+    auto_reload=False,
+)
+_templates = {}  # (layout, store, lang) -> compiled template
+_lock = threading.Lock()
+
+
+def _store_dir(store):
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in str(store).strip().lower())
+
+
+def _candidates(layout, store, lang):
+    """Most specific variant first: store+language, store, language, layout default."""
+    names = []
+    if store:
+        if lang:
+            names.append(f"{_store_dir(store)}/{layout}.{lang}.html")
+        names.append(f"{_store_dir(store)}/{layout}.html")
+    if lang:
+        names.append(f"{layout}.{lang}.html")
+    names.append(f"{layout}.html")
+    return names
+
+
+def get_template(layout=None, store=None, target_lang=None):
+    """Compiled description template for this layout/store/language (loaded and compiled once)."""
+    layout = layout or DEFAULT_LAYOUT
+    lang = (target_lang or "").lower() or None
+    key = (layout, store or None, lang)
+    template = _templates.get(key)
+    if template is None:
+        with _lock:
+            template = _templates.get(key)
+            if template is None:
+                try:
+                    template = _env.select_template(_candidates(layout, store, lang))
+                except TemplateNotFound:
+                    logger.warning(f"⚠️ No description template for layout '{layout}', using '{DEFAULT_LAYOUT}'.")
+                    template = _env.select_template(_candidates(DEFAULT_LAYOUT, store, lang))
+                logger.debug(f"Description template for {key}: {template.name}")
+                _templates[key] = template
+    return template
+
+
+def render_description(context, layout=None, store=None, target_lang=None):
+    """
+    Renders the structured description.
+
+    Context keys: title, introduction, image1_url, image2_url, alt_text_base,
+    bullets (list of {"label", "text"}), cta, labels ({"advantages", "cta"}).
+    """
+    return get_template(layout, store, target_lang).render(**context).strip()
+
+
+def render_batch(items):
+    """
+    Renders many descriptions.
+
+    Args:
+        items: iterable of dicts with "context" and optional "layout", "store", "target_lang".
+
+    Returns:
+        list of HTML strings in input order.
+    """
+    return [
+        render_description(item["context"], item.get("layout"), item.get("store"), item.get("target_lang"))
+        for item in items
+    ]
+
+
+def clear_cache():
+    """Drops compiled templates so edited template files are picked up (e.g. after a deploy)."""
+    with _lock:
+        _templates.clear()
+        if _env.cache is not None:
+            _env.cache.clear()
@@ -9,7 +9,11 @@ from google_sheets import move_done_to_sheet2, export_sales_to_sheet
 from export_variants_utils import get_product_option_values, update_product_option_values, apply_translation_method
 from google_sheets import get_pending_products_from_sheet
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+import sheets_client
+import sheet_write_buffer
+import sheet_row_index
+import sheets_scheduler
+import sheet_snapshot
 from threading import Lock
 from google_sheets import get_products_pending_translation_from_sheet1, mark_product_translation_done_in_sheet, update_product_status_in_sheet
 from post_processing import post_process_description
@@ -217,24 +221,16 @@ def update_product_gid_in_sheet(product_id, cloned_gid, cloned_title): # Add clo
     # --- ADDED Title Parameter and Update Logic ---
     logger.info(f"Attempting sheet update for Original ID {product_id}: GID='{cloned_gid}', Title='{cloned_title[:50]}...'")
     try:
-        # Ensure GSpread/Credentials setup is correct
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds = ServiceAccountCredentials.from_json_keyfile_name(GOOGLE_CREDENTIALS_FILE, scope)
-        client = gspread.authorize(creds)
-        sheet = client.open_by_key(GOOGLE_SHEET_ID).worksheet(SHEET1_NAME) # Use constant
-
-        cell = sheet.find(str(product_id), in_column=1) # Find by Original Product ID in Col A
-        if cell:
-            row_index = cell.row
-            # Prepare batch update data (Col E=5 for GID, Col F=6 for Title)
-            update_data = [
-                {"range": f"E{row_index}", "values": [[str(cloned_gid or '')]]},
-                {"range": f"F{row_index}", "values": [[str(cloned_title or '')]]} # Update Column F
-            ]
-            logger.debug(f"Found row {row_index} for ID {product_id}. Preparing batch update: {update_data}")
-            # Consider adding retry logic here using _retry_gspread_operation if defined/imported
-            sheet.batch_update(update_data)
-            logger.info(f"✅ Updated Sheet1 Row {row_index} (GID & Cloned Title) for original ID {product_id}.")
+        sheet = sheets_client.get_worksheet(SHEET1_NAME, GOOGLE_SHEET_ID) # Cached client/worksheet handle
+
+        # Cached Original Product ID (Col A) index; update buffered and re-checked before the flush
+        row_index = sheet_row_index.queue_row_updates(sheet, product_id, {
+            5: str(cloned_gid or ''),   # Col E: GID
+            6: str(cloned_title or ''), # Col F: Cloned Title
+        })
+        if row_index:
+            logger.debug(f"Found row {row_index} for ID {product_id}. Queued GID and Cloned Title.")
+            logger.info(f"✅ Queued Sheet1 Row {row_index} (GID & Cloned Title) for original ID {product_id}.")
             return True
         else:
             logger.warning(f"⚠️ Could not find original product_id={product_id} in '{SHEET1_NAME}' to update cloned info.")
@@ -246,25 +242,12 @@ def update_product_gid_in_sheet(product_id, cloned_gid, cloned_title): # Add clo
 
 
 def get_sheet_client():
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-
+    """Shared gspread client (sheets_client handles credential fallback and token refresh)."""
     try:
-        path = os.getenv("GOOGLE_CREDENTIALS_FILE", "credentials.json")
-        logger.info(f"🔐 Using credentials from: {path}")
-        creds = ServiceAccountCredentials.from_json_keyfile_name(path, scope)
-        return gspread.authorize(creds)
-
-    except Exception as e1:
-        logger.warning(f"⚠️ Could not load creds using env path. Reason: {repr(e1)}")
-        # Fallback
-        try:
-            creds = ServiceAccountCredentials.from_service_account_file(
-                "/Users/saschavanwell/.config/gspread/service_account.json", scopes=scope
-            )
-            return gspread.authorize(creds)
-        except Exception as e2:
-            logger.warning(f"⚠️ Could not load fallback Google Sheets creds either. Reason: {repr(e2)}")
-            return None
+        return sheets_client.get_client()
+    except Exception as e:
+        logger.warning(f"⚠️ Could not load Google Sheets creds. Reason: {repr(e)}")
+        return None
 
 @export_bp.route("/export")
 def export():
@@ -280,6 +263,11 @@ def get_stores():
         logger.exception("\u274c Failed to load store list.")
         return jsonify({"error": "Failed to load stores"}), 500
 
+@export_bp.route("/sheets_quota", methods=["GET"])
+def sheets_quota():
+    """Current Google Sheets read/write quota usage and scheduler counters."""
+    return jsonify(sheets_scheduler.usage())
+
 def fetch_product_by_handle(handle, shopify_store_url, shopify_api_key):
     url = f"{ensure_https(shopify_store_url)}/admin/api/2023-04/products.json?handle={handle}"
     headers = {
@@ -344,46 +332,32 @@ def update_cloned_product_info_in_sheet(product_id, cloned_gid, cloned_title, ne
     # Update log message
     logger.info(f"Attempting sheet update for Original ID {product_id}: Status='{new_status}', GID='{cloned_gid}', Title='{log_title}', TargetStore='{target_store}'")
     try:
-        # Use helper to get client/sheet - assuming _get_worksheet exists and works
-        # You might need to adapt this if _get_worksheet isn't defined in this file
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds = ServiceAccountCredentials.from_json_keyfile_name(GOOGLE_CREDENTIALS_FILE, scope)
-        client = gspread.authorize(creds)
-        sheet = client.open_by_key(GOOGLE_SHEET_ID).worksheet(SHEET1_NAME)
-        # Alternatively, if you have a _get_worksheet helper defined in this file:
-        # sheet = _get_worksheet(SHEET1_NAME)
+        # Cached worksheet handle: no auth or metadata round trip per product
+        sheet = sheets_client.get_worksheet(SHEET1_NAME, GOOGLE_SHEET_ID)
         if not sheet:
              logger.error("Failed to get worksheet object in update_cloned_product_info_in_sheet.")
              return False
 
 
-        # Find row based on original Product ID (Column A = 1)
-        # Assuming _retry_gspread_operation is available or handle errors directly
-        # cell = _retry_gspread_operation(sheet.find, str(product_id), in_column=1) # If using retry helper
-        cell = sheet.find(str(product_id), in_column=1) # Without retry helper for simplicity here
-
-        if cell:
-            row_index = cell.row
-            # Define column indices (1-based for range)
-            status_col = 4       # D
-            gid_col = 5          # E
-            title_col = 6        # F
-            target_store_col = 7 # G <-- New Column
-
-            # Prepare batch update data for Status(D), GID(E), Title(F), Target Store(G)
-            update_data = [
-                {"range": gspread.utils.rowcol_to_a1(row_index, status_col),       "values": [[str(new_status or '')]]},
-                {"range": gspread.utils.rowcol_to_a1(row_index, gid_col),          "values": [[str(cloned_gid or '')]]},
-                {"range": gspread.utils.rowcol_to_a1(row_index, title_col),        "values": [[str(cloned_title or '')]]},
-                {"range": gspread.utils.rowcol_to_a1(row_index, target_store_col), "values": [[str(target_store or '')]]} # <-- ADDED Target Store update
-            ]
-            # Update log message
+        # Define column indices (1-based for range)
+        status_col = 4       # D
+        gid_col = 5          # E
+        title_col = 6        # F
+        target_store_col = 7 # G <-- New Column
+
+        # Row comes from the cached original Product ID index (Column A = 1), so no sheet.find round trip.
+        # Write-behind: collapsed with the other status writes into one batchUpdate, re-checked before the flush
+        row_index = sheet_row_index.queue_row_updates(sheet, product_id, {
+            status_col: str(new_status or ''),
+            gid_col: str(cloned_gid or ''),
+            title_col: str(cloned_title or ''),
+            target_store_col: str(target_store or ''),
+        })
+
+        if row_index:
             logger.debug(f"Found row {row_index} for ID {product_id}. Batch update: Status, GID, Title, Target Store")
-            # _retry_gspread_operation(sheet.batch_update, update_data, value_input_option="USER_ENTERED") # If using retry helper
-            sheet.batch_update(update_data, value_input_option="USER_ENTERED") # Without retry helper
 
-            # Update log message
-            logger.info(f"✅ Updated Sheet1 Row {row_index} (Status, GID, Cloned Title, Target Store) for original ID {product_id}.")
+            logger.info(f"✅ Queued Sheet1 Row {row_index} (Status, GID, Cloned Title, Target Store) for original ID {product_id}.")
             return True
         else:
             logger.warning(f"⚠️ Could not find original product_id={product_id} in '{SHEET1_NAME}' to update info/status.")
@@ -569,11 +543,8 @@ def clone_products_to_target_store(
     blocked_ids_sheet1 = set()
     sheet1_cloned_gids = set() # Store as set now
     try:
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds = ServiceAccountCredentials.from_json_keyfile_name(GOOGLE_CREDENTIALS_FILE, scope)
-        client = gspread.authorize(creds)
-        sheet = client.open_by_key(GOOGLE_SHEET_ID)
-        sheet1 = sheet.worksheet(SHEET1_NAME)
+        sheet_write_buffer.flush_all()  # Read-your-writes: send buffered status updates first
+        sheet1 = sheets_client.get_worksheet(SHEET1_NAME, GOOGLE_SHEET_ID)
         sheet1_records = sheet1.get_all_records()
         logger.info(f"Read {len(sheet1_records)} records from {SHEET1_NAME}.")
 
@@ -818,6 +789,7 @@ def clone_products_to_target_store(
 
     # --- After loop finishes ---
     logger.info(f"🚩 Cloning phase complete. Successfully created {len(created_products)} product clones in target store '{target_store_value}' this run.")
+    sheet_write_buffer.flush_all()
     return created_products
 
 # --- END function ---
@@ -1331,6 +1303,9 @@ def run_export():
     except Exception as e:
         logger.exception("🔥 Unhandled Error in /run_export")
         return jsonify({"error": f"An unexpected server error occurred: {str(e)}"}), 500
+    finally:
+        sheet_write_buffer.flush_all()  # Job done: send any buffered status updates
+        sheet_snapshot.report()  # How many no-op cell writes were skipped this run
 
 # --- END MODIFICATION ---
 
@@ -7,10 +7,17 @@ import json
 import logging
 from datetime import datetime, timedelta, UTC
 from typing import Optional, Dict, Any, List
-from translation import deepseek_translate, google_translate, deepl_translate
-from bs4 import BeautifulSoup
+from translation import deepseek_translate, google_translate, deepl_translate, chatgpt_translate
+from provider_router import route_translation
+from translation import build_deepseek_description_prompt
+from model_policy import resolve_model, resolve_max_tokens
+import llm_batch
+from llm_stream_parser import is_complete_output
+import near_duplicate_index
+import html_utils
+import content_hashes
+from post_processing_engine import post_process_description
 import re
-import html
 import time
 
 # --- Load environment variables
@@ -28,7 +35,12 @@ logger = logging.getLogger(__name__)
 # --- Imports
 import shopify_utils
 import google_sheets_utils
+import sheet_write_buffer
+import pipeline_state
+import sheets_scheduler
+import sheet_snapshot
 import variants_utils2
+from random_name import determine_product_gender, get_random_female_name, get_random_male_name, get_random_name
 
 from variants_utils2 import (
     get_product_option_values,
@@ -93,9 +105,9 @@ def post_process_title(ai_output: str) -> str:
     # Step 1: Basic Cleanup (HTML, Markdown, extra spaces)
     try:
         # Use html.parser for robustness, separate lines with spaces
-        text = BeautifulSoup(ai_output, "html.parser").get_text(separator=' ')
+        text = html_utils.strip_text(ai_output, separator=' ', strip=False)
     except Exception as e:
-        logger.warning(f"⚠️ BeautifulSoup parsing failed: {e}. Using raw text.")
+        logger.warning(f"⚠️ HTML parsing failed: {e}. Using raw text.")
         text = ai_output # Fallback
 
     # Remove markdown bold, convert multiple spaces/newlines to single space
@@ -285,229 +297,6 @@ def clean_title_output(title, required_name=None):
 
     return title.strip() # Final strip
 
-def _get_first_two_images(product_data):
-    """
-    Returns the URLs of the first two images from product_data['images'],
-    or empty strings if none exist.
-    """
-    image1_url = ""
-    image2_url = ""
-    if product_data and 'images' in product_data:
-        imgs = product_data['images']
-        if len(imgs) > 0:
-            image1_url = imgs[0].get('src', '')
-        if len(imgs) > 1:
-            image2_url = imgs[1].get('src', '')
-    return image1_url, image2_url
-
-
-def _parse_chatgpt_description(ai_text):
-    """
-    Robust parser for AI-generated structured descriptions from ChatGPT or DeepSeek.
-    Extracts: Product Title, Short Introduction, Product Advantages, Call to Action.
-    Supports both markdown and plain text formats.
-    """
-
-    parsed_data = {
-        'title': '',
-        'introduction': '',
-        'features': [],
-        'cta': ''
-    }
-
-    # Remove any HTML and clean up text
-    ai_text = BeautifulSoup(ai_text, "html.parser").get_text(separator="\n")
-    ai_text = ai_text.lstrip('\ufeff').strip()
-
-    # --- Define section label aliases ---
-    label_map = {
-        "title": [r"Product Title", r"Produkt[-\s]?Titel", r"Title"],
-        "introduction": [r"Short Introduction", r"Kurze Einführung"],
-        "advantages": [r"Product Advantages", r"Produktvorteile"],
-        "cta": [r"Call to Action", r"Handlungsaufforderung"]
-    }
-
-    # --- Create a combined regex pattern ---
-    label_section_map = {}
-    for section, patterns in label_map.items():
-        for p in patterns:
-            label_section_map[p] = section
-
-    combined_pattern = "|".join(label_section_map.keys())
-
-    # --- Compile regex to match sections with optional **bold** and flexible colons ---
-    section_regex = re.compile(
-        rf"(?i)(?:\*\*)?\s*({combined_pattern})\s*:?\s*(?:\*\*)?\s*\n?(.*?)(?=(?:\n\s*(?:\*\*)?\s*(?:{combined_pattern})\s*:?)|\Z)",
-        flags=re.DOTALL
-    )
-
-    matches = section_regex.findall(ai_text)
-
-    raw_advantages = ""
-    for label, content in matches:
-        section_key = None
-        for pattern, key in label_section_map.items():
-            if re.fullmatch(pattern, label.strip(), flags=re.IGNORECASE):
-                section_key = key
-                break
-
-        if section_key == "advantages":
-            raw_advantages = content.strip()
-        elif section_key:
-            parsed_data[section_key] = content.strip()
-
-    # --- Extract bullet points from advantages ---
-    if raw_advantages:
-        bullet_lines = re.findall(r"^\s*[-*•]\s*(.+)", raw_advantages, re.MULTILINE)
-        parsed_data["features"] = [line.strip() for line in bullet_lines if line.strip()]
-
-    # --- Fallback if everything failed ---
-    if not any([parsed_data['title'], parsed_data['introduction'], parsed_data['features']]):
-        logging.warning("⚠️ Structured parsing failed. Trying fallback split.")
-        lines = [line.strip() for line in ai_text.strip().split("\n") if line.strip()]
-        if lines:
-            parsed_data["title"] = lines[0]
-            parsed_data["introduction"] = "\n".join(lines[1:])
-
-    # --- Debug Logging ---
-    logging.debug(f"🔍 Parsed Title: {parsed_data['title']}")
-    logging.debug(f"📝 Parsed Introduction: {parsed_data['introduction'][:80]}...")
-    logging.debug(f"✅ Parsed Features: {parsed_data['features']}")
-    logging.debug(f"📣 Parsed CTA: {parsed_data['cta']}")
-
-    return parsed_data
-
-def _get_localized_labels(target_lang):
-    """
-    Localizes 'Product Advantages' heading and a fallback CTA ('Buy Now') for supported languages.
-    Returns a dict with keys: 'advantages' and 'cta'.
-    """
-    localized_map = {
-        'en': {'advantages': 'Product Advantages', 'cta': 'Buy Now!'},
-        'de': {'advantages': 'Produktvorteile', 'cta': 'Jetzt kaufen!'},
-        'es': {'advantages': 'Ventajas del producto', 'cta': '¡Compra ahora!'},
-        'fr': {'advantages': 'Avantages du produit', 'cta': 'Achetez maintenant !'},
-        'it': {'advantages': 'Vantaggi del prodotto', 'cta': 'Acquista ora!'},
-        'nl': {'advantages': 'Productvoordelen', 'cta': 'Koop nu!'},
-        'pt': {'advantages': 'Vantagens do produto', 'cta': 'Compre agora!'},
-        'ru': {'advantages': 'Преимущества товара', 'cta': 'Купить сейчас!'},
-        'ja': {'advantages': '製品の特長', 'cta': '今すぐ購入！'},
-        'zh': {'advantages': '产品优势', 'cta': '立即购买！'},
-        'da': {'advantages': 'Produktfordele', 'cta': 'Køb nu!'},   # <-- Danish
-    }
-    return localized_map.get(target_lang, localized_map['en'])
-
-
-def _build_bullet_points(features):
-    """
-    Converts feature lines into clean <li> HTML list items.
-    Removes markdown, emojis, and excess symbols.
-    """
-    bullet_li_list = []
-    for line in features:
-        # Clean leading emojis, dashes, stars, markdown bold
-        line = re.sub(r"^[✔️•\-* ]+", "", line)
-        line = re.sub(r"\*\*(.*?)\*\*", r"\1", line)
-
-        # Optional: bold up to first colon/dash
-        parts = re.split(r'[:\-]', line, maxsplit=1) # Use keyword argument
-        if len(parts) == 2:
-            bold, rest = parts
-            bullet_li_list.append(f"<li><strong>{bold.strip()}</strong>: {rest.strip()}</li>")
-        else:
-            bullet_li_list.append(f"<li>{line.strip()}</li>")
-    return "\n".join(bullet_li_list)
-
-def post_process_description(original_html, new_html, method, product_data=None, target_lang='en', final_product_title=None, product_name=None):
-    """
-    Post-process description. Applies structure for ChatGPT AND DeepSeek.
-    """
-    current_product_id = product_data.get("id", "UnknownID") if product_data else "UnknownID"
-    logger.info(f"[{current_product_id}] === ENTERING post_process_description (Method received: '{method}') ===")
-    try:
-        # Normalize method name
-        if isinstance(method, dict): method_name = method.get("method", "").lower()
-        else: method_name = str(method).lower()
-        logger.info(f"[{current_product_id}] Normalized method_name: '{method_name}'")
-
-        # Determine Name
-        name_to_use = product_name # ... (keep your name logic) ...
-        logger.info(f"[{current_product_id}] Using name: '{name_to_use}'")
-
-        # HTML Cleaning
-        if new_html: new_html = html.unescape(re.sub(r'\*\*', '', new_html)); # Simplified
-        else: return ""
-
-        # Image Setup
-        image1_url, image2_url = _get_first_two_images(product_data)
-        alt_text_base = f"{name_to_use} product image" if name_to_use else "Product image"
-
-        # --->>> CORRECTED CONDITION BELOW <<<---
-        if method_name in ["chatgpt", "deepseek"]:
-            logger.info(f"[{current_product_id}] Applying structured formatting for {method_name}.")
-
-            # Ensure robust parser is called
-            parsed = _parse_chatgpt_description(new_html)
-            logger.info(f"[{current_product_id}] DEBUG: Parsed features count: {len(parsed.get('features',[]))}")
-
-            if not parsed.get('introduction') and not parsed.get('features'):
-                 logger.error(f"[{current_product_id}] PARSING FAILED for {method_name}.")
-                 return new_html # Return cleaned raw text if parse fails
-
-            # Determine H3 Title
-            description_h3_title = parsed.get("title", "").strip()
-            if final_product_title: description_h3_title = final_product_title
-            elif not description_h3_title: logger.warning(f"[{current_product_id}] No title determined for H3.")
-
-            # Inject/Replace Name if needed
-            if name_to_use:
-                 # Apply your name replacement logic to parsed['introduction'] / parsed['features']
-                 pass # Placeholder for your name injection logic
-
-            # Build HTML structure
-            labels = _get_localized_labels(target_lang)
-            bullet_html = _build_bullet_points(parsed.get("features", []))
-
-            # Using the CORRECT centering structure for bullets
-            final_html_parts = [
-                '<div style="text-align:center; margin:0 auto; max-width:800px;">',
-                f'<h3 style="font-weight:bold;">{description_h3_title}</h3>' if description_h3_title else "",
-                f'<p>{parsed.get("introduction", "").strip()}</p>' if parsed.get("introduction", "").strip() else "",
-                (f"<div style='margin:1em 0;'><img src='{image1_url}' style='width:480px; max-width:100%;' loading='lazy' alt='{alt_text_base} 1'/></div>" if image1_url else ""),
-            ]
-            if bullet_html:
-                final_html_parts += [
-                    f'<h4 class="advantages-heading" style="font-weight:bold; margin-top: 1.5em; margin-bottom: 0.5em;">{labels.get("advantages", "Product Advantages")}</h4>',
-                    '<div class="centered-list-wrapper" style="display: inline-block; text-align: left;">',
-                    '<ul class="advantages-list" style="list-style-position: outside; padding-left: 1.5em; margin: 0;">',
-                    bullet_html, '</ul>', '</div>'
-                ]
-            if image2_url: final_html_parts.append(f"<div style='margin:2em 0;'><img src='{image2_url}' style='width:480px; max-width:100%;' loading='lazy' alt='{alt_text_base} 2'/></div>")
-            cta_html = parsed.get('cta', '').strip() or labels.get('cta', 'Jetzt entdecken!')
-            if cta_html: final_html_parts.append(f'<h4 style="font-weight:bold; margin:1.5em 0; font-size:1.2em;">{cta_html}</h4>')
-            final_html_parts.append('</div>')
-
-            final_html_output = "\n".join(filter(None, final_html_parts)).strip()
-            logger.info(f"✅ [{current_product_id}] Built structured HTML ({method_name}). Length: {len(final_html_output)}")
-            return final_html_output
-
-        else: # Fallback for Google, DeepL, others
-            logger.info(f"[{current_product_id}] Using basic image injection path for method '{method_name}'.")
-            # ... (Keep your existing BeautifulSoup logic for Google/DeepL here) ...
-            soup = BeautifulSoup(new_html, "html.parser"); # Example start
-            # ... logic to remove existing images ...
-            # ... logic to inject image1_url / image2_url ...
-            # ... logic to wrap in centered div ...
-            final_wrapped_html = f'<div style="text-align: center; margin: 0 auto; max-width: 800px;">{str(soup)}</div>' # Example wrap
-            logger.info(f"✅ [{current_product_id}] Finished basic processing ({method_name}).")
-            return final_wrapped_html.strip()
-
-    except Exception as e:
-        logger.exception(f"❌ [{current_product_id}] Exception in post_process_description: {e}")
-        # Fallback
-        try: return html.unescape(new_html or "").strip()
-        except: return new_html if new_html else ""
-
 
 # --- Helper: extract numeric product ID from Shopify GID
 def extract_numeric_id_from_gid(gid):
@@ -523,6 +312,15 @@ DEFAULT_PID_COLUMN_HEADER = "Product ID"
 DEFAULT_TITLE_COLUMN_HEADER = "Product Title"
 DEFAULT_SALES_COLUMN_HEADER = "Sales Count"
 
+# Translation method per field for every target store
+EXPORT_TRANSLATION_METHODS = {
+    "title": "deepseek",
+    "body_html": "deepseek",
+    "handle": "google",
+    "tags": "google",
+    "variants": "google"
+}
+
 def load_configuration() -> Optional[Dict[str, Any]]:
     config = {}
     config["SOURCE_STORE_URL"] = os.getenv("SHOPIFY_STORE_URL")
@@ -561,7 +359,8 @@ def apply_translation_method(
     target_lang, 
     product_title="", 
     field_type=None,
-    description=None
+    description=None,
+    model_policy=None
 ):
     prompt = custom_prompt
     if isinstance(method, dict):
@@ -579,28 +378,41 @@ def apply_translation_method(
         return original_text
 
 
-    try:
-        # Handle ChatGPT and DeepSeek first (direct returns)
-        if method_name == "chatgpt":
-            logging.info("🤖 Using ChatGPT — calling once for full HTML...")
-            return chatgpt_translate(
-    original_text,
-    prompt,
-    target_lang,
-    field_type,
-    product_title
-)
-        if method_name == "deepseek":
-            logging.info("🚀 Using DeepSeek translation")
-            result = deepseek_translate(
-                original_text,
-                target_language=target_lang
-            )
-            if "<" not in result:
-                result = f"<p>{result.strip()}</p>"
-            return result
+    def _translate_llm_chatgpt():
+        logging.info("🤖 Using ChatGPT — calling once for full HTML...")
+        return chatgpt_translate(original_text, prompt, target_lang, field_type, product_title,
+                                 model_policy=model_policy, raise_errors=True)
+
+    def _translate_llm_deepseek():
+        logging.info("🚀 Using DeepSeek translation")
+        result = deepseek_translate(
+            original_text,
+            target_language=target_lang,
+            model_policy=model_policy,
+            raise_errors=True
+        )
+        if result and result != original_text and "<" not in result:
+            result = f"<p>{result.strip()}</p>"
+        return result
+
+    def _translate_html_nodes(provider):
+        # Translate text nodes individually; html_utils keeps the HTML structure and drops empty divs
+        translate = google_translate if provider == "google" else deepl_translate
+        node_source = "" if provider == "deepl" and source_lang.lower() == "auto" else source_lang  # DeepL detects on ""
+        translated_nodes = 0
+
+        def _translate_node(stripped):
+            nonlocal translated_nodes
+            translated = translate(stripped, node_source, target_lang, raise_errors=True)
+            translated_nodes += 1
+            logging.debug(f"🔤 Node {translated_nodes}: '{stripped[:40]}' → '{(translated or '')[:40]}'")
+            return translated
+
+        result = html_utils.replace_text_nodes(original_text, _translate_node, drop_empty_divs=True)
+        logging.info(f"✅ [{provider}] HTML translation complete with structure preserved ({translated_nodes} text nodes).")
+        return result
 
-        # Existing Google/DeepL handling below
+    try:
         # For Google or DeepL, do language detection if needed
         if method_name in ["google", "deepl"] and source_lang.lower() == "auto" and description:
             try:
@@ -610,48 +422,130 @@ def apply_translation_method(
                 logging.info(f"🌍 Detected source_lang: {source_lang}")
             except Exception as e:
                 logging.warning(f"⚠️ Language detection failed: {e}")
-        
-        # Parse HTML & translate text nodes individually
-        soup = BeautifulSoup(original_text, "html.parser")
-        text_nodes = soup.find_all(string=True)
-        logging.info(f"📄 Found {len(text_nodes)} text nodes inside HTML.")
-
-        # Clean up empty divs
-        empty_divs = 0
-        for div in soup.find_all('div'):
-            if not div.text.strip() and not div.find(['img', 'ul', 'p', 'h1', 'h2', 'h3']):
-                div.decompose()
-                empty_divs += 1
-        logging.info(f"🧼 Removed {empty_divs} empty <div> elements.")
-
-        translated_parts = {}
-
-        for i, node in enumerate(text_nodes):
-            stripped = node.strip()
-            if not stripped:
-                translated_parts[i] = node
-                continue
 
-            if method_name == "google":
-                translated = google_translate(stripped, source_lang, target_lang)
-            elif method_name == "deepl":
-                translated = deepl_translate(stripped, source_lang, target_lang)
-
-            translated_parts[i] = translated
-            logging.debug(f"🔤 Node {i}: '{stripped[:40]}' → '{translated[:40]}'")
-
-        # Replace text nodes with translated versions
-        for i, new_text in translated_parts.items():
-            text_nodes[i].replace_with(new_text)
-
-        result_html = str(soup)
-        logging.info("✅ HTML translation complete with structure preserved.")
-        return result_html
+        # The router tries the chosen method first and hedges/falls back to an equivalent one
+        provider_calls = {
+            "chatgpt": _translate_llm_chatgpt,
+            "deepseek": _translate_llm_deepseek,
+            "google": lambda: _translate_html_nodes("google"),
+            "deepl": lambda: _translate_html_nodes("deepl"),
+        }
+        return route_translation(field_type, method_name, provider_calls, original_text)
 
     except Exception as e:
         logging.error(f"❌ Translation failed: {e}")
         return original_text    
 
+def _output_name(ai_output: str) -> Optional[str]:
+    """The product name the LLM chose (the part of the title before '|')."""
+    title = post_process_title(ai_output)
+    return title.split('|')[0].strip() if title and '|' in title else None
+
+
+def reuse_near_duplicate_output(scope, pid, source_text, source_product, target_lang) -> Optional[str]:
+    """
+    Returns the output of an already translated near-identical product in this store, with
+    its name replaced by a fresh gender-matched name and its colors swapped via the glossary.
+    None if there is no match or it cannot be patched safely.
+    """
+    match = near_duplicate_index.find_similar(scope, source_text, product_id=pid, glossary=variants_utils2.COLOR_NAME_MAP)
+    if not match:
+        return None
+    gender = determine_product_gender(source_product)
+    new_name = {"female": get_random_female_name, "male": get_random_male_name}.get(gender, get_random_name)()
+    patched = near_duplicate_index.patch_translation(
+        match, source_text, target_lang, required_name=new_name, glossary=variants_utils2.COLOR_NAME_MAP
+    )
+    if patched:
+        logger.info(f"[{pid}] Reused near-duplicate output of {match['product_id']} with name '{new_name}'.")
+    return patched
+
+
+def is_batch_mode() -> bool:
+    return "--batch" in sys.argv or os.getenv("EXPORT_BATCH_MODE", "false").lower() in ("1", "true", "yes")
+
+
+def is_force_mode() -> bool:
+    """--force / EXPORT_FORCE re-translates products even if their content hash is unchanged."""
+    return "--force" in sys.argv or os.getenv("EXPORT_FORCE", "false").lower() in ("1", "true", "yes")
+
+
+def export_config_hash(store, config) -> str:
+    """Hash of everything besides the source product that shapes a store's translation."""
+    return content_hashes.hash_config(
+        methods=EXPORT_TRANSLATION_METHODS,
+        language=store["language"],
+        source_language=config["SOURCE_CONTENT_LANGUAGE"],
+        model_policy=store.get("model_policy"),
+    )
+
+
+def stored_status_and_gid(pid, row, store):
+    """(STATUS, cloned GID) for product x store: local pipeline state first, the sheet row as fallback."""
+    state = pipeline_state.get(pid, store["value"]) if google_sheets_utils.PIPELINE_STATE_ENABLED else None
+    if state:
+        return str(state["status"]).upper(), str(state["gid"]).strip()
+    return str(row.get(store["sheet_status_col_header"], "")).upper(), str(row.get(store["sheet_gid_col_header"], "")).strip()
+
+
+def is_unchanged_since_last_export(pid, row, store, config, source_product, force=False) -> bool:
+    """True if the product is cloned and its source/config hashes match the last DONE run."""
+    if force or not stored_status_and_gid(pid, row, store)[1]:
+        return False
+    return content_hashes.is_unchanged(
+        pid, store["value"], content_hashes.hash_source_fields(source_product), export_config_hash(store, config)
+    )
+
+
+def submit_translation_batch(sheet_data_map, config, source_session) -> Optional[str]:
+    """
+    Batch mode, first run: builds the title/description prompt for every pending
+    product x store, exactly as the synchronous DeepSeek call would, and submits them
+    as one batch job. The next run collects the outputs and continues the pipeline.
+    """
+    # The prompts mirror deepseek_translate, so they must run on DeepSeek models
+    provider = llm_batch.get_batch_provider(llm_provider="deepseek")
+    requests_list, items = [], {}
+    source_cache = {}
+
+    for pid, row in sheet_data_map.items():
+        for store in config["TARGET_STORES"]:
+            store_name = store["value"]
+            current_status, _gid = stored_status_and_gid(pid, row, store)
+            if current_status.startswith("DONE") or current_status in ("APPROVED",):
+                continue
+
+            if pid not in source_cache:
+                source_cache[pid] = shopify_utils.fetch_product_by_id(
+                    product_id_or_url=pid,
+                    session_context=source_session
+                )
+            source_product = source_cache[pid]
+            if not source_product:
+                continue  # The synchronous pass reports ERROR_FETCH_SOURCE
+            if is_unchanged_since_last_export(pid, row, store, config, source_product, force=is_force_mode()):
+                continue  # The synchronous pass marks it DONE without translating
+
+            # Same inputs as apply_translation_method(..., "deepseek", field_type="product") below
+            system_instructions, user_content, prompt_text = build_deepseek_description_prompt(
+                source_product["title"], "", store["language"]
+            )
+            policy = store.get("model_policy")
+            custom_id = f"{pid}:{store_name}:description"
+            requests_list.append(llm_batch.build_request(
+                custom_id,
+                model=resolve_model(provider.llm_provider, "product", policy),
+                messages=[
+                    {"role": "system", "content": system_instructions},
+                    {"role": "user", "content": user_content}
+                ],
+                temperature=0.5,
+                max_tokens=resolve_max_tokens("product", prompt_text, policy)
+            ))
+            items[custom_id] = {"pid": pid, "store": store_name, "kind": "description"}
+
+    return llm_batch.submit_batch(requests_list, items, provider=provider)
+
 def main():
     logger.info("=== Weekly Export & Translate Script Starting ===")
 
@@ -663,12 +557,30 @@ def main():
     status_sheet = config["STATUS_SHEET_NAME"]
     archive_sheet = config["ARCHIVE_SHEET_NAME"]
 
+    force = is_force_mode()
+    if force:
+        logger.info("Force mode: re-translating products even if unchanged.")
+
+    # 0. Batch mode: collect a finished batch, or stop if one is still running
+    batch_mode = is_batch_mode()
+    batch_outputs = {}
+    if batch_mode:
+        # Truncated/incomplete outputs come back as None and go through the synchronous path below
+        collected = llm_batch.collect_pending_batch(validate=is_complete_output)
+        if collected is None and llm_batch.load_pending_batch():
+            logger.info("Batch still running. Exiting; the next run will collect it.")
+            return
+        for item in (collected or {}).values():
+            if item["output"]:
+                batch_outputs[(item["meta"]["pid"], item["meta"]["store"])] = item["output"]
+
     # 1. Sheet header and initial product map
     sheet_header, headers_ok = google_sheets_utils.ensure_sheet_headers(status_sheet)
     if not headers_ok or not sheet_header:
         logger.critical("Could not ensure Google Sheet headers. Exiting.")
         return
 
+    google_sheets_utils.push_pipeline_state(status_sheet)  # Leftovers from an interrupted run
     _h, sheet_data = google_sheets_utils.get_sheet_data_by_header(status_sheet)
     sheet_data_map = {str(r.get(DEFAULT_PID_COLUMN_HEADER, "")).strip(): r for r in sheet_data if r.get(DEFAULT_PID_COLUMN_HEADER, "")}
 
@@ -722,6 +634,18 @@ def main():
     _h, sheet_data = google_sheets_utils.get_sheet_data_by_header(status_sheet)
     sheet_data_map = {str(r.get(DEFAULT_PID_COLUMN_HEADER, "")).strip(): r for r in sheet_data if r.get(DEFAULT_PID_COLUMN_HEADER, "")}
 
+    # Per-store state is read/written locally from here on; the sheet is synced in the background
+    if google_sheets_utils.PIPELINE_STATE_ENABLED:
+        google_sheets_utils.pull_pipeline_state(status_sheet)
+        google_sheets_utils.start_pipeline_state_sync(status_sheet)
+
+    # 4b. Batch mode without results yet: submit prompts and stop here
+    if batch_mode and collected is None:
+        batch_id = submit_translation_batch(sheet_data_map, config, source_session)
+        if batch_id:
+            logger.info(f"=== Batch {batch_id} submitted. Re-run to collect results and continue. ===")
+            return
+
     # 5. Process/Export/Translate for Each Target Store
     for pid, row in sheet_data_map.items():
         for store in config["TARGET_STORES"]:
@@ -729,10 +653,8 @@ def main():
             target_url = store["shopify_store_url"]
             target_api_key = store["shopify_api_key"]
             target_lang = store["language"]
-            gid_col = store["sheet_gid_col_header"]
-            status_col = store["sheet_status_col_header"]
 
-            current_status = str(row.get(status_col, "")).upper()
+            current_status, stored_gid = stored_status_and_gid(pid, row, store)
             if current_status.startswith("DONE") or current_status in ("APPROVED",):
                 continue
 
@@ -748,8 +670,18 @@ def main():
                 )
                 continue
 
+            # --- 1b. Skip products whose source fields and config match the last DONE run
+            if is_unchanged_since_last_export(pid, row, store, config, source_product, force=force):
+                record = content_hashes.get_record(pid, store_name) or {}
+                logger.info(f"[{pid}] Unchanged since last successful export to {store_name}, skipping translation.")
+                google_sheets_utils.update_export_status_for_store(
+                    original_product_id=pid, target_store_value=store_name, status_value="DONE",
+                    cloned_gid=stored_gid, cloned_title=record.get("output_title") or "", sheet_name=status_sheet
+                )
+                continue
+
             # --- 2. Clone if not cloned yet
-            cloned_gid = str(row.get(gid_col, "")).strip()
+            cloned_gid = stored_gid
             if not cloned_gid:
                 clone_result = shopify_utils.clone_product(source_product, store)
                 time.sleep(2)
@@ -834,27 +766,35 @@ def main():
                     continue
 
             # --- 3. Translate fields using best AI post-processing logic
-            translation_methods = {
-                "title": "deepseek",
-                "body_html": "deepseek",
-                "handle": "google",
-                "tags": "google",
-                "variants": "google"
-            }
+            translation_methods = EXPORT_TRANSLATION_METHODS
 
             # ----------- TRANSLATE & POST-PROCESS TITLE AND DESCRIPTION -----------
 
-            # Get one DeepSeek output block for both title/description:
-            ai_output = apply_translation_method(
-                source_product["title"],
-                translation_methods["title"],
-                "",
-                config["SOURCE_CONTENT_LANGUAGE"],
-                target_lang,
-                product_title=source_product["title"],
-                field_type="title",
-                description=source_product.get("body_html", "")
-            )
+            # Get one DeepSeek output block for both title/description (from the batch if collected):
+            ai_output = batch_outputs.get((pid, store_name))
+            near_dup_source = f"{source_product['title']}\n{source_product.get('body_html', '')}"
+            near_dup_scope = near_duplicate_index.make_scope(translation_methods["title"], target_lang, store_name)
+            if ai_output:
+                logger.info(f"[{pid}] Using batched output for {store_name}.")
+            else:
+                ai_output = reuse_near_duplicate_output(near_dup_scope, pid, near_dup_source, source_product, target_lang)
+            if not ai_output:
+                ai_output = apply_translation_method(
+                    source_product["title"],
+                    translation_methods["title"],
+                    "",
+                    config["SOURCE_CONTENT_LANGUAGE"],
+                    target_lang,
+                    product_title=source_product["title"],
+                    field_type="product",  # One structured title + description generation
+                    description=source_product.get("body_html", ""),
+                    model_policy=store.get("model_policy")
+                )
+                if ai_output and ai_output != source_product["title"]:
+                    near_duplicate_index.add(
+                        near_dup_scope, pid, near_dup_source, ai_output,
+                        required_name=_output_name(ai_output), glossary=variants_utils2.COLOR_NAME_MAP
+                    )
 
             # Title (clean line for Shopify)
             translated_title = post_process_title(ai_output)
@@ -873,7 +813,8 @@ def main():
                 product_data=source_product,
                 target_lang=target_lang,
                 final_product_title=translated_title,
-                product_name=translated_title.split('|')[0].strip() if '|' in translated_title else translated_title
+                product_name=translated_title.split('|')[0].strip() if '|' in translated_title else translated_title,
+                store=store_name
             )
             logger.info(f"[{pid}] Translated description (cleaned): {translated_body_html[:120]}...")
 
@@ -975,6 +916,10 @@ def main():
                     original_product_id=pid, target_store_value=store_name, status_value="DONE",
                     cloned_gid=cloned_gid, cloned_title=translated_title, sheet_name=status_sheet
                 )
+                content_hashes.record_success(
+                    pid, store_name, content_hashes.hash_source_fields(source_product),
+                    export_config_hash(store, config), output_title=translated_title
+                )
                 logger.info(f"[{pid}] DONE for {store_name}.")
 
                 collection_id = store.get("pinterest_collection_rest_id")
@@ -1004,6 +949,10 @@ def main():
             # --- Optional: Delay for rate-limiting
             time.sleep(float(os.getenv("DELAY_BETWEEN_PRODUCTS", "1.0")))
 
+    # 6. Every collected batch output has been used: only now drop the pending batch
+    if batch_mode and collected is not None:
+        llm_batch.clear_pending_batch()
+
 if __name__ == "__main__":
     try:
         main()
@@ -1011,3 +960,8 @@ if __name__ == "__main__":
         logger.info("Script interrupted by user.")
     except Exception as e:
         logger.critical(f"💥 UNHANDLED ERROR: {e}", exc_info=True)
+    finally:
+        google_sheets_utils.push_pipeline_state()  # Job done: mirror local state to the sheet
+        sheet_write_buffer.flush_all()  # ...and send any other buffered status updates
+        logger.info(f"📊 Google Sheets quota usage: {sheets_scheduler.usage()}")
+        sheet_snapshot.report()
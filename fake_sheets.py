@@ -0,0 +1,648 @@
+# fake_sheets.py
+# In-process stand-in for Google Sheets, for offline benchmarks and load tests of the Sheets-heavy
+# flows (export_weekly.main, run_export, move_done_to_sheet2). Enable with SHEETS_BACKEND=fake:
+# sheets_client then hands out FakeClient / FakeService instead of gspread / the Sheets API v4 client.
+# Every API call is counted (per operation and read/write, like the real quotas) and can be slowed
+# down or failed with 429s to exercise retry and scheduling code.
+
+import os
+import re
+import copy
+import json
+import time
+import random
+import logging
+import threading
+from collections import Counter, deque
+from functools import wraps
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# CONFIGURATION
+# ---------------------------------- #
+FAKE_SHEETS_LATENCY = float(os.getenv("FAKE_SHEETS_LATENCY", "0"))                # Seconds added to every API call
+FAKE_SHEETS_LATENCY_JITTER = float(os.getenv("FAKE_SHEETS_LATENCY_JITTER", "0"))  # +/- share of the latency, randomized
+FAKE_SHEETS_READS_PER_MINUTE = int(os.getenv("FAKE_SHEETS_READS_PER_MINUTE", "0"))    # 0 = unlimited; above it calls fail with 429
+FAKE_SHEETS_WRITES_PER_MINUTE = int(os.getenv("FAKE_SHEETS_WRITES_PER_MINUTE", "0"))
+FAKE_SHEETS_ERROR_RATE = float(os.getenv("FAKE_SHEETS_ERROR_RATE", "0"))          # Share of calls failing with a random 429
+FAKE_SHEETS_SEED = os.getenv("FAKE_SHEETS_SEED")                                  # Makes jitter/random errors reproducible
+FAKE_SHEETS_DATA_FILE = os.getenv("FAKE_SHEETS_DATA_FILE")                        # JSON {spreadsheet id: {worksheet: rows}} loaded on first use
+FAKE_SHEETS_AUTOCREATE = os.getenv("FAKE_SHEETS_AUTOCREATE", "true").lower() in ("1", "true", "yes")
+
+WINDOW_SECONDS = 60.0
+
+_lock = threading.RLock()
+_spreadsheets = {}   # spreadsheet id -> FakeSpreadsheet
+_sent = {"read": deque(), "write": deque()}
+_injected = deque()  # HTTP statuses the next calls fail with (inject_errors)
+_random = random.Random(FAKE_SHEETS_SEED)
+_loaded = False
+
+stats = {"reads": 0, "writes": 0, "quota_errors": 0, "injected_errors": 0, "latency_seconds": 0.0}
+calls = Counter()    # operation name -> API calls
+
+
+# ---------------------------------- #
+# CALL ACCOUNTING
+# ---------------------------------- #
+def _raise_http(status, operation, service):
+    message = f"Quota exceeded for {operation} (fake_sheets)" if status == 429 else f"Simulated error {status} in {operation}"
+    payload = {"error": {"code": status, "message": message, "status": "RESOURCE_EXHAUSTED" if status == 429 else "UNAVAILABLE"}}
+    if service:
+        import httplib2
+        from googleapiclient.errors import HttpError
+        raise HttpError(httplib2.Response({"status": status}), json.dumps(payload).encode())
+    import requests
+    import gspread
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(payload).encode()
+    raise gspread.exceptions.APIError(response)
+
+
+def _limit(kind):
+    return FAKE_SHEETS_READS_PER_MINUTE if kind == "read" else FAKE_SHEETS_WRITES_PER_MINUTE
+
+
+def _account(kind, operation, service=False):
+    """One API call: simulated latency, then a possible 429/injected error, then counted."""
+    if FAKE_SHEETS_LATENCY > 0:
+        delay = FAKE_SHEETS_LATENCY * (1 + _random.uniform(-1, 1) * FAKE_SHEETS_LATENCY_JITTER)
+        time.sleep(max(delay, 0.0))
+        stats["latency_seconds"] += max(delay, 0.0)
+    with _lock:
+        calls[operation] += 1
+        stats["reads" if kind == "read" else "writes"] += 1
+        if _injected:
+            stats["injected_errors"] += 1
+            status = _injected.popleft()
+        else:
+            now = time.monotonic()
+            sent = _sent[kind]
+            while sent and now - sent[0] >= WINDOW_SECONDS:
+                sent.popleft()
+            status = None
+            if (_limit(kind) and len(sent) >= _limit(kind)) or (FAKE_SHEETS_ERROR_RATE and _random.random() < FAKE_SHEETS_ERROR_RATE):
+                stats["quota_errors"] += 1
+                status = 429
+            sent.append(now)  # Rejected requests count against the real quota too
+    if status:
+        _raise_http(status, operation, service)
+
+
+def _api(kind):
+    """Marks a fake gspread method as one API call of this kind; keeps its name for sheets_scheduler.kind_of."""
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            _account(kind, method.__name__)
+            with _lock:
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ---------------------------------- #
+# VALUES & RANGES
+# ---------------------------------- #
+CELL_RE = re.compile(r"^([A-Z]*)(\d*)$")
+
+
+def _col_number(letters):
+    number = 0
+    for char in letters:
+        number = number * 26 + ord(char) - 64
+    return number
+
+
+def _col_letter(col):
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _split_range(range_name):
+    """('Sheet name' or None, 'A1 part') of 'Sheet1!A1:C' or 'A1:C'."""
+    if "!" in range_name:
+        title, a1 = range_name.rsplit("!", 1)
+        return title.strip("'"), a1
+    return None, range_name
+
+
+def _range_title(range_name):
+    """Worksheet title of a Sheets API range: 'Sheet1!A1:C' or a bare 'Sheet1'."""
+    return range_name.rsplit("!", 1)[0].strip("'")
+
+
+def _parse_a1(a1, rows):
+    """1-based (first row, first col, last row, last col) of an A1 range; open ends extend to the data."""
+    height = len(rows)
+    width = max((len(row) for row in rows), default=0)
+    if not a1:
+        return 1, 1, max(height, 1), max(width, 1)
+    start, _, end = a1.replace("$", "").upper().partition(":")
+    start_col, start_row = CELL_RE.match(start).groups()
+    r1, c1 = int(start_row or 1), _col_number(start_col) if start_col else 1
+    if not end:
+        if start_col and start_row:
+            return r1, c1, r1, c1
+        end = start
+    end_col, end_row = CELL_RE.match(end).groups()
+    r2 = int(end_row) if end_row else max(height, r1)
+    c2 = _col_number(end_col) if end_col else max(width, c1)
+    return r1, c1, r2, c2
+
+
+def _to_text(value):
+    """Stored form of a written value (cells hold what the UI would display)."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _cell_data_text(cell):
+    """Stored form of a spreadsheets.batchUpdate CellData (appendCells/updateCells)."""
+    value = (cell or {}).get("userEnteredValue") or {}
+    for key in ("stringValue", "formulaValue", "numberValue", "boolValue"):
+        if key in value:
+            return _to_text(value[key])
+    return ""
+
+
+def _numericise(value):
+    """Like gspread's numericise: '12' -> 12, '1.5' -> 1.5, anything else unchanged."""
+    if value == "":
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+
+def _trim(values):
+    end = len(values)
+    while end and values[end - 1] == "":
+        end -= 1
+    return values[:end]
+
+
+# ---------------------------------- #
+# GSPREAD SURFACE
+# ---------------------------------- #
+class FakeCell:
+    """Subset of gspread.Cell."""
+
+    def __init__(self, row, col, value):
+        self.row, self.col, self.value = row, col, value
+
+    @property
+    def address(self):
+        return f"{_col_letter(self.col)}{self.row}"
+
+    def __repr__(self):
+        return f"<FakeCell R{self.row}C{self.col} {self.value!r}>"
+
+
+class FakeWorksheet:
+    """Worksheet with the gspread methods this project calls; one method call = one API call."""
+
+    def __init__(self, spreadsheet, title, sheet_id, rows=None):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.id = sheet_id
+        self.rows = [[_to_text(v) for v in row] for row in (rows or [])]
+
+    @property
+    def spreadsheet_id(self):
+        return self.spreadsheet.id
+
+    @property
+    def row_count(self):
+        return len(self.rows)
+
+    # --- internal (no API call) ---
+    def _grid(self, r1, c1, r2, c2):
+        grid = [[row[c - 1] if c <= len(row) else "" for c in range(c1, c2 + 1)]
+                for row in self.rows[r1 - 1:r2]]
+        while grid and not any(grid[-1]):
+            grid.pop()
+        width = max((len(_trim(row)) for row in grid), default=0)
+        return [row[:width] for row in grid]
+
+    def _write(self, row, col, value):
+        while len(self.rows) < row:
+            self.rows.append([])
+        cells = self.rows[row - 1]
+        if len(cells) < col:
+            cells.extend([""] * (col - len(cells)))
+        cells[col - 1] = _to_text(value)
+
+    def _write_range(self, a1, values):
+        r1, c1, _, _ = _parse_a1(_split_range(a1)[1], self.rows)
+        count = 0
+        for r, row in enumerate(values or []):
+            for c, value in enumerate(row):
+                self._write(r1 + r, c1 + c, value)
+                count += 1
+        return count
+
+    def _clear_range(self, a1):
+        r1, c1, r2, c2 = _parse_a1(_split_range(a1)[1], self.rows)
+        for row in self.rows[r1 - 1:r2]:
+            for c in range(c1, min(c2, len(row)) + 1):
+                row[c - 1] = ""
+
+    def _last_data_row(self):
+        for index in range(len(self.rows), 0, -1):
+            if any(self.rows[index - 1]):
+                return index
+        return 0
+
+    def _append(self, values):
+        first = self._last_data_row() + 1
+        self.rows = self.rows[:first - 1] + [[_to_text(v) for v in row] for row in values]
+        width = max((len(row) for row in values), default=1)
+        return {"updates": {"updatedRange": f"'{self.title}'!A{first}:{_col_letter(width)}{first + len(values) - 1}",
+                            "updatedRows": len(values)}}
+
+    # --- reads ---
+    @_api("read")
+    def get_all_values(self, **kwargs):
+        grid = self._grid(1, 1, len(self.rows), max((len(row) for row in self.rows), default=0))
+        width = max((len(row) for row in grid), default=0)
+        return [row + [""] * (width - len(row)) for row in grid]
+
+    @_api("read")
+    def get_all_records(self, head=1, default_blank="", numericise_ignore=None, **kwargs):
+        grid = self._grid(1, 1, len(self.rows), max((len(row) for row in self.rows), default=0))
+        if len(grid) < head:
+            return []
+        keys = grid[head - 1]
+        records = []
+        for row in grid[head:]:
+            row = row + [""] * (len(keys) - len(row))
+            values = row[:len(keys)] if numericise_ignore == ["all"] else [_numericise(v) for v in row[:len(keys)]]
+            records.append({key: (default_blank if value == "" else value) for key, value in zip(keys, values)})
+        return records
+
+    @_api("read")
+    def get_values(self, range_name=None, **kwargs):
+        return self._grid(*_parse_a1(_split_range(range_name)[1] if range_name else None, self.rows))
+
+    @_api("read")
+    def get(self, range_name=None, **kwargs):
+        return self._grid(*_parse_a1(_split_range(range_name)[1] if range_name else None, self.rows))
+
+    @_api("read")
+    def row_values(self, row, **kwargs):
+        return _trim(list(self.rows[row - 1])) if row <= len(self.rows) else []
+
+    @_api("read")
+    def col_values(self, col, **kwargs):
+        return _trim([row[col - 1] if col <= len(row) else "" for row in self.rows])
+
+    @_api("read")
+    def cell(self, row, col, **kwargs):
+        values = self.rows[row - 1] if row <= len(self.rows) else []
+        return FakeCell(row, col, values[col - 1] if col <= len(values) else "")
+
+    @_api("read")
+    def acell(self, label, **kwargs):
+        r, c, _, _ = _parse_a1(label, self.rows)
+        values = self.rows[r - 1] if r <= len(self.rows) else []
+        return FakeCell(r, c, values[c - 1] if c <= len(values) else "")
+
+    @_api("read")
+    def find(self, query, in_row=None, in_column=None, case_sensitive=True):
+        """First matching cell (str or compiled regex), or None like gspread 6."""
+        for r, row in enumerate(self.rows, start=1):
+            if in_row and r != in_row:
+                continue
+            for c, value in enumerate(row, start=1):
+                if in_column and c != in_column:
+                    continue
+                if hasattr(query, "search"):
+                    matched = bool(query.search(value))
+                else:
+                    matched = value == query if case_sensitive else value.lower() == str(query).lower()
+                if matched:
+                    return FakeCell(r, c, value)
+        return None
+
+    # --- writes ---
+    @_api("write")
+    def batch_update(self, data, **kwargs):
+        updated = sum(self._write_range(item["range"], item["values"]) for item in data)
+        return {"spreadsheetId": self.spreadsheet.id, "totalUpdatedCells": updated}
+
+    @_api("write")
+    def update_cell(self, row, col, value):
+        self._write(row, col, value)
+        return {"updatedCells": 1}
+
+    @_api("write")
+    def update_acell(self, label, value):
+        r, c, _, _ = _parse_a1(label, self.rows)
+        self._write(r, c, value)
+        return {"updatedCells": 1}
+
+    @_api("write")
+    def append_rows(self, values, value_input_option="RAW", insert_data_option=None, table_range=None, **kwargs):
+        return self._append(values)
+
+    @_api("write")
+    def append_row(self, values, value_input_option="RAW", insert_data_option=None, table_range=None, **kwargs):
+        return self._append([values])
+
+    @_api("write")
+    def batch_clear(self, ranges):
+        for a1 in ranges:
+            self._clear_range(a1)
+        return {"spreadsheetId": self.spreadsheet.id, "clearedRanges": list(ranges)}
+
+    @_api("write")
+    def clear(self):
+        self.rows = []
+        return {"spreadsheetId": self.spreadsheet.id}
+
+    @_api("write")
+    def delete_rows(self, start_index, end_index=None):
+        del self.rows[start_index - 1:(end_index or start_index)]
+        return {"spreadsheetId": self.spreadsheet.id}
+
+    def __repr__(self):
+        return f"<FakeWorksheet '{self.title}' id:{self.id} rows:{len(self.rows)}>"
+
+
+class FakeSpreadsheet:
+    """Spreadsheet with worksheet lookup and the spreadsheets.batchUpdate requests the project sends."""
+
+    def __init__(self, spreadsheet_id, title=None):
+        self.id = spreadsheet_id
+        self.title = title or spreadsheet_id
+        self._worksheets = []
+
+    def _add(self, title, rows=None):
+        worksheet = FakeWorksheet(self, title, len(self._worksheets) and max(ws.id for ws in self._worksheets) + 1, rows)
+        self._worksheets.append(worksheet)
+        return worksheet
+
+    def _find(self, title):
+        return next((worksheet for worksheet in self._worksheets if worksheet.title == title), None)
+
+    def _by_title(self, title, create=False):
+        worksheet = self._find(title)
+        if worksheet is not None:
+            return worksheet
+        if create:
+            return self._add(title)
+        import gspread
+        raise gspread.WorksheetNotFound(title)
+
+    def _by_id(self, sheet_id):
+        for worksheet in self._worksheets:
+            if worksheet.id == sheet_id:
+                return worksheet
+        raise KeyError(f"No sheet with sheetId {sheet_id} in fake spreadsheet {self.id}")
+
+    def _apply(self, requests):
+        """Applies batchUpdate requests in order, all-or-nothing like the real endpoint."""
+        backup = {ws.id: copy.deepcopy(ws.rows) for ws in self._worksheets}
+        replies = []
+        try:
+            for request in requests:
+                (kind, spec), = request.items()
+                if kind == "appendCells":
+                    self._by_id(spec["sheetId"])._append([[_cell_data_text(c) for c in row.get("values", [])]
+                                                          for row in spec.get("rows", [])])
+                elif kind == "deleteDimension":
+                    rng = spec["range"]
+                    worksheet = self._by_id(rng.get("sheetId", 0))
+                    start, end = rng.get("startIndex", 0), rng.get("endIndex")
+                    if rng.get("dimension", "ROWS") == "ROWS":
+                        del worksheet.rows[start:end]
+                    else:
+                        for row in worksheet.rows:
+                            del row[start:end]
+                elif kind == "updateCells":
+                    worksheet = self._by_id(spec.get("start", spec.get("range", {})).get("sheetId", 0))
+                    origin = spec.get("start") or {"rowIndex": spec["range"].get("startRowIndex", 0),
+                                                   "columnIndex": spec["range"].get("startColumnIndex", 0)}
+                    for r, row in enumerate(spec.get("rows", [])):
+                        for c, cell in enumerate(row.get("values", [])):
+                            worksheet._write(origin.get("rowIndex", 0) + r + 1, origin.get("columnIndex", 0) + c + 1,
+                                             _cell_data_text(cell))
+                else:
+                    raise ValueError(f"fake_sheets does not implement batchUpdate request '{kind}'")
+                replies.append({})
+        except Exception:
+            for worksheet in self._worksheets:
+                worksheet.rows = backup.get(worksheet.id, worksheet.rows)
+            raise
+        return {"spreadsheetId": self.id, "replies": replies}
+
+    @_api("read")
+    def worksheet(self, title):
+        return self._by_title(title, create=FAKE_SHEETS_AUTOCREATE)
+
+    @_api("read")
+    def worksheets(self, **kwargs):
+        return list(self._worksheets)
+
+    @_api("read")
+    def get_worksheet_by_id(self, sheet_id):
+        return self._by_id(sheet_id)
+
+    @_api("write")
+    def add_worksheet(self, title, rows=1000, cols=26, **kwargs):
+        return self._add(title)
+
+    @_api("write")
+    def batch_update(self, body):
+        return self._apply(body.get("requests", []))
+
+    def __repr__(self):
+        return f"<FakeSpreadsheet '{self.title}' id:{self.id}>"
+
+
+class FakeClient:
+    """Subset of gspread.Client."""
+
+    @_api("read")
+    def open_by_key(self, key):
+        return _get_spreadsheet(key)
+
+
+# ---------------------------------- #
+# SHEETS API v4 SURFACE (GoogleSheetManager)
+# ---------------------------------- #
+class _Request:
+    """Deferred call, sent (and counted) on execute() like googleapiclient's HttpRequest."""
+
+    def __init__(self, kind, operation, run):
+        self.kind, self.operation, self.run = kind, operation, run
+
+    def execute(self, num_retries=0):
+        _account(self.kind, self.operation, service=True)
+        with _lock:
+            return self.run()
+
+
+class _Values:
+    def get(self, spreadsheetId, range, valueRenderOption=None, **kwargs):
+        def run():
+            title, a1 = _split_range(range)
+            worksheet = _get_spreadsheet(spreadsheetId)._by_title(title, create=FAKE_SHEETS_AUTOCREATE)
+            values = worksheet._grid(*_parse_a1(a1, worksheet.rows))
+            if valueRenderOption == "UNFORMATTED_VALUE":
+                values = [[_numericise(v) for v in row] for row in values]
+            values = [_trim(row) for row in values]
+            return {"range": range, "majorDimension": "ROWS", "values": values} if values else {"range": range}
+        return _Request("read", "values.get", run)
+
+    def append(self, spreadsheetId, range, body, valueInputOption=None, insertDataOption=None, **kwargs):
+        def run():
+            worksheet = _get_spreadsheet(spreadsheetId)._by_title(_range_title(range), create=FAKE_SHEETS_AUTOCREATE)
+            return dict(worksheet._append(body.get("values", [])), spreadsheetId=spreadsheetId)
+        return _Request("write", "values.append", run)
+
+    def update(self, spreadsheetId, range, body, valueInputOption=None, **kwargs):
+        def run():
+            worksheet = _get_spreadsheet(spreadsheetId)._by_title(_range_title(range), create=FAKE_SHEETS_AUTOCREATE)
+            return {"spreadsheetId": spreadsheetId, "updatedCells": worksheet._write_range(range, body.get("values", []))}
+        return _Request("write", "values.update", run)
+
+
+class _Spreadsheets:
+    def get(self, spreadsheetId, fields=None, **kwargs):
+        def run():
+            spreadsheet = _get_spreadsheet(spreadsheetId)
+            return {"spreadsheetId": spreadsheet.id, "properties": {"title": spreadsheet.title},
+                    "sheets": [{"properties": {"sheetId": ws.id, "title": ws.title, "index": i}}
+                               for i, ws in enumerate(spreadsheet._worksheets)]}
+        return _Request("read", "spreadsheets.get", run)
+
+    def values(self):
+        return _Values()
+
+    def batchUpdate(self, spreadsheetId, body):
+        return _Request("write", "spreadsheets.batchUpdate", lambda: _get_spreadsheet(spreadsheetId)._apply(body.get("requests", [])))
+
+
+class FakeService:
+    """Subset of the discovery client built by googleapiclient.discovery.build('sheets', 'v4')."""
+
+    def spreadsheets(self):
+        return _Spreadsheets()
+
+
+# ---------------------------------- #
+# BACKEND CONTROL
+# ---------------------------------- #
+def _get_spreadsheet(spreadsheet_id):
+    _ensure_loaded()
+    with _lock:
+        spreadsheet = _spreadsheets.get(spreadsheet_id)
+        if spreadsheet is None:
+            if not FAKE_SHEETS_AUTOCREATE:
+                import gspread
+                raise gspread.SpreadsheetNotFound(spreadsheet_id)
+            spreadsheet = _spreadsheets[spreadsheet_id] = FakeSpreadsheet(spreadsheet_id)
+        return spreadsheet
+
+
+def _ensure_loaded():
+    global _loaded
+    if not _loaded:
+        _loaded = True
+        if FAKE_SHEETS_DATA_FILE:
+            load(FAKE_SHEETS_DATA_FILE)
+
+
+def get_client():
+    return FakeClient()
+
+
+def get_service():
+    return FakeService()
+
+
+def seed(spreadsheet_id, worksheet_title, rows):
+    """Creates or replaces a worksheet's content (not counted as API calls). Returns the worksheet."""
+    with _lock:
+        spreadsheet = _spreadsheets.get(spreadsheet_id)
+        if spreadsheet is None:
+            spreadsheet = _spreadsheets[spreadsheet_id] = FakeSpreadsheet(spreadsheet_id)
+        worksheet = spreadsheet._find(worksheet_title)
+        if worksheet is None:
+            return spreadsheet._add(worksheet_title, rows)
+        worksheet.rows = [[_to_text(v) for v in row] for row in rows]
+        return worksheet
+
+
+def contents(spreadsheet_id, worksheet_title):
+    """Copy of a worksheet's rows (not counted as API calls), for assertions and benchmarks."""
+    with _lock:
+        return copy.deepcopy(_spreadsheets[spreadsheet_id]._by_title(worksheet_title).rows)
+
+
+def load(path):
+    """Seeds worksheets from a JSON file {spreadsheet id: {worksheet title: [[cell, ...], ...]}}."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    for spreadsheet_id, worksheets in data.items():
+        for title, rows in worksheets.items():
+            seed(spreadsheet_id, title, rows)
+    logger.info(f"🧪 Fake Sheets seeded from {path}: {sum(len(w) for w in data.values())} worksheet(s).")
+
+
+def dump(path):
+    """Writes every fake worksheet to a JSON file in load() format."""
+    with _lock:
+        data = {sid: {ws.title: ws.rows for ws in ss._worksheets} for sid, ss in _spreadsheets.items()}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+
+def inject_errors(count=1, status=429):
+    """Makes the next `count` API calls fail with this HTTP status (429 quota, 500/503 server errors)."""
+    with _lock:
+        _injected.extend([status] * count)
+
+
+def reset(data=True):
+    """Clears counters and quota windows, and (by default) all fake spreadsheets."""
+    global _loaded
+    with _lock:
+        calls.clear()
+        stats.update({"reads": 0, "writes": 0, "quota_errors": 0, "injected_errors": 0, "latency_seconds": 0.0})
+        for sent in _sent.values():
+            sent.clear()
+        _injected.clear()
+        if data:
+            _spreadsheets.clear()
+            _loaded = False
+
+
+def report(reset_counts=False):
+    """Logs and returns API call counts (total and per operation) since the last reset."""
+    with _lock:
+        summary = dict(stats, calls=dict(calls.most_common()))
+    logger.info(f"🧪 Fake Sheets: {summary['reads']} reads, {summary['writes']} writes, "
+                f"{summary['quota_errors']} quota errors, {summary['latency_seconds']:.2f}s simulated latency. "
+                f"Per operation: {summary['calls']}")
+    if reset_counts:
+        reset(data=False)
+    return summary
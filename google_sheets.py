@@ -1,10 +1,16 @@
 import os
 import gspread
 import logging
-from oauth2client.service_account import ServiceAccountCredentials
+import sheets_client
+import sheet_write_buffer
+import sheet_row_index
+import sheet_archiver
+import sheets_scheduler
+import sheet_snapshot
+import pipeline_state
+import upload_ingest
 import time
-from threading import Lock
-import pandas as pd # Keep for process_google_sheet
+import pandas as pd # Sales diff (_diff_sales_against_sheets)
 import requests # For retry logic
 
 # Setup logger
@@ -21,39 +27,26 @@ SHEET1_NAME = "Sheet1"
 SHEET2_NAME = "Sheet2"
 MAX_RETRIES = 3 # Max retries for API calls
 RETRY_DELAY = 2 # Base delay seconds for exponential backoff
+PIPELINE_STATE_ENABLED = os.getenv("PIPELINE_STATE_ENABLED", "true").lower() in ("1", "true", "yes")
 
 # --- Helper Functions ---
 
-# Cache the client to avoid re-authenticating constantly
-_gspread_client = None
-_client_lock = Lock()
-
 def _get_gspread_client():
-    """Authenticates and returns an authorized gspread client (cached)."""
-    global _gspread_client
-    with _client_lock:
-        if _gspread_client is None:
-            scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-            try:
-                # Try loading from env var path first
-                creds = ServiceAccountCredentials.from_json_keyfile_name(GOOGLE_CREDENTIALS_FILE, scope)
-                _gspread_client = gspread.authorize(creds)
-                logger.info(f"🔐 Google Sheets client authorized using: {GOOGLE_CREDENTIALS_FILE}")
-            except FileNotFoundError:
-                logger.error(f"❌ Google Credentials file not found at: {GOOGLE_CREDENTIALS_FILE}. Check GOOGLE_CREDENTIALS_FILE env var.")
-                # Optional: Add fallback logic here if needed, like checking default paths
-            except Exception as e:
-                logger.exception(f"❌ Failed to authorize Google Sheets client: {e}")
-                _gspread_client = None # Ensure it's None on failure
-        return _gspread_client
+    """Returns the shared, authorized gspread client (see sheets_client)."""
+    try:
+        return sheets_client.get_client()
+    except FileNotFoundError:
+        logger.error(f"❌ Google Credentials file not found at: {GOOGLE_CREDENTIALS_FILE}. Check GOOGLE_CREDENTIALS_FILE env var.")
+    except Exception as e:
+        logger.exception(f"❌ Failed to authorize Google Sheets client: {e}")
+    return None
 
 def _get_worksheet(worksheet_name):
     """Gets a specific worksheet object using the cached client."""
-    client = _get_gspread_client()
-    if not client:
+    if not _get_gspread_client():
         return None
     try:
-        sheet = client.open_by_key(GOOGLE_SHEET_ID).worksheet(worksheet_name)
+        sheet = sheets_client.get_worksheet(worksheet_name, GOOGLE_SHEET_ID)
         logger.debug(f"Accessed worksheet: '{worksheet_name}'")
         return sheet
     except gspread.WorksheetNotFound:
@@ -65,10 +58,16 @@ def _get_worksheet(worksheet_name):
     return None
 
 def _retry_gspread_operation(operation, *args, **kwargs):
-    """ Wrapper to retry gspread operations on API errors AND ConnectionErrors. """
+    """
+    Wrapper to retry gspread operations on API errors AND ConnectionErrors.
+    Every attempt first waits for its slot in the Sheets read/write quota (sheets_scheduler),
+    so 429s and their backoff should be rare.
+    """
     retries = 0
+    kind = sheets_scheduler.kind_of(operation)
     while retries < MAX_RETRIES: # Ensure MAX_RETRIES is defined
         try:
+            sheets_scheduler.acquire(kind)
             return operation(*args, **kwargs)
         except requests.exceptions.ConnectionError as conn_err:
              # Catch connection errors specifically
@@ -86,6 +85,9 @@ def _retry_gspread_operation(operation, *args, **kwargs):
                 if retries >= MAX_RETRIES:
                      logger.error(f"🚫 Max retries exceeded for {operation.__name__} after APIError: {api_err}")
                      raise
+                if api_err.response.status_code == 429:
+                    sheets_scheduler.register_429(kind)  # The next acquire() waits out the pause
+                    continue
                 wait = RETRY_DELAY * (2 ** (retries - 1))
                 logger.warning(f"🔁 APIError ({api_err.response.status_code}) during {operation.__name__}. Retrying in {wait}s (Attempt {retries}/{MAX_RETRIES})")
                 time.sleep(wait)
@@ -101,33 +103,63 @@ def _retry_gspread_operation(operation, *args, **kwargs):
     logger.error(f"🚫 Unexpected exit from retry loop for {operation.__name__}.")
     raise Exception(f"Max retries exceeded for {operation.__name__} without specific error.")
 
-def process_google_sheet(file, image_column="A", starting_row=2):
-    """Reads an uploaded Excel/CSV and performs placeholder processing."""
+def process_google_sheet(file, image_column="A", starting_row=2, id_column=None):
+    """
+    Imports an uploaded Excel/CSV of products into the translation pipeline.
+    Rows are streamed (upload_ingest: CSV chunks, XLSX read-only), validated, and appended to
+    Sheet1 as PENDING in batches of UPLOAD_BATCH_ROWS as they are parsed, so the pipeline can
+    pick up the first batch while the rest of the file is still being read. Products already in
+    Sheet1/Sheet2 or repeated in the file are skipped.
+
+    Returns:
+        {"rows", "enqueued", "duplicates", "invalid"} counts, plus "error" if the import stopped early.
+    Raises:
+        upload_ingest.UploadError: the file cannot be ingested at all (nothing was enqueued).
+    """
     logger.info(f"Processing uploaded file: {file.filename}")
-    try:
-        # Read the uploaded file into a DataFrame
-        if file.filename.endswith((".xlsx", ".xls")):
-             df = pd.read_excel(file)
-        elif file.filename.endswith(".csv"):
-             df = pd.read_csv(file)
-        else:
-             logger.error("Unsupported file type for processing.")
-             return 0
-
-        # Example: Count the number of non-empty rows starting from `starting_row`
-        df = df.iloc[starting_row - 1:]  # Adjust for 0-index
-        product_count = df.shape[0]
-        logger.info(f"Found {product_count} products in uploaded file starting from row {starting_row}.")
-
-        # --- Process the sheet logic here (placeholder) ---
-        # For example, extract titles, descriptions, translate, etc.
-        # Add your specific processing steps here based on the DataFrame 'df'
-        # --- End Placeholder ---
+    summary = {"rows": 0, "enqueued": 0, "duplicates": 0, "invalid": 0}
+    sheet1 = _get_worksheet(SHEET1_NAME)
+    sheet2 = _get_worksheet(SHEET2_NAME)
+    if not sheet1 or not sheet2:
+        logger.error("Could not access Sheet1 or Sheet2. Aborting upload import.")
+        summary["error"] = "Could not access Sheet1 or Sheet2."
+        return summary
 
-        return product_count
+    try:
+        sheet1_index = sheet_row_index.get_row_index(sheet1, retry=_retry_gspread_operation)
+        seen = {str(v).strip() for v in _retry_gspread_operation(sheet2.col_values, 1)[1:]}
+
+        def _new_products():
+            for item in upload_ingest.iter_products(file, file.filename, image_column, starting_row, id_column):
+                summary["rows"] += 1
+                if "error" in item:
+                    summary["invalid"] += 1
+                    logger.warning(f"⚠️ Upload row {item['row']} skipped: {item['error']}")
+                    continue
+                pid = item["product_id"]
+                if pid in seen or sheet1_index.get(pid):
+                    summary["duplicates"] += 1
+                    continue
+                seen.add(pid)
+                yield item
+
+        for batch in upload_ingest.iter_batches(_new_products()):
+            rows = [[item["product_id"], item["title"], "", "PENDING", "", "", ""] for item in batch]
+            _retry_gspread_operation(sheet1.append_rows, rows, value_input_option="USER_ENTERED", insert_data_option="INSERT_ROWS")
+            sheet_row_index.note_append(sheet1, [row[0] for row in rows])
+            summary["enqueued"] += len(rows)
+            logger.info(f"📥 Enqueued {len(rows)} uploaded products as PENDING in '{SHEET1_NAME}' ({summary['enqueued']} so far).")
+
+        logger.info(f"✅ Upload import finished: {summary['rows']} rows, {summary['enqueued']} enqueued, "
+                    f"{summary['duplicates']} duplicates, {summary['invalid']} invalid.")
+        return summary
+    except upload_ingest.UploadError as e:
+        logger.error(f"❌ Upload rejected: {e}")
+        raise
     except Exception as e:
-        logger.exception(f"❌ Failed to process uploaded sheet: {e}")
-        return 0
+        logger.exception(f"❌ Failed to process uploaded sheet after enqueuing {summary['enqueued']} products: {e}")
+        summary["error"] = str(e)
+        return summary
 
 def get_pending_products_from_sheet():
     """
@@ -135,6 +167,7 @@ def get_pending_products_from_sheet():
     Returns a list of dicts containing all columns for PENDING rows, or None on error.
     """
     logger.info(f"Fetching PENDING products from '{SHEET1_NAME}'...")
+    sheet_write_buffer.flush_all()  # Read-your-writes: send buffered status updates first
     sheet = _get_worksheet(SHEET1_NAME)
     if not sheet:
         return None # Indicate failure to get sheet
@@ -157,7 +190,7 @@ def get_pending_products_from_sheet():
 def update_product_status_in_sheet(product_id, new_status, sheet=None):
     """
     Updates the 'Status' (Column D=4) for a given Product ID (Column A=1) in Sheet1.
-    Uses sheet.find() for efficiency. Includes retry logic via helper.
+    Looks the row up in the cached row index (no API call). Includes retry logic via helper.
     Returns True on success, False on failure.
     """
     if not product_id:
@@ -170,16 +203,14 @@ def update_product_status_in_sheet(product_id, new_status, sheet=None):
             sheet = _get_worksheet(SHEET1_NAME)
             if not sheet: return False
 
-        # Find the cell containing the product_id in the first column
-        cell = _retry_gspread_operation(sheet.find, str(product_id), in_column=1)
+        status_col_index = 4 # Assuming Status is Column D
+        # Row comes from the cached Product ID index; the write is buffered and re-checked before the flush
+        row_index = sheet_row_index.queue_row_updates(sheet, product_id, {status_col_index: new_status},
+                                                      retry=_retry_gspread_operation)
 
-        if cell:
-            row_index = cell.row
-            status_col_index = 4 # Assuming Status is Column D
+        if row_index:
             logger.debug(f"Found Product ID {product_id} at row {row_index}. Updating status column {status_col_index}.")
-            # Use retry wrapper for the update operation
-            _retry_gspread_operation(sheet.update_cell, row_index, status_col_index, str(new_status))
-            logger.info(f"✅ Set Product ID {product_id} status -> '{new_status}' in '{SHEET1_NAME}'.")
+            logger.info(f"✅ Queued Product ID {product_id} status -> '{new_status}' in '{SHEET1_NAME}'.")
             return True
         else:
             logger.warning(f"⚠️ Could not find Product ID {product_id} in '{SHEET1_NAME}' to update status.")
@@ -197,6 +228,7 @@ def get_products_pending_translation_from_sheet1(sheet=None):
     """
     logger.info(f"Fetching products PENDING translation from '{SHEET1_NAME}'...")
     try:
+        sheet_write_buffer.flush_all()  # Read-your-writes: send buffered status updates first
         if sheet is None:
             sheet = _get_worksheet(SHEET1_NAME)
             if not sheet: return None
@@ -240,16 +272,14 @@ def mark_product_translation_done_in_sheet(original_product_id, sheet=None):
             sheet = _get_worksheet(SHEET1_NAME)
             if not sheet: return False
 
-        # Find the cell containing the original product_id in the first column (A=1)
-        cell = _retry_gspread_operation(sheet.find, str(original_product_id), in_column=1)
+        status_col_index = 4 # Assuming Status is Column D
+        # Row comes from the cached Product ID index (A=1); the write is buffered and re-checked before the flush
+        row_index = sheet_row_index.queue_row_updates(sheet, original_product_id, {status_col_index: new_status},
+                                                      retry=_retry_gspread_operation)
 
-        if cell:
-            row_index = cell.row
-            status_col_index = 4 # Assuming Status is Column D
+        if row_index:
             logger.debug(f"Found Original ID {original_product_id} at row {row_index}. Updating status column {status_col_index} to '{new_status}'.")
-            # Use retry wrapper for the update operation
-            _retry_gspread_operation(sheet.update_cell, row_index, status_col_index, new_status)
-            logger.info(f"✅ Updated status to '{new_status}' for Original ID {original_product_id}")
+            logger.info(f"✅ Queued status '{new_status}' for Original ID {original_product_id}")
             return True
         else:
             # This log is important - indicates data mismatch between processing and sheet state
@@ -262,6 +292,42 @@ def mark_product_translation_done_in_sheet(original_product_id, sheet=None):
 
 # In google_sheets.py
 
+def _diff_sales_against_sheets(product_sales, sheet1_records, sheet2_records):
+    """
+    Vectorized diff of incoming sales against the current sheet contents.
+    Returns (rows to append to Sheet1, [{"range": "C<row>", "values": [[count]]}, ...]).
+    Products already in Sheet2, or DONE/APPROVED in Sheet1, are skipped.
+    """
+    sales = pd.DataFrame(product_sales, columns=["product_id", "title", "sales_count"])
+    sales["product_id"] = sales["product_id"].fillna("").astype(str).str.strip()
+    sales = sales[sales["product_id"] != ""].drop_duplicates("product_id", keep="last")
+    sales["sales_count"] = pd.to_numeric(sales["sales_count"], errors="coerce")
+
+    sheet1 = pd.DataFrame(sheet1_records, columns=["Product ID", "Status", "Sales Count"])
+    sheet1["row_index"] = sheet1.index + 2  # 1-based, +1 for header
+    sheet1["Product ID"] = sheet1["Product ID"].fillna("").astype(str)
+    sheet1 = sheet1[sheet1["Product ID"] != ""].drop_duplicates("Product ID", keep="last")
+    sheet1["status"] = sheet1["Status"].fillna("").astype(str).str.strip().str.upper()
+    sheet1["current_count"] = pd.to_numeric(sheet1["Sales Count"], errors="coerce").fillna(0)
+
+    sheet2_ids = {str(row.get("Product ID", "")) for row in sheet2_records if row.get("Product ID")}
+    sales = sales[~sales["product_id"].isin(sheet2_ids)]
+
+    merged = sales.merge(sheet1[["Product ID", "row_index", "status", "current_count"]],
+                         how="left", left_on="product_id", right_on="Product ID", indicator=True)
+
+    new = merged[merged["_merge"] == "left_only"]
+    new_rows = [[pid, title if isinstance(title, str) else "", "" if pd.isna(count) else int(count), "PENDING", "", "", ""]
+                for pid, title, count in zip(new["product_id"], new["title"], new["sales_count"])]
+
+    existing = merged[merged["_merge"] == "both"]
+    changed = existing[~existing["status"].isin(["DONE", "APPROVED"])
+                       & existing["sales_count"].notna()
+                       & (existing["sales_count"] != existing["current_count"])]
+    updates = [{"range": f"C{int(row)}", "values": [[int(count)]]}
+               for row, count in zip(changed["row_index"], changed["sales_count"])]
+    return new_rows, updates
+
 def export_sales_to_sheet(product_sales):
     """
     Adds new products from sales data to Sheet1 if not already present or DONE.
@@ -274,6 +340,7 @@ def export_sales_to_sheet(product_sales):
 
     logger.info(f"Exporting {len(product_sales)} products with sales data to Google Sheet...")
     # Use internal helper which uses cached client
+    sheet_write_buffer.flush_all()  # Read-your-writes: send buffered status updates first
     sheet1 = _get_worksheet(SHEET1_NAME)
     sheet2 = _get_worksheet(SHEET2_NAME)
     if not sheet1 or not sheet2:
@@ -292,10 +359,8 @@ def export_sales_to_sheet(product_sales):
              else: raise
         if sheet1_header != headers:
             logger.warning(f"Updating Sheet1 header to: {headers}")
-            # Use batch_clear and update instead of delete_rows for potentially better performance/safety
-            if sheet1_header: # Only clear if header exists but is wrong
-                _retry_gspread_operation(sheet1.batch_clear, ['1:1'])
-            _retry_gspread_operation(sheet1.update, 'A1', [headers], value_input_option="USER_ENTERED")
+            # Only the header cells that differ are written (sheet_snapshot)
+            sheet_snapshot.write_row_diff(sheet1, 1, headers, sheet1_header, retry=_retry_gspread_operation)
 
         try:
             sheet2_header = _retry_gspread_operation(sheet2.row_values, 1)
@@ -304,9 +369,7 @@ def export_sales_to_sheet(product_sales):
              else: raise
         if sheet2_header != headers:
             logger.warning(f"Updating Sheet2 header to: {headers}")
-            if sheet2_header:
-                 _retry_gspread_operation(sheet2.batch_clear, ['1:1'])
-            _retry_gspread_operation(sheet2.update, 'A1', [headers], value_input_option="USER_ENTERED")
+            sheet_snapshot.write_row_diff(sheet2, 1, headers, sheet2_header, retry=_retry_gspread_operation)
         # --- End Header Check ---
 
         # --- Get Existing Data Efficiently ---
@@ -315,52 +378,16 @@ def export_sales_to_sheet(product_sales):
         existing_sheet2_data = _retry_gspread_operation(sheet2.get_all_records)
         logger.info(f"Fetched {len(existing_sheet1_data)} records from {SHEET1_NAME}, {len(existing_sheet2_data)} from {SHEET2_NAME}.")
 
-        sheet1_info = {str(row.get("Product ID","")): {"row_index": idx + 2, "status": str(row.get("Status","")).strip().upper()}
-                       for idx, row in enumerate(existing_sheet1_data) if row.get("Product ID")}
-        sheet2_ids = {str(row.get("Product ID","")) for row in existing_sheet2_data if row.get("Product ID")}
-        logger.debug(f"Created lookups: {len(sheet1_info)} Sheet1 IDs, {len(sheet2_ids)} Sheet2 IDs.")
-
-        # --- Process Input Sales Data ---
-        new_rows_to_append = []
-        sales_updates_batch = []
-
-        for item in product_sales:
-            pid_str = str(item.get("product_id","")).strip()
-            if not pid_str: continue
-
-            title = item.get("title", "")
-            count = item.get("sales_count")
-
-            if pid_str in sheet2_ids:
-                logger.debug(f"Skipping {pid_str}: Already present in '{SHEET2_NAME}'.")
-                continue
-
-            if pid_str in sheet1_info:
-                info = sheet1_info[pid_str]
-                if info["status"] in ["DONE", "APPROVED"]:
-                     logger.debug(f"Skipping {pid_str}: Found in '{SHEET1_NAME}' with status '{info['status']}', will be moved later.")
-                     continue
-                else:
-                     # Update sales count (Column C = 3)
-                     try:
-                          current_cell_value = _retry_gspread_operation(sheet1.cell, info["row_index"], 3).value
-                          current_sales_count = int(current_cell_value) if current_cell_value else 0
-                     except (ValueError, TypeError): current_sales_count = 0
-                     except Exception as cell_err: logger.error(f"Error reading sales count for {pid_str}: {cell_err}"); current_sales_count = -1
-
-                     if count is not None and count != current_sales_count:
-                          sales_updates_batch.append({ "range": f"C{info['row_index']}", "values": [[count]] })
-                          logger.debug(f"Queueing sales count update for {pid_str}: {current_sales_count} -> {count}")
-            else:
-                # New product for Sheet1
-                # Add placeholder for the new "Target Store" column (7th column)
-                new_rows_to_append.append([pid_str, title, count, "PENDING", "", "", ""]) # <-- ADDED empty string at the end
-                logger.debug(f"Queueing new row for {pid_str}.")
+        # --- Diff Input Sales Data Against Both Sheets (no per-row API calls) ---
+        new_rows_to_append, sales_updates_batch = _diff_sales_against_sheets(
+            product_sales, existing_sheet1_data, existing_sheet2_data)
+        logger.info(f"Sales diff: {len(new_rows_to_append)} new rows, {len(sales_updates_batch)} sales count changes.")
 
         # --- Perform Sheet Updates ---
         if new_rows_to_append:
             logger.info(f"Appending {len(new_rows_to_append)} new rows to '{SHEET1_NAME}'...")
             _retry_gspread_operation(sheet1.append_rows, new_rows_to_append, value_input_option="USER_ENTERED", insert_data_option="INSERT_ROWS")
+            sheet_row_index.note_append(sheet1, [row[0] for row in new_rows_to_append])
             logger.info(f"✅ Successfully appended {len(new_rows_to_append)} rows.")
 
         if sales_updates_batch:
@@ -379,12 +406,12 @@ def export_sales_to_sheet(product_sales):
 def move_done_to_sheet2():
     """
     Moves rows with status 'DONE' or 'APPROVED' from Sheet1 to Sheet2
-    and DELETES them from Sheet1 using batch deletion. Includes retry logic.
+    and DELETES them from Sheet1 in one batchUpdate (see sheet_archiver). Includes retry logic.
     """
     logger.info(f"Checking for DONE/APPROVED rows to move from '{SHEET1_NAME}' to '{SHEET2_NAME}'...")
-    client = _get_gspread_client()
-    sheet1 = _get_worksheet(client, SHEET1_NAME)
-    sheet2 = _get_worksheet(client, SHEET2_NAME)
+    sheet_write_buffer.flush_all()  # Read-your-writes: send buffered status updates first
+    sheet1 = _get_worksheet(SHEET1_NAME)
+    sheet2 = _get_worksheet(SHEET2_NAME)
     if not sheet1 or not sheet2:
         logger.error("Could not access Sheet1 or Sheet2. Aborting move.")
         return
@@ -424,22 +451,14 @@ def move_done_to_sheet2():
 
         # --- Perform Sheet Updates ---
         if rows_to_move_data:
-            # Append data to Sheet2 (reverse collected data back to original order for appending)
+            # Append to Sheet2 (original order) and delete from Sheet1 in one atomic batchUpdate
             logger.info(f"Moving {len(rows_to_move_data)} rows to '{SHEET2_NAME}'...")
-            _retry_gspread_operation(sheet2.append_rows, rows_to_move_data[::-1], value_input_option="USER_ENTERED", insert_data_option="INSERT_ROWS")
-
-            # Delete rows from Sheet1 (delete in descending index order)
-            logger.info(f"Deleting {len(rows_to_delete_indices)} rows from '{SHEET1_NAME}'...")
-            # Use batch delete for efficiency if gspread supports it well, otherwise loop
-            # gspread doesn't have a direct batch delete by index list, so loop is safer
-            for row_index in sorted(rows_to_delete_indices, reverse=True):
-                 try:
-                      _retry_gspread_operation(sheet1.delete_rows, row_index)
-                      logger.debug(f"Deleted row {row_index} from {SHEET1_NAME}.")
-                 except Exception as del_err:
-                      logger.error(f"Error deleting row {row_index} from {SHEET1_NAME}: {del_err}")
-                      # Decide if you want to stop or continue on deletion error
-
+            sheet_archiver.archive_rows(sheet1, sheet2, rows_to_delete_indices, rows_to_move_data[::-1],
+                                        retry=_retry_gspread_operation)
+            if PIPELINE_STATE_ENABLED:
+                for row_data in rows_to_move_data:
+                    if row_data:
+                        pipeline_state.forget(row_data[0])  # Archived: no more local state to sync
             logger.info(f"✅ Successfully moved {len(rows_to_move_data)} rows.")
         else:
             logger.info("📭 No DONE or APPROVED rows found in Sheet1 to move.")
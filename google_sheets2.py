@@ -3,8 +3,9 @@
 
 import os
 import traceback
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+import sheets_client
+import sheet_archiver
+import sheets_scheduler
 from googleapiclient.errors import HttpError
 import time # Added for test block
 from dotenv import load_dotenv # Added for test block
@@ -18,19 +19,17 @@ class GoogleSheetManager:
     SCOPES = ['https://www.googleapis.com/auth/spreadsheets'] # Read/Write access
 
     def __init__(self, credentials_path, spreadsheet_id):
-        # ... (Initialization remains the same) ...
-        if not os.path.exists(credentials_path):
+        if sheets_client.SHEETS_BACKEND != "fake" and not os.path.exists(credentials_path):
             raise FileNotFoundError(f"Google credentials file not found at: {credentials_path}")
+        self.credentials_path = credentials_path
         self.spreadsheet_id = spreadsheet_id
-        self.service = self._initialize_service(credentials_path)
+        self._initialize_service(credentials_path)
         self._sheet_ids_cache = {} # Cache for numeric sheet IDs
 
     def _initialize_service(self, credentials_path):
-        # ... (Remains the same) ...
+        # Credentials and the API client come from the shared sheets_client provider
         try:
-            creds = service_account.Credentials.from_service_account_file(
-                credentials_path, scopes=self.SCOPES)
-            service = build('sheets', 'v4', credentials=creds, cache_discovery=False)
+            service = sheets_client.get_sheets_service(credentials_path)
             print("Google Sheets service initialized successfully.")
             return service
         except Exception as e:
@@ -38,12 +37,18 @@ class GoogleSheetManager:
             traceback.print_exc()
             raise
 
+    @property
+    def service(self):
+        """Sheets API client for the calling thread (shared credentials, token refresh handled by the provider)."""
+        return sheets_client.get_sheets_service(self.credentials_path)
+
     def get_sheet_id_by_name(self, sheet_name, use_cache=True):
         # ... (Remains the same) ...
         if use_cache and sheet_name in self._sheet_ids_cache: return self._sheet_ids_cache[sheet_name]
         if not self.service: print("Error: Google Sheets service not initialized."); return None
         try:
             # print(f"Fetching numeric sheet ID for '{sheet_name}'...") # Keep logging minimal
+            sheets_scheduler.acquire("read")
             sheet_metadata = self.service.spreadsheets().get(spreadsheetId=self.spreadsheet_id, fields='sheets(properties(sheetId,title))').execute()
             sheets = sheet_metadata.get('sheets', []);
             for sheet in sheets:
@@ -65,6 +70,7 @@ class GoogleSheetManager:
         source_data = []; full_range = f"{sheet_name}!{data_range}"
         try:
             print(f"Reading data from sheet range: {full_range}")
+            sheets_scheduler.acquire("read")
             result = self.service.spreadsheets().values().get( spreadsheetId=self.spreadsheet_id, range=full_range, valueRenderOption='UNFORMATTED_VALUE', dateTimeRenderOption='SERIAL_NUMBER' ).execute()
             values = result.get('values', [])
             # Calculate starting row index from the range string (e.g., B2 -> 2)
@@ -102,6 +108,7 @@ class GoogleSheetManager:
             request = self.service.spreadsheets().values().append(
                 spreadsheetId=self.spreadsheet_id, range=range_to_append,
                 valueInputOption=value_input_option, insertDataOption=insert_data_option, body=body)
+            sheets_scheduler.acquire("write")
             response = request.execute()
             print(f"   Successfully appended row to '{sheet_name}'.")
             return True
@@ -112,16 +119,43 @@ class GoogleSheetManager:
         Deletes a specific row from a sheet using its numeric ID and row number.
         (Method added back)
         """
+        return self.delete_rows([row_num], sheet_numeric_id)
+
+    def delete_rows(self, row_nums, sheet_numeric_id):
+        """
+        Deletes many rows in one batchUpdate: contiguous rows are merged into one range
+        deletion each, bottom-most range first so earlier deletions don't shift later ones.
+        """
         if not self.service: print("Error: Google Sheets service not initialized."); return False
         if sheet_numeric_id is None: print("Error: Cannot delete row without numeric sheet ID."); return False
+        if not row_nums: return True
         try:
-            start_index = row_num - 1; end_index = row_num # 0-based index for API
-            body = { "requests": [ { "deleteDimension": { "range": { "sheetId": sheet_numeric_id, "dimension": "ROWS", "startIndex": start_index, "endIndex": end_index } } } ] }
+            body = { "requests": sheet_archiver.build_delete_requests(sheet_numeric_id, row_nums) }
             request = self.service.spreadsheets().batchUpdate(spreadsheetId=self.spreadsheet_id, body=body)
+            sheets_scheduler.acquire("write")
             response = request.execute()
-            print(f"   Successfully deleted row {row_num} from source sheet (Numeric ID: {sheet_numeric_id}).")
+            print(f"   Successfully deleted {len(set(row_nums))} row(s) in {len(body['requests'])} range(s) from source sheet (Numeric ID: {sheet_numeric_id}).")
+            return True
+        except Exception as e: print(f"   Error deleting rows {sorted(row_nums)[:10]}... from sheet (Numeric ID: {sheet_numeric_id}): {e}"); traceback.print_exc(); return False
+
+    def move_rows(self, row_nums, rows, source_sheet_name, target_sheet_name):
+        """
+        Appends rows to target_sheet_name and deletes row_nums from source_sheet_name
+        in a single atomic batchUpdate (appendCells + coalesced deleteDimension).
+        """
+        if not self.service: print("Error: Google Sheets service not initialized."); return False
+        source_id = self.get_sheet_id_by_name(source_sheet_name)
+        target_id = self.get_sheet_id_by_name(target_sheet_name)
+        if source_id is None or target_id is None: return False
+        if not row_nums: return True
+        try:
+            body = { "requests": [sheet_archiver.build_append_request(target_id, rows)]
+                                 + sheet_archiver.build_delete_requests(source_id, row_nums) }
+            sheets_scheduler.acquire("write", sheets_scheduler.LOW)
+            self.service.spreadsheets().batchUpdate(spreadsheetId=self.spreadsheet_id, body=body).execute()
+            print(f"   Moved {len(rows)} row(s) from '{source_sheet_name}' to '{target_sheet_name}' in one batch.")
             return True
-        except Exception as e: print(f"   Error deleting row {row_num} from sheet (Numeric ID: {sheet_numeric_id}): {e}"); traceback.print_exc(); return False
+        except Exception as e: print(f"   Error moving rows from '{source_sheet_name}' to '{target_sheet_name}': {e}"); traceback.print_exc(); return False
 
     # --- update_cell method is REMOVED ---
 
@@ -3,10 +3,16 @@
 import os
 import gspread # Requires: pip install gspread
 import logging
-# Requires: pip install oauth2client
-from oauth2client.service_account import ServiceAccountCredentials
+import sheets_client
+import sheet_write_buffer
+import sheet_row_index
+import sheet_archiver
+import sheets_scheduler
+import sheet_snapshot
+import pipeline_state
+import threading
+import atexit
 import time
-from threading import Lock
 import requests # Requires: pip install requests
 import json # Needed for header check in move_done
 import random # Needed for jitter
@@ -31,6 +37,11 @@ SHEET2_NAME = os.getenv("ARCHIVE_SHEET_NAME", "Sheet2") # Archive sheet
 MAX_RETRIES = 50     # Max retries for Google API calls
 RETRY_DELAY = 5.0   # Initial delay in seconds for retries
 
+# Per-store status/GID/title live in the local pipeline_state store; Sheet1 is a synced view of it
+PIPELINE_STATE_ENABLED = os.getenv("PIPELINE_STATE_ENABLED", "true").lower() in ("1", "true", "yes")
+PIPELINE_STATE_PUSH_SECONDS = float(os.getenv("PIPELINE_STATE_PUSH_SECONDS", "15"))   # Local changes -> sheet
+PIPELINE_STATE_PULL_SECONDS = float(os.getenv("PIPELINE_STATE_PULL_SECONDS", "300"))  # Sheet edits (e.g. APPROVED) -> local
+
 # --- Column Mapping for Multi-Store Status Updates ---
 # !!! IMPORTANT: Verify these column letters match your ACTUAL Sheet1 layout !!!
 STORE_COLUMN_MAP = {
@@ -38,8 +49,6 @@ STORE_COLUMN_MAP = {
     "store_dk": {"status": 7, "gid": 8, "title": 9},  # G=6, H=7, I=8 (0-based)
 }   
 # --- Helper Functions ---
-_gspread_client = None
-_client_lock = Lock()
 
 # At the top of your google_sheets_utils.py
 STORE_COLUMN_MAP = {
@@ -61,45 +70,27 @@ def clean_header_key(header: str) -> str:
     return cleaned
 
 def _get_gspread_client() -> Optional[gspread.Client]:
-    """Authenticates and returns an authorized gspread client (cached). Thread-safe."""
-    global _gspread_client
-    # Quick check without lock first
-    if _gspread_client:
-        return _gspread_client
-
-    with _client_lock:
-        # Double-check after acquiring lock
-        if _gspread_client is None:
-            scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-            creds_path = GOOGLE_CREDENTIALS_FILE
-            if not GOOGLE_SHEET_ID:
-                 logger.critical("❌ CRITICAL: GOOGLE_SHEET_ID environment variable not set.")
-                 return None # Cannot proceed without Sheet ID
-            if not os.path.exists(creds_path):
-                logger.critical(f"❌ Google Credentials file not found at: {creds_path}. Check GOOGLE_CREDENTIALS_FILE env var.")
-                return None
-            try:
-                logger.debug(f"Attempting to authorize Google Sheets client using: {creds_path}")
-                creds = ServiceAccountCredentials.from_json_keyfile_name(creds_path, scope)
-                client = gspread.authorize(creds)
-                logger.info(f"🔐 Google Sheets client authorized successfully using: {creds_path}")
-                _gspread_client = client
-            except Exception as e:
-                logger.exception(f"❌ Failed to authorize Google Sheets client: {e}")
-                _gspread_client = None # Ensure it stays None on failure
-    return _gspread_client
+    """Returns the shared, authorized gspread client (see sheets_client)."""
+    if not GOOGLE_SHEET_ID:
+        logger.critical("❌ CRITICAL: GOOGLE_SHEET_ID environment variable not set.")
+        return None # Cannot proceed without Sheet ID
+    try:
+        return sheets_client.get_client()
+    except FileNotFoundError:
+        logger.critical(f"❌ Google Credentials file not found at: {GOOGLE_CREDENTIALS_FILE}. Check GOOGLE_CREDENTIALS_FILE env var.")
+    except Exception as e:
+        logger.exception(f"❌ Failed to authorize Google Sheets client: {e}")
+    return None
 
 def _get_worksheet(worksheet_name: str) -> Optional[gspread.Worksheet]:
     """Gets a specific worksheet object using the cached client."""
-    client = _get_gspread_client()
-    if not client:
+    if not _get_gspread_client():
         logger.error("❌ Cannot get worksheet, client not authorized.")
         return None
     # GOOGLE_SHEET_ID check happens in client auth now
 
     try:
-        spreadsheet = client.open_by_key(GOOGLE_SHEET_ID)
-        sheet = spreadsheet.worksheet(worksheet_name)
+        sheet = sheets_client.get_worksheet(worksheet_name, GOOGLE_SHEET_ID)
         logger.debug(f"Accessed worksheet: '{worksheet_name}' in Sheet ID: {GOOGLE_SHEET_ID}")
         return sheet
     except gspread.WorksheetNotFound:
@@ -114,11 +105,17 @@ def _get_worksheet(worksheet_name: str) -> Optional[gspread.Worksheet]:
     return None
 
 def _retry_gspread_operation(operation: callable, *args, **kwargs) -> Any:
-    """Wrapper to retry gspread operations with exponential backoff and jitter."""
+    """
+    Wrapper to retry gspread operations with exponential backoff and jitter.
+    Every attempt first waits for its slot in the Sheets read/write quota (sheets_scheduler),
+    so 429s are rare; a 429 pauses the whole quota instead of backing off per call.
+    """
     retries = 0
     last_exception = None
+    kind = sheets_scheduler.kind_of(operation)
     while retries < MAX_RETRIES:
         try:
+            sheets_scheduler.acquire(kind)
             # Attempt the operation (e.g., sheet.get_all_values(), sheet.append_rows())
             return operation(*args, **kwargs)
         except requests.exceptions.ConnectionError as conn_err:
@@ -147,6 +144,10 @@ def _retry_gspread_operation(operation: callable, *args, **kwargs) -> Any:
             logger.error(f"🚫 Max retries ({MAX_RETRIES}) exceeded for {operation.__name__} after {error_type}: {last_exception}")
             raise last_exception # Re-raise the last captured exception
 
+        if error_type == "APIError" and status_code == 429:
+            sheets_scheduler.register_429(kind)  # The next acquire() waits out the pause
+            continue
+
         # Calculate wait time with exponential backoff and jitter
         wait = RETRY_DELAY * (2 ** (retries - 1)) * (1 + random.random())
         wait = min(wait, 30.0) # Cap wait time
@@ -198,14 +199,21 @@ def ensure_sheet_headers(sheet_name: str) -> Tuple[Optional[List[str]], bool]:
 
     logger.debug(f"Expected Fixed Headers: {expected_headers}")
 
+    # Header row already known from an earlier read/write (sheet_snapshot): no API call needed
+    fetch_width = len(expected_headers) + 5
+    if sheet_snapshot.known_row(sheet, 1, fetch_width) == expected_headers + [""] * (fetch_width - len(expected_headers)):
+        logger.info(f"✅ Headers in '{sheet_name}' match the expected fixed layout (snapshot).")
+        return expected_headers, True
+
     try:
         # Attempt to read the current header row
         try:
             # --- FIX 1: Use openpyxl utility ---
             # Calculate column letter for fetching (e.g., N for 9 + 5 = 14)
-            fetch_range_end_col_letter = get_column_letter(len(expected_headers) + 5)
+            fetch_range_end_col_letter = get_column_letter(fetch_width)
             fetch_range = f"A1:{fetch_range_end_col_letter}1"
             header_values = _retry_gspread_operation(sheet.get_values, fetch_range)
+            sheet_snapshot.record_rows(sheet, header_values[:1] or [[]], width=fetch_width)
 
             if header_values and isinstance(header_values, list) and len(header_values) > 0:
                  current_header = header_values[0]
@@ -225,31 +233,10 @@ def ensure_sheet_headers(sheet_name: str) -> Tuple[Optional[List[str]], bool]:
             logger.info(f"✅ Headers in '{sheet_name}' match the expected fixed layout.")
             return expected_headers, True # Success, headers are correct
 
-        # --- Headers need update ---
+        # --- Headers need update: write only the cells that differ (extra trailing headers are cleared) ---
         logger.warning(f"Headers mismatch/missing from expected fixed layout. Attempting update in '{sheet_name}'...")
-
-        # --- FIX 2: Use openpyxl utility ---
-        # Calculate end column letter (e.g., I for 9 columns)
-        header_range_end_col_letter = get_column_letter(len(expected_headers))
-        header_range = f"A1:{header_range_end_col_letter}1" # e.g., "A1:I1"
-        logger.debug(f"Updating header range: {header_range}")
-
-        # --- Optional: Clear extra columns beyond the expected range ---
-        if current_header is not None and len(current_header) > len(expected_headers):
-            try:
-                clear_start_col_num = len(expected_headers) + 1
-                # --- FIX 3: Use openpyxl utility ---
-                clear_start_col_letter = get_column_letter(clear_start_col_num) # e.g., J
-                # Clear from J1 potentially up to Z1 (adjust Z if more cols needed)
-                clear_range = f"{clear_start_col_letter}1:Z1"
-                logger.debug(f"Clearing any extra header cells in range: {clear_range}")
-                _retry_gspread_operation(sheet.batch_clear, [clear_range])
-            except Exception as clear_err:
-                 logger.warning(f"⚠️ Failed to clear potential extra header cells: {clear_err}. Continuing update...")
-        # --- End Optional Clearing ---
-
-        # Update the calculated range (e.g., A1:I1) with the fixed expected headers
-        _retry_gspread_operation(sheet.update, header_range, [expected_headers], value_input_option="USER_ENTERED")
+        written = sheet_snapshot.write_row_diff(sheet, 1, expected_headers, current_header or [], retry=_retry_gspread_operation)
+        logger.debug(f"Updated {written} header cell(s) in '{sheet_name}'.")
         logger.info(f"✅ Headers updated in '{sheet_name}' to match fixed layout.")
         return expected_headers, True # Return the headers we just wrote
 
@@ -293,6 +280,7 @@ def add_new_product_rows(rows_to_add: List[List[Any]], sheet_name: str = SHEET1_
             value_input_option="USER_ENTERED", # Interprets values (e.g., numbers)
             insert_data_option="INSERT_ROWS" # Appends after the last row with content
         )
+        sheet_row_index.note_append(sheet, [row[0] if row else "" for row in rows_to_add])
         logger.info(f"✅ Successfully appended {len(rows_to_add)} rows to '{sheet_name}'.")
         return True
     except Exception as e:
@@ -303,14 +291,13 @@ def add_new_product_rows(rows_to_add: List[List[Any]], sheet_name: str = SHEET1_
 
 
 def find_row_index_by_id(sheet: gspread.Worksheet, product_id: Union[str, int], id_column_index: int = 1) -> Optional[int]:
-     """Finds the row index (1-based) for a given ID in a specific column using retry."""
+     """Finds the row index (1-based) for a given ID via the cached row index (one column read, then no API calls)."""
      if not sheet or not product_id: return None
      try:
-         # Find expects a string query
-         cell = _retry_gspread_operation(sheet.find, str(product_id), in_column=id_column_index)
-         if cell:
-              logger.debug(f"Found product_id '{product_id}' in row {cell.row}")
-              return cell.row
+         row = sheet_row_index.find_row(sheet, product_id, id_column=id_column_index, retry=_retry_gspread_operation)
+         if row:
+              logger.debug(f"Found product_id '{product_id}' in row {row}")
+              return row
          else:
               logger.debug(f"Product_id '{product_id}' not found in column {id_column_index}.")
               return None
@@ -355,6 +342,17 @@ def update_export_status_for_store(
          logger.error(f"❌ Invalid column index in STORE_COLUMN_MAP for '{target_store_value}'. Found: {column_set}")
          return False
 
+    if PIPELINE_STATE_ENABLED:
+        pipeline_state.set_state(original_product_id_str, target_store_value, status_value, cloned_gid, cloned_title)
+        if _sync_sheet_name == sheet_name:
+            # The background sync thread mirrors it to the sheet with its next batch
+            logger.info(f"✅ Recorded state '{status_value}' for Orig ID {original_product_id_str} / Store '{target_store_value}' (sheet sync pending).")
+            return True
+        # No sync loop for this sheet (callers other than export_weekly): mirror it now
+        push_pipeline_state(sheet_name)
+        logger.info(f"✅ Recorded state '{status_value}' for Orig ID {original_product_id_str} / Store '{target_store_value}' and pushed it to '{sheet_name}'.")
+        return True
+
     log_title_snip = str(cloned_title)[:50] + '...' if cloned_title else '(empty)'
     # Corrected to use status_value in the log message
     logger.info(f"Sheet Update Prep for Orig ID {original_product_id_str} / Store '{target_store_value}': "+
@@ -391,9 +389,10 @@ def update_export_status_for_store(
                 {"range": gid_range,    "values": [[str(cloned_gid or '')]]},
                 {"range": title_range,  "values": [[str(cloned_title or '')]]}
             ]
-            logger.debug(f"Attempting batch update for row {row_index} with data: {update_data}")
-            _retry_gspread_operation(sheet.batch_update, update_data, value_input_option="USER_ENTERED")
-            logger.info(f"✅ Updated Sheet Row {row_index} for Store '{target_store_value}'.")
+            logger.debug(f"Queueing buffered update for row {row_index} with data: {update_data}")
+            sheet_row_index.get_guarded_buffer(sheet, id_column_index_for_find, retry=_retry_gspread_operation).queue_many(
+                update_data, guard=original_product_id_str)
+            logger.info(f"✅ Queued Sheet Row {row_index} update for Store '{target_store_value}'.")
             return True
         else:
             logger.warning(f"⚠️ Could not find valid row index for Product ID '{original_product_id_str}' in '{sheet_name}' (Col {id_column_index_for_find}).")
@@ -413,6 +412,7 @@ def get_sheet_data_by_header(sheet_name: str = SHEET1_NAME) -> Tuple[Optional[Li
     Returns (None, None) on failure.
     """
     logger.info(f"Fetching all data (using get_all_values) with headers from sheet '{sheet_name}'...")
+    sheet_write_buffer.flush_all()  # Read-your-writes: send buffered status updates first
     sheet = _get_worksheet(sheet_name)
     if not sheet:
         logger.error(f"Cannot fetch data, failed to get worksheet '{sheet_name}'.")
@@ -421,6 +421,7 @@ def get_sheet_data_by_header(sheet_name: str = SHEET1_NAME) -> Tuple[Optional[Li
     try:
         # Fetch ALL cell values as a list of lists using retry
         all_values = _retry_gspread_operation(sheet.get_all_values)
+        sheet_snapshot.record_rows(sheet, all_values or [])  # Baseline for eliding no-op writes
 
         if not all_values:
             logger.warning(f"Sheet '{sheet_name}' appears to be empty or could not be read via get_all_values.")
@@ -504,6 +505,7 @@ def move_done_to_sheet2():
     from Sheet1 to Sheet2 and deletes them from Sheet1 using batch operations.
     """
     logger.info(f"Checking for completed rows to move from '{SHEET1_NAME}' to '{SHEET2_NAME}'...")
+    sheet_write_buffer.flush_all()  # Read-your-writes: send buffered status updates first
     sheet1 = _get_worksheet(SHEET1_NAME)
     sheet2 = _get_worksheet(SHEET2_NAME)
     if not sheet1 or not sheet2:
@@ -543,8 +545,7 @@ def move_done_to_sheet2():
         logger.info(f"Statuses triggering move to Sheet2: {statuses_to_move}")
 
         rows_to_move_data = []
-        rows_to_delete_requests = [] # Build requests for batchUpdate deleteDimension
-        sheet1_gid = sheet1.id # Get the numeric GID of Sheet1
+        rows_to_delete_indices = [] # 1-based; coalesced into range deletions by sheet_archiver
 
         # Iterate backwards through the indices to handle deletions correctly
         for idx in range(len(all_data) - 1, -1, -1):
@@ -566,29 +567,14 @@ def move_done_to_sheet2():
                 # Convert dict back to list in header order for appending
                 row_values = [row_dict.get(h, "") for h in header]
                 rows_to_move_data.append(row_values)
-                # Add a delete request (API uses 0-based index)
-                rows_to_delete_requests.append({
-                    "deleteDimension": {
-                        "range": {
-                            "sheetId": sheet1_gid,
-                            "dimension": "ROWS",
-                            "startIndex": current_sheet_row_index - 1, # 0-based start index
-                            "endIndex": current_sheet_row_index        # Exclusive end index
-                        }
-                    }
-                })
+                rows_to_delete_indices.append(current_sheet_row_index)
 
         # --- Perform Sheet Updates (if any rows marked) ---
         if rows_to_move_data:
-            # Append data to Sheet2 (reverse collected data back to original order for append)
-            logger.info(f"Appending {len(rows_to_move_data)} rows to '{SHEET2_NAME}'...")
-            _retry_gspread_operation(sheet2.append_rows, rows_to_move_data[::-1], value_input_option="USER_ENTERED", insert_data_option="INSERT_ROWS")
-
-            # Batch delete rows from Sheet1 (API requires requests sorted descending by index)
-            logger.info(f"Batch deleting {len(rows_to_delete_requests)} rows from '{SHEET1_NAME}'...")
-            sorted_delete_requests = sorted(rows_to_delete_requests, key=lambda x: x['deleteDimension']['range']['startIndex'], reverse=True)
-            delete_body = {'requests': sorted_delete_requests}
-            _retry_gspread_operation(sheet1.batch_update, delete_body)
+            # Append to Sheet2 (original order) and delete from Sheet1 in one atomic spreadsheets.batchUpdate
+            logger.info(f"Moving {len(rows_to_move_data)} rows to '{SHEET2_NAME}'...")
+            sheet_archiver.archive_rows(sheet1, sheet2, rows_to_delete_indices, rows_to_move_data[::-1],
+                                        retry=_retry_gspread_operation)
 
             logger.info(f"✅ Successfully moved and deleted {len(rows_to_move_data)} completed rows.")
         else:
@@ -605,10 +591,11 @@ def move_done_to_sheet2():
 def move_fully_done_to_sheet2():
     """
     Moves rows where ALL configured stores have a 'DONE_STORE_*' status
-    from Sheet1 to Sheet2 and deletes them from Sheet1 using worksheet.delete_rows().
+    from Sheet1 to Sheet2 and deletes them from Sheet1 in the same batchUpdate (see sheet_archiver).
     Returns True if processing completed (whether rows were moved or not), False on error.
     """
     logger.info(f"Checking for fully completed rows to move from '{SHEET1_NAME}' to '{ARCHIVE_SHEET_NAME}'...")
+    sheet_write_buffer.flush_all()  # Read-your-writes: send buffered status updates first
     sheet1 = _get_worksheet(SHEET1_NAME)
     sheet2 = _get_worksheet(ARCHIVE_SHEET_NAME)
     if not sheet1 or not sheet2:
@@ -686,29 +673,13 @@ def move_fully_done_to_sheet2():
         # --- Perform Sheet Updates ---
         if rows_to_move_data:
             logger.info(f"Moving {len(rows_to_move_data)} fully completed rows...")
-            # Append data to Sheet2 (reverse collected data back to original order)
-            logger.info(f"Appending {len(rows_to_move_data)} rows to '{SHEET2_NAME}'...")
-            _retry_gspread_operation(sheet2.append_rows, rows_to_move_data[::-1], value_input_option="USER_ENTERED", insert_data_option="INSERT_ROWS")
-
-            # --- Delete rows from Sheet1 using delete_rows() ---
-            # Indices are already collected in descending order because we iterated backwards
-            logger.info(f"Deleting {len(row_indices_to_delete)} rows from '{SHEET1_NAME}'...")
-            deleted_count = 0
-            for row_index_to_delete in row_indices_to_delete:
-                 try:
-                     logger.debug(f"Attempting to delete row {row_index_to_delete} from {SHEET1_NAME}...")
-                     # Use the correct gspread method, wrapped in retry
-                     _retry_gspread_operation(sheet1.delete_rows, row_index_to_delete)
-                     deleted_count += 1
-                     logger.debug(f"Successfully deleted row {row_index_to_delete}.")
-                     time.sleep(0.3) # Add a small delay between deletes to be kind to API
-                 except Exception as delete_err:
-                     # Log error but continue trying to delete others
-                     # Error should be caught by _retry_gspread_operation first if it's APIError/ConnError
-                     logger.error(f"Failed to delete row {row_index_to_delete} from '{SHEET1_NAME}': {delete_err}")
-                     # Depending on severity, might want to stop: return False
-
-            logger.info(f"✅ Append to {SHEET2_NAME} complete. Attempted to delete {len(row_indices_to_delete)} rows, successfully deleted {deleted_count} from '{SHEET1_NAME}'.")
+            # Append to Sheet2 (original order) and delete from Sheet1 in one atomic spreadsheets.batchUpdate
+            sheet_archiver.archive_rows(sheet1, sheet2, row_indices_to_delete, rows_to_move_data[::-1],
+                                        retry=_retry_gspread_operation)
+            if PIPELINE_STATE_ENABLED:
+                for row_values in rows_to_move_data:
+                    pipeline_state.forget(row_values[0])  # Archived: no more local state to sync
+            logger.info(f"✅ Moved {len(rows_to_move_data)} rows from '{SHEET1_NAME}' to '{ARCHIVE_SHEET_NAME}'.")
             return True # Indicate rows were processed
         else:
             logger.info(f"✅ No rows found where *all* configured stores are DONE.")
@@ -716,4 +687,114 @@ def move_fully_done_to_sheet2():
 
     except Exception as e:
         logger.exception(f"❌ Failed during move_fully_done_to_sheet2 process: {e}")
-        return False # Indicate failure
\ No newline at end of file
+        return False # Indicate failure
+
+
+# --- Pipeline State Sync (local state store <-> Sheet1) ---
+
+def push_pipeline_state(sheet_name: str = SHEET1_NAME) -> int:
+    """
+    Mirrors locally changed pipeline states to the sheet as one buffered batch update.
+    Returns the number of states written. States whose product row is not in the sheet stay pending.
+    """
+    pending = pipeline_state.pending_sync()
+    if not pending:
+        return 0
+    sheet = _get_worksheet(sheet_name)
+    if not sheet:
+        logger.error(f"Cannot push pipeline state, failed to get worksheet '{sheet_name}'.")
+        return 0
+
+    started_at = time.time()
+    queued = []
+    for state in pending:
+        column_set = STORE_COLUMN_MAP.get(state["store"])
+        if not column_set:
+            logger.warning(f"⚠️ No column mapping for store '{state['store']}', state for {state['product_id']} not synced.")
+            continue
+        row_index = sheet_row_index.queue_row_updates(sheet, state["product_id"], {
+            column_set["status"]: state["status"],
+            column_set["gid"]: state["gid"],
+            column_set["title"]: state["title"],
+        }, retry=_retry_gspread_operation)
+        if row_index:
+            queued.append(state)
+        else:
+            logger.debug(f"Product ID '{state['product_id']}' not in '{sheet_name}' yet, state sync deferred.")
+
+    if queued and sheet_row_index.get_guarded_buffer(sheet, retry=_retry_gspread_operation).flush():
+        pipeline_state.mark_synced(queued, started_at)
+        logger.info(f"📤 Synced {len(queued)} pipeline state(s) to '{sheet_name}'.")
+        return len(queued)
+    return 0
+
+
+def pull_pipeline_state(sheet_name: str = SHEET1_NAME) -> int:
+    """Reads the sheet once and merges its per-store columns (including manual edits) into the local state."""
+    sheet = _get_worksheet(sheet_name)
+    if not sheet:
+        logger.error(f"Cannot pull pipeline state, failed to get worksheet '{sheet_name}'.")
+        return 0
+    try:
+        all_values = _retry_gspread_operation(sheet.get_all_values)
+    except Exception as e:
+        logger.exception(f"❌ Failed to read '{sheet_name}' for pipeline state pull: {e}")
+        return 0
+    sheet_snapshot.record_rows(sheet, all_values)
+
+    def cell(row, col):
+        return row[col - 1].strip() if len(row) >= col else ""
+
+    rows = []
+    for row in all_values[1:]:
+        pid = cell(row, 1)
+        if not pid:
+            continue
+        for store_key, cols in STORE_COLUMN_MAP.items():
+            rows.append((pid, store_key, cell(row, cols["status"]), cell(row, cols["gid"]), cell(row, cols["title"])))
+    changed = pipeline_state.merge_from_sheet(rows)
+    logger.info(f"📥 Pulled {len(rows)} store states from '{sheet_name}' ({changed} changed locally).")
+    return changed
+
+
+def sync_pipeline_state(sheet_name: str = SHEET1_NAME) -> None:
+    """Push local changes first (so they are not mistaken for sheet edits), then pull."""
+    push_pipeline_state(sheet_name)
+    pull_pipeline_state(sheet_name)
+
+
+_sync_thread = None
+_sync_sheet_name = None  # Sheet the background loop keeps in sync (None: status writes push synchronously)
+_sync_stop = threading.Event()
+
+
+def _sync_loop(sheet_name: str) -> None:
+    last_pull = time.monotonic()
+    while not _sync_stop.wait(PIPELINE_STATE_PUSH_SECONDS):
+        try:
+            push_pipeline_state(sheet_name)
+            if time.monotonic() - last_pull >= PIPELINE_STATE_PULL_SECONDS:
+                pull_pipeline_state(sheet_name)
+                last_pull = time.monotonic()
+        except Exception as e:
+            logger.error(f"❌ Pipeline state sync failed: {e}")
+
+
+def start_pipeline_state_sync(sheet_name: str = SHEET1_NAME) -> None:
+    """Starts the background push/pull loop (once per process) and a final push at exit."""
+    global _sync_thread, _sync_sheet_name
+    if not PIPELINE_STATE_ENABLED or _sync_thread is not None:
+        return
+    _sync_sheet_name = sheet_name
+    _sync_thread = threading.Thread(target=_sync_loop, args=(sheet_name,), name="pipeline-state-sync", daemon=True)
+    _sync_thread.start()
+    atexit.register(_stop_pipeline_state_sync, sheet_name)
+
+
+def _stop_pipeline_state_sync(sheet_name: str) -> None:
+    global _sync_sheet_name
+    _sync_stop.set()
+    _sync_sheet_name = None
+    if pipeline_state.pending_sync(limit=1):
+        logger.info("📤 Pushing pending pipeline state before exit...")
+        push_pipeline_state(sheet_name)
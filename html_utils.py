@@ -0,0 +1,295 @@
+# html_utils.py
+
+import os
+import re
+import html
+import logging
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# CONFIGURATION
+# ---------------------------------- #
+# "auto" picks the fastest installed parser: selectolax (text extraction only), lxml, then
+# BeautifulSoup's html.parser. Set HTML_BACKEND=html.parser to force the pure-Python path.
+HTML_BACKEND = os.getenv("HTML_BACKEND", "auto").lower()
+
+SKIP_TEXT_TAGS = ("script", "style")
+KEEP_DIV_TAGS = ("img", "ul", "p", "h1", "h2", "h3")  # A div holding any of these is never "empty"
+HTML_HINT_RE = re.compile(r"<[a-zA-Z/!][^>]*>")
+
+try:
+    import lxml.html as lxml_html
+except ImportError:
+    lxml_html = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    from bs4 import BeautifulSoup, Comment, Tag
+except ImportError:
+    BeautifulSoup = None
+
+
+def _pick(candidates):
+    available = {"selectolax": LexborHTMLParser, "lxml": lxml_html, "html.parser": BeautifulSoup}
+    if HTML_BACKEND in candidates:
+        candidates = [HTML_BACKEND]
+    for name in candidates:
+        if available.get(name) is not None:
+            return name
+    raise ImportError(f"No HTML parser available for backend '{HTML_BACKEND}' (install lxml or beautifulsoup4)")
+
+
+READ_BACKEND = _pick(["selectolax", "lxml", "html.parser"])   # strip_text / extract_text_nodes
+WRITE_BACKEND = _pick(["lxml", "html.parser"])                # everything that re-serializes HTML
+logger.debug(f"HTML backends: read={READ_BACKEND}, write={WRITE_BACKEND}")
+
+
+# ---------------------------------- #
+# LXML HELPERS
+# ---------------------------------- #
+def _lxml_parse(markup):
+    return lxml_html.fragment_fromstring(markup, create_parent="div")
+
+
+def _lxml_serialize(root):
+    return html.escape(root.text or "", quote=False) + "".join(
+        lxml_html.tostring(child, encoding="unicode") for child in root
+    )
+
+
+def _lxml_text_slots(el):
+    """(element, attribute) pairs holding visible text, in document order."""
+    if isinstance(el.tag, str) and el.tag not in SKIP_TEXT_TAGS:
+        if el.text:
+            yield el, "text"
+        for child in el:
+            yield from _lxml_text_slots(child)
+            if child.tail:
+                yield child, "tail"
+
+
+def _lxml_drop_empty_divs(root):
+    empty = [div for div in root.iter("div")
+             if div is not root and not div.text_content().strip()
+             and not any(True for _ in div.iter(*KEEP_DIV_TAGS))]
+    for div in empty:
+        div.drop_tree()
+    return len(empty)
+
+
+def _lxml_own_text(el):
+    return " ".join(getattr(node, attr) for node, attr in _lxml_text_slots(el))
+
+
+def _lxml_blocks(el, blocks, heading_tags, block_tags):
+    buffer = [el.text or ""]
+    for child in el:
+        if isinstance(child.tag, str) and child.tag not in SKIP_TEXT_TAGS:
+            _add_block(child.tag.lower(), child, _lxml_own_text, _lxml_blocks, buffer, blocks, heading_tags, block_tags)
+        buffer.append(child.tail or "")
+    _flush_block(buffer, blocks)
+
+
+# ---------------------------------- #
+# HTML.PARSER (BeautifulSoup) HELPERS
+# ---------------------------------- #
+def _soup_text_nodes(soup):
+    return [node for node in soup.find_all(string=True)
+            if not isinstance(node, Comment) and node.parent.name not in SKIP_TEXT_TAGS]
+
+
+def _soup_drop_empty_divs(soup):
+    removed = 0
+    for div in soup.find_all("div"):
+        if not div.get_text().strip() and not div.find(list(KEEP_DIV_TAGS)):
+            div.decompose()
+            removed += 1
+    return removed
+
+
+def _soup_own_text(tag):
+    return " ".join(str(node) for node in _soup_text_nodes(tag))
+
+
+def _soup_blocks(tag, blocks, heading_tags, block_tags):
+    buffer = []
+    for child in tag.children:
+        if isinstance(child, Tag):
+            if child.name not in SKIP_TEXT_TAGS:
+                _add_block(child.name.lower(), child, _soup_own_text, _soup_blocks, buffer, blocks, heading_tags, block_tags)
+        elif not isinstance(child, Comment):
+            buffer.append(str(child))
+    _flush_block(buffer, blocks)
+
+
+# ---------------------------------- #
+# SHARED HELPERS
+# ---------------------------------- #
+def _flush_block(buffer, blocks):
+    text = "".join(buffer)
+    if text.strip():
+        blocks.append(("text", text))
+    buffer.clear()
+
+
+def _add_block(name, el, own_text, walk, buffer, blocks, heading_tags, block_tags):
+    """One child of text_blocks' walk: headings/list items/blocks end the current line, inline tags extend it."""
+    if name in heading_tags or name == "li":
+        _flush_block(buffer, blocks)
+        text = own_text(el)
+        if text.strip():
+            blocks.append(("heading" if name in heading_tags else "item", text))
+    elif name in block_tags:
+        _flush_block(buffer, blocks)
+        walk(el, blocks, heading_tags, block_tags)
+    else:
+        buffer.append(own_text(el))
+
+
+def _replace_keeping_space(value, replace):
+    stripped = value.strip()
+    if not stripped:
+        return None
+    new_value = replace(stripped)
+    if new_value is None:
+        return None
+    return value[:len(value) - len(value.lstrip())] + new_value + value[len(value.rstrip()):]
+
+
+# ---------------------------------- #
+# PUBLIC API
+# ---------------------------------- #
+def strip_text(markup, separator=" ", strip=True):
+    """Visible text of an HTML string (script/style skipped), text nodes joined by separator."""
+    if not markup:
+        return ""
+    if not HTML_HINT_RE.search(markup):
+        return html.unescape(markup).strip() if strip else html.unescape(markup)
+    if READ_BACKEND == "selectolax":
+        tree = LexborHTMLParser(markup)
+        tree.strip_tags(list(SKIP_TEXT_TAGS))
+        parts = [node.text(deep=False) for node in (tree.body or tree.root).traverse(include_text=True) if node.tag == "-text"]
+    elif READ_BACKEND == "lxml":
+        root = _lxml_parse(markup)
+        parts = [getattr(el, attr) for el, attr in _lxml_text_slots(root)]
+    else:
+        parts = [str(node) for node in _soup_text_nodes(BeautifulSoup(markup, "html.parser"))]
+    if strip:
+        parts = [part.strip() for part in parts if part.strip()]
+    return separator.join(parts)
+
+
+def extract_text_nodes(markup):
+    """Non-blank text nodes in document order (what replace_text_nodes would hand to its callback)."""
+    return [part for part in strip_text(markup, separator="\x00", strip=False).split("\x00") if part.strip()]
+
+
+def text_blocks(markup, heading_tags, block_tags, remove_tags=()):
+    """
+    Splits HTML into ("heading" | "item" | "text", raw_text) blocks in document order.
+
+    Headings and <li>s become one block each, block_tags (p, div, td, ...) start a new
+    "text" block and their children are walked; inline tags stay in the current block.
+    remove_tags are dropped with their content, as are script/style and comments.
+    """
+    if not markup:
+        return []
+    blocks = []
+    if WRITE_BACKEND == "lxml":
+        root = _lxml_parse(markup)
+        for tag in remove_tags:
+            for el in [el for el in root.iter(tag) if el is not root]:
+                el.drop_tree()
+        _lxml_blocks(root, blocks, set(heading_tags), set(block_tags))
+        return blocks
+
+    soup = BeautifulSoup(markup, "html.parser")
+    for tag in remove_tags:
+        for el in soup.find_all(tag):
+            el.decompose()
+    _soup_blocks(soup, blocks, set(heading_tags), set(block_tags))
+    return blocks
+
+
+def replace_text_nodes(markup, replace, drop_empty_divs=False, remove_tags=()):
+    """
+    Rewrites every non-blank text node with replace(text) and returns the new HTML.
+
+    Args:
+        replace: callable taking the stripped node text; returning None keeps the node unchanged.
+        drop_empty_divs: remove <div>s without text, images, lists, paragraphs or headings.
+        remove_tags: tags removed entirely (e.g. ("img",)).
+    """
+    if not markup:
+        return markup
+    if WRITE_BACKEND == "lxml":
+        root = _lxml_parse(markup)
+        for tag in remove_tags:
+            for el in [el for el in root.iter(tag) if el is not root]:
+                el.drop_tree()
+        if drop_empty_divs:
+            logger.debug(f"🧼 Removed {_lxml_drop_empty_divs(root)} empty <div> elements.")
+        for el, attr in list(_lxml_text_slots(root)):
+            new_value = _replace_keeping_space(getattr(el, attr), replace)
+            if new_value is not None:
+                setattr(el, attr, new_value)
+        return _lxml_serialize(root)
+
+    soup = BeautifulSoup(markup, "html.parser")
+    for tag in remove_tags:
+        for el in soup.find_all(tag):
+            el.decompose()
+    if drop_empty_divs:
+        logger.debug(f"🧼 Removed {_soup_drop_empty_divs(soup)} empty <div> elements.")
+    for node in _soup_text_nodes(soup):
+        new_value = _replace_keeping_space(str(node), replace)
+        if new_value is not None:
+            node.replace_with(new_value)
+    return str(soup)
+
+
+def sanitize(markup, remove_tags=()):
+    """Parses and re-serializes HTML: closes unbalanced tags, normalizes quoting, drops remove_tags."""
+    if not markup:
+        return markup or ""
+    return replace_text_nodes(markup, lambda text: None, remove_tags=remove_tags)
+
+
+def insert_around_paragraphs(markup, after_first=None, before_last=None):
+    """
+    Inserts HTML fragments after the first <p> and before the last <p>.
+    before_last is appended at the end when there is no <p>; after_first is then skipped.
+    """
+    if not after_first and not before_last:
+        return markup
+    if WRITE_BACKEND == "lxml":
+        root = _lxml_parse(markup or "")
+        paragraphs = root.findall(".//p")
+        if paragraphs and after_first:
+            paragraphs[0].addnext(lxml_html.fragment_fromstring(after_first))
+        if before_last:
+            block = lxml_html.fragment_fromstring(before_last)
+            if paragraphs:
+                paragraphs[-1].addprevious(block)
+            else:
+                root.append(block)
+        return _lxml_serialize(root)
+
+    soup = BeautifulSoup(markup or "", "html.parser")
+    paragraphs = soup.find_all("p")
+    if paragraphs and after_first:
+        paragraphs[0].insert_after(BeautifulSoup(after_first, "html.parser"))
+    if before_last:
+        block = BeautifulSoup(before_last, "html.parser")
+        if paragraphs:
+            paragraphs[-1].insert_before(block)
+        else:
+            soup.append(block)
+    return str(soup)
@@ -0,0 +1,280 @@
+# llm_batch.py
+
+import os
+import json
+import time
+import uuid
+import shutil
+import logging
+from typing import List, Dict, Any, Optional
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# CONFIGURATION
+# ---------------------------------- #
+LLM_BATCH_PROVIDER = os.getenv("LLM_BATCH_PROVIDER", "auto")       # "auto", "openai" or "local"
+LLM_BATCH_DIR = os.getenv("LLM_BATCH_DIR", "batch_jobs")            # JSONL files + local provider jobs
+LLM_BATCH_STATE_FILE = os.getenv("LLM_BATCH_STATE_FILE", os.path.join(LLM_BATCH_DIR, "pending_batch.json"))
+LLM_BATCH_COMPLETION_WINDOW = os.getenv("LLM_BATCH_COMPLETION_WINDOW", "24h")
+
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+
+
+def build_request(custom_id: str, model: str, messages: List[Dict[str, str]], temperature=None, max_tokens=None) -> Dict[str, Any]:
+    """One line of a chat-completions batch file (OpenAI batch format)."""
+    body = {"model": model, "messages": messages}
+    if temperature is not None:
+        body["temperature"] = temperature
+    if max_tokens is not None:
+        body["max_tokens"] = max_tokens
+    return {"custom_id": custom_id, "method": "POST", "url": CHAT_COMPLETIONS_URL, "body": body}
+
+
+def write_batch_file(requests_list: List[Dict[str, Any]], path: str = None) -> str:
+    """Writes requests as JSONL and returns the file path."""
+    os.makedirs(LLM_BATCH_DIR, exist_ok=True)
+    path = path or os.path.join(LLM_BATCH_DIR, f"batch_{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for req in requests_list:
+            f.write(json.dumps(req, ensure_ascii=False) + "\n")
+    logger.info(f"📋 Wrote {len(requests_list)} batch requests to {path}")
+    return path
+
+
+def _parse_output_lines(lines) -> Dict[str, Optional[str]]:
+    """Maps custom_id -> completion text (None for failed lines)."""
+    results = {}
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            response = record.get("response") or {}
+            body = response.get("body") or {}
+            if record.get("error") or response.get("status_code", 200) != 200:
+                logger.warning(f"⚠️ Batch item {record.get('custom_id')} failed: {record.get('error') or body}")
+                results[record.get("custom_id")] = None
+                continue
+            choice = body["choices"][0]
+            if choice.get("finish_reason") == "length":
+                logger.warning(f"⚠️ Batch item {record['custom_id']} hit max_tokens; discarding the truncated output.")
+                results[record["custom_id"]] = None
+                continue
+            results[record["custom_id"]] = choice["message"]["content"].strip()
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            logger.warning(f"⚠️ Could not parse batch output line: {e}")
+    return results
+
+
+# ---------------------------------- #
+# PROVIDERS
+# ---------------------------------- #
+class OpenAIBatchProvider:
+    """OpenAI Batch API: upload JSONL, create batch, poll, download output file."""
+
+    name = "openai"
+    llm_provider = "openai"  # Which model namespace the requests must use
+
+    def __init__(self):
+        from openai import OpenAI
+        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    def submit(self, jsonl_path: str) -> str:
+        with open(jsonl_path, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=CHAT_COMPLETIONS_URL,
+            completion_window=LLM_BATCH_COMPLETION_WINDOW,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        """Returns 'completed', 'failed' or 'in_progress'."""
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status == "completed":
+            return "completed"
+        if batch.status in ("failed", "expired", "cancelled"):
+            return "failed"
+        return "in_progress"
+
+    def results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        batch = self.client.batches.retrieve(batch_id)
+        if not batch.output_file_id:
+            return {}
+        content = self.client.files.content(batch.output_file_id).text
+        return _parse_output_lines(content.splitlines())
+
+
+class LocalFileBatchProvider:
+    """
+    File-based stand-in for a batch API, for testing and for providers without one.
+
+    submit() copies the JSONL into LLM_BATCH_DIR/<batch_id>/input.jsonl. The job is complete
+    once output.jsonl exists next to it. That file can be written by hand/tests, or by
+    the responder when status() is polled. The responder takes a request body and returns
+    the completion text, or (text, finish_reason). By default each request runs synchronously
+    through llm_client.
+    """
+
+    name = "local"
+
+    def __init__(self, responder=None, execute_with: str = "deepseek"):
+        self.responder = responder
+        self.llm_provider = execute_with
+
+    def _job_dir(self, batch_id):
+        return os.path.join(LLM_BATCH_DIR, batch_id)
+
+    def submit(self, jsonl_path: str) -> str:
+        batch_id = f"local_{uuid.uuid4().hex[:12]}"
+        os.makedirs(self._job_dir(batch_id), exist_ok=True)
+        shutil.copyfile(jsonl_path, os.path.join(self._job_dir(batch_id), "input.jsonl"))
+        return batch_id
+
+    def _default_responder(self, body):
+        import llm_client
+        response = llm_client.chat_completion(self.llm_provider, **body)
+        return response.choices[0].message.content, response.choices[0].finish_reason
+
+    def _run(self, batch_id):
+        responder = self.responder or self._default_responder
+        input_path = os.path.join(self._job_dir(batch_id), "input.jsonl")
+        output_lines = []
+        with open(input_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                req = json.loads(line)
+                try:
+                    result = responder(req["body"])
+                    text, finish_reason = result if isinstance(result, tuple) else (result, "stop")
+                    record = {"custom_id": req["custom_id"], "error": None,
+                              "response": {"status_code": 200, "body": {"choices": [
+                                  {"message": {"content": text}, "finish_reason": finish_reason}]}}}
+                except Exception as e:
+                    record = {"custom_id": req["custom_id"], "error": {"message": str(e)}, "response": None}
+                output_lines.append(json.dumps(record, ensure_ascii=False))
+        with open(os.path.join(self._job_dir(batch_id), "output.jsonl"), "w", encoding="utf-8") as f:
+            f.write("\n".join(output_lines) + "\n")
+
+    def status(self, batch_id: str) -> str:
+        if not os.path.exists(os.path.join(self._job_dir(batch_id), "input.jsonl")):
+            return "failed"
+        if not os.path.exists(os.path.join(self._job_dir(batch_id), "output.jsonl")):
+            self._run(batch_id)
+        return "completed"
+
+    def results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        with open(os.path.join(self._job_dir(batch_id), "output.jsonl"), encoding="utf-8") as f:
+            return _parse_output_lines(f)
+
+
+def get_batch_provider(name: str = None, llm_provider: str = "openai"):
+    """
+    Batch provider for requests written for llm_provider's models ("openai" or "deepseek").
+    The OpenAI Batch API only serves OpenAI models, so anything else runs through the local provider.
+    """
+    name = (name or LLM_BATCH_PROVIDER).lower()
+    if name == "auto":
+        name = "openai" if llm_provider == "openai" else "local"
+    if name == "openai" and llm_provider != "openai":
+        logger.warning(f"⚠️ OpenAI Batch API cannot run {llm_provider} requests; using the local batch provider.")
+        name = "local"
+    if name == "openai":
+        return OpenAIBatchProvider()
+    if name == "local":
+        return LocalFileBatchProvider(execute_with=llm_provider)
+    raise ValueError(f"Unknown batch provider: '{name}' (expected 'auto', 'openai' or 'local')")
+
+
+# ---------------------------------- #
+# PENDING BATCH STATE
+# ---------------------------------- #
+def load_pending_batch() -> Optional[Dict[str, Any]]:
+    if not os.path.exists(LLM_BATCH_STATE_FILE):
+        return None
+    try:
+        with open(LLM_BATCH_STATE_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"❌ Could not read batch state {LLM_BATCH_STATE_FILE}: {e}")
+        return None
+
+
+def _save_pending_batch(state: Dict[str, Any]):
+    os.makedirs(os.path.dirname(LLM_BATCH_STATE_FILE) or ".", exist_ok=True)
+    tmp_path = LLM_BATCH_STATE_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, LLM_BATCH_STATE_FILE)
+
+
+def clear_pending_batch():
+    if os.path.exists(LLM_BATCH_STATE_FILE):
+        os.remove(LLM_BATCH_STATE_FILE)
+
+
+def submit_batch(requests_list: List[Dict[str, Any]], items: Dict[str, Dict[str, Any]], provider=None) -> Optional[str]:
+    """
+    Writes the JSONL, submits it and persists the batch id plus per-item metadata
+    (custom_id -> e.g. {"pid", "store", "kind"}) so a later run can collect it.
+    """
+    if not requests_list:
+        logger.info("No requests to batch.")
+        return None
+    provider = provider or get_batch_provider()
+    jsonl_path = write_batch_file(requests_list)
+    batch_id = provider.submit(jsonl_path)
+    _save_pending_batch({
+        "batch_id": batch_id,
+        "provider": provider.name,
+        "llm_provider": provider.llm_provider,
+        "submitted_at": time.time(),
+        "jsonl_path": jsonl_path,
+        "items": items,
+    })
+    logger.info(f"✅ Submitted batch {batch_id} via {provider.name} ({len(requests_list)} requests).")
+    return batch_id
+
+
+def collect_pending_batch(provider=None, validate=None) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Collects the persisted batch if it has finished. Outputs failing validate(text) (e.g. a
+    structured description missing sections) are returned as None, like failed items, so
+    the caller translates them synchronously instead.
+
+    Returns:
+        None if there is no pending batch or it is still running; otherwise
+        {custom_id: {"meta": {...}, "output": text_or_None}}. The pending state is kept so an
+        interrupted run can collect the same (already paid) batch again; the caller clears it
+        with clear_pending_batch() once every output has been used.
+    """
+    state = load_pending_batch()
+    if not state:
+        return None
+    provider = provider or get_batch_provider(state.get("provider"), state.get("llm_provider", "openai"))
+    status = provider.status(state["batch_id"])
+    if status == "in_progress":
+        logger.info(f"⏳ Batch {state['batch_id']} still in progress.")
+        return None
+
+    outputs = provider.results(state["batch_id"]) if status == "completed" else {}
+    if status == "failed":
+        logger.error(f"❌ Batch {state['batch_id']} failed; items will be translated synchronously.")
+    if validate:
+        for custom_id, output in outputs.items():
+            if output and not validate(output):
+                logger.warning(f"⚠️ Batch item {custom_id} is incomplete; it will be translated synchronously.")
+                outputs[custom_id] = None
+    collected = {
+        custom_id: {"meta": meta, "output": outputs.get(custom_id)}
+        for custom_id, meta in state.get("items", {}).items()
+    }
+    ok = sum(1 for item in collected.values() if item["output"])
+    logger.info(f"✅ Collected batch {state['batch_id']}: {ok}/{len(collected)} outputs.")
+    return collected
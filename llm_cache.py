@@ -0,0 +1,121 @@
+# llm_cache.py
+
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# CONFIGURATION
+# ---------------------------------- #
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "llm_cache.db")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 3600)))    # Seconds; default 30 days
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+LLM_CACHE_DISABLED = os.getenv("LLM_CACHE_DISABLED", "false").lower() in ("1", "true", "yes")
+
+_conn = None
+_lock = threading.Lock()
+_writes_since_prune = 0
+PRUNE_EVERY = 100  # Enforce TTL/size bounds every N writes
+
+stats = {"hits": 0, "misses": 0, "writes": 0}
+
+
+def _get_conn():
+    """Lazily opens the cache database (shared by all threads, guarded by _lock)."""
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(LLM_CACHE_DB, check_same_thread=False)
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS completions (
+                cache_key TEXT PRIMARY KEY,
+                output TEXT,
+                created_at REAL,
+                last_access REAL
+            )
+        """)
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_last_access ON completions(last_access)")
+        _conn.commit()
+        logger.info(f"✅ LLM completion cache opened: {LLM_CACHE_DB}")
+    return _conn
+
+
+def make_key(model, system_prompt, user_content, temperature=None, required_name=None) -> str:
+    """Content-addressed key: sha256 of (model, system prompt, user content, temperature, required_name)."""
+    payload = json.dumps([model, system_prompt or "", user_content or "", temperature, required_name], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get(cache_key: str):
+    """Returns the cached completion text, or None on miss/expiry/disabled."""
+    if LLM_CACHE_DISABLED:
+        return None
+    now = time.time()
+    try:
+        with _lock:
+            conn = _get_conn()
+            row = conn.execute("SELECT output, created_at FROM completions WHERE cache_key = ?", (cache_key,)).fetchone()
+            if row and now - row[1] <= LLM_CACHE_TTL:
+                conn.execute("UPDATE completions SET last_access = ? WHERE cache_key = ?", (now, cache_key))
+                conn.commit()
+                stats["hits"] += 1
+                logger.info(f"✅ LLM cache hit {cache_key[:12]}.")
+                return row[0]
+            if row:
+                conn.execute("DELETE FROM completions WHERE cache_key = ?", (cache_key,))
+                conn.commit()
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ LLM cache read failed: {e}")
+    stats["misses"] += 1
+    return None
+
+
+def put(cache_key: str, output: str):
+    """Stores a completion. Empty outputs are never cached."""
+    global _writes_since_prune
+    if LLM_CACHE_DISABLED or not output:
+        return
+    now = time.time()
+    try:
+        with _lock:
+            conn = _get_conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO completions (cache_key, output, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (cache_key, output, now, now),
+            )
+            conn.commit()
+            stats["writes"] += 1
+            _writes_since_prune += 1
+            if _writes_since_prune >= PRUNE_EVERY:
+                _writes_since_prune = 0
+                _prune(conn, now)
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ LLM cache write failed: {e}")
+
+
+def _prune(conn, now):
+    """Drops expired entries, then least-recently-used entries beyond LLM_CACHE_MAX_ENTRIES."""
+    conn.execute("DELETE FROM completions WHERE created_at < ?", (now - LLM_CACHE_TTL,))
+    conn.execute(
+        """DELETE FROM completions WHERE cache_key IN (
+               SELECT cache_key FROM completions ORDER BY last_access DESC LIMIT -1 OFFSET ?
+           )""",
+        (LLM_CACHE_MAX_ENTRIES,),
+    )
+    conn.commit()
+
+
+def clear():
+    """Removes every cached completion."""
+    with _lock:
+        conn = _get_conn()
+        conn.execute("DELETE FROM completions")
+        conn.commit()
+    logger.info("🧹 LLM completion cache cleared.")
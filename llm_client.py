@@ -0,0 +1,313 @@
+# llm_client.py
+
+import os
+import json
+import hashlib
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from dotenv import load_dotenv
+load_dotenv()
+from openai import AsyncOpenAI, RateLimitError, InternalServerError, APIConnectionError
+from llm_stream_parser import SectionStreamParser, MalformedOutputError, parse_sections
+from prompt_compaction import estimate_tokens
+import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# PROVIDER CONFIGURATION
+# ---------------------------------- #
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
+
+PROVIDERS = {
+    "openai": {
+        "api_key": OPENAI_API_KEY,
+        "base_url": None,
+        "max_concurrency": int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")),
+    },
+    "deepseek": {
+        "api_key": DEEPSEEK_API_KEY,
+        "base_url": "https://api.deepseek.com/v1",
+        "max_concurrency": int(os.getenv("DEEPSEEK_MAX_CONCURRENCY", "8")),
+    },
+}
+
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "120"))  # Seconds per completion
+# Seconds for a whole call: concurrency queue, rate-limiter waits, retries and backoff
+LLM_CALL_DEADLINE = float(os.getenv("LLM_CALL_DEADLINE", str(LLM_REQUEST_TIMEOUT * 3)))
+LLM_STREAMING = os.getenv("LLM_STREAMING", "false").lower() in ("1", "true", "yes")  # Default for structured calls
+LLM_STREAM_MAX_RETRIES = int(os.getenv("LLM_STREAM_MAX_RETRIES", "1"))  # Retries after a malformed stream
+
+# --- Shared state (all of it lives on the background event loop) ---
+_clients = {}       # provider -> AsyncOpenAI
+_semaphores = {}    # provider -> asyncio.Semaphore
+_inflight = {}      # request key -> asyncio.Future (singleflight map)
+
+_loop = None
+_loop_thread = None
+_loop_lock = threading.Lock()
+
+
+def is_provider_available(provider: str) -> bool:
+    """Returns True if an API key is configured for the given provider."""
+    config = PROVIDERS.get(provider)
+    return bool(config and config.get("api_key"))
+
+
+# ---------------------------------- #
+# BACKGROUND EVENT LOOP
+# ---------------------------------- #
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Lazily starts a daemon thread running the event loop used for all LLM calls."""
+    global _loop, _loop_thread
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="llm-client-loop", daemon=True)
+                thread.start()
+                _loop_thread = thread
+                _loop = loop
+                logger.info("✅ LLM client event loop started.")
+    return _loop
+
+
+def _get_client(provider: str) -> AsyncOpenAI:
+    """Returns the AsyncOpenAI client for a provider (created on the loop thread on first use)."""
+    client = _clients.get(provider)
+    if client is None:
+        config = PROVIDERS.get(provider)
+        if not config:
+            raise ValueError(f"Unknown LLM provider: '{provider}'")
+        if not config.get("api_key"):
+            raise RuntimeError(f"No API key configured for provider '{provider}'")
+        # Retries are handled in _send_with_limits so they go through the shared rate limiter
+        client = AsyncOpenAI(api_key=config["api_key"], base_url=config["base_url"], timeout=LLM_REQUEST_TIMEOUT, max_retries=0)
+        _clients[provider] = client
+        logger.info(f"✅ Async {provider} client initialized.")
+    return client
+
+
+def _get_semaphore(provider: str) -> asyncio.Semaphore:
+    semaphore = _semaphores.get(provider)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(PROVIDERS[provider]["max_concurrency"])
+        _semaphores[provider] = semaphore
+    return semaphore
+
+
+def request_key(provider: str, params: dict) -> str:
+    """Stable hash of provider + model + messages + sampling params."""
+    payload = json.dumps({"provider": provider, **params}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ---------------------------------- #
+# ASYNC API
+# ---------------------------------- #
+def _estimate_request_tokens(params: dict) -> int:
+    """Prompt tokens (local estimate) plus the completion budget, for the TPM bucket."""
+    prompt = "".join(str(m.get("content", "")) for m in params.get("messages", []))
+    return estimate_tokens(prompt) + int(params.get("max_tokens") or 0)
+
+
+async def _send_with_limits(provider: str, params: dict):
+    """
+    Sends one request through the provider's rate limiter. Rate-limit headers are applied
+    to the limiter, and 429s/transient errors are retried with jittered backoff.
+    """
+    client = _get_client(provider)
+    limiter = rate_limiter.get_limiter(provider)
+    estimated_tokens = _estimate_request_tokens(params)
+
+    for attempt in range(rate_limiter.RATE_LIMIT_MAX_RETRIES + 1):
+        await rate_limiter.aacquire(provider, estimated_tokens)
+        try:
+            raw = await asyncio.wait_for(
+                client.chat.completions.with_raw_response.create(**params), timeout=LLM_REQUEST_TIMEOUT
+            )
+        except RateLimitError as e:
+            if attempt >= rate_limiter.RATE_LIMIT_MAX_RETRIES:
+                raise
+            retry_after = e.response.headers.get("retry-after") if e.response is not None else None
+            limiter.observe_headers(e.response.headers if e.response is not None else None)
+            await asyncio.sleep(rate_limiter.register_429(provider, attempt, retry_after))
+            continue
+        except (InternalServerError, APIConnectionError) as e:
+            if attempt >= rate_limiter.RATE_LIMIT_MAX_RETRIES:
+                raise
+            delay = rate_limiter.backoff_delay(attempt)
+            logger.warning(f"🔁 {provider} transient error ({e}), retrying in {delay:.1f}s.")
+            await asyncio.sleep(delay)
+            continue
+
+        limiter.observe_headers(raw.headers)
+        response = raw.parse()
+        usage = getattr(response, "usage", None)
+        if usage is not None and getattr(usage, "total_tokens", None):
+            limiter.refund_tokens(estimated_tokens - usage.total_tokens)
+        return response
+
+
+async def _create_completion(provider: str, params: dict):
+    async def _limited():
+        async with _get_semaphore(provider):
+            return await _send_with_limits(provider, params)
+
+    # One deadline for queueing + every attempt, so nothing keeps running after the caller gave up
+    return await asyncio.wait_for(_limited(), timeout=LLM_CALL_DEADLINE)
+
+
+async def achat_completion(provider: str, **params):
+    """
+    Sends a chat completion request with bounded per-provider concurrency.
+    Identical requests that are already in flight share a single network call.
+
+    Args:
+        provider (str): "openai" or "deepseek".
+        **params: Keyword arguments for chat.completions.create (model, messages, ...).
+
+    Returns:
+        The ChatCompletion response object.
+    """
+    key = request_key(provider, params)
+    future = _inflight.get(key)
+    if future is not None:
+        logger.debug(f"🔁 Joining in-flight {provider} request {key[:12]}.")
+        return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        response = await _create_completion(provider, params)
+        future.set_result(response)
+        return response
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # Mark retrieved so an unawaited future does not warn
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+
+async def astream_structured_completion(provider: str, on_section=None, on_finish=None, **params) -> str:
+    """
+    Streams a structured description completion through SectionStreamParser.
+
+    Sections are reported via on_section(label, text) as they complete. The stream is
+    closed as soon as all sections are present, and a MalformedOutputError is raised as
+    soon as the output clearly does not follow the format. on_finish(finish_reason) gets
+    the provider's finish reason ("stop" when closed early with every section received).
+
+    Returns:
+        str: The generated text received so far (all sections on success).
+    """
+    parser = SectionStreamParser(on_section=on_section)
+    params = {**params, "stream": True}
+    finish_reason = None
+
+    async def _consume(stream):
+        nonlocal finish_reason
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            finish_reason = getattr(chunk.choices[0], "finish_reason", None) or finish_reason
+            parser.feed(chunk.choices[0].delta.content or "")
+            if parser.is_malformed:
+                raise MalformedOutputError(parser.malformed_reason)
+            if parser.is_complete:
+                logger.info(f"✅ All sections received from {provider} stream, closing early.")
+                finish_reason = finish_reason or "stop"
+                break
+
+    async def _limited():
+        async with _get_semaphore(provider):
+            stream = await _send_with_limits(provider, params)
+            try:
+                await asyncio.wait_for(_consume(stream), timeout=LLM_REQUEST_TIMEOUT)
+            finally:
+                await stream.close()
+
+    await asyncio.wait_for(_limited(), timeout=LLM_CALL_DEADLINE)
+
+    parser.finish()
+    if on_finish:
+        on_finish(finish_reason)
+    return parser.buffer.strip()
+
+
+# ---------------------------------- #
+# SYNC WRAPPERS
+# ---------------------------------- #
+def _wait(future):
+    """Result of a coroutine future; cancels it (freeing its semaphore slot) if the caller times out."""
+    try:
+        return future.result(timeout=LLM_CALL_DEADLINE + 5)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
+
+def chat_completion(provider: str, **params):
+    """Blocking wrapper around achat_completion for Flask routes and scripts."""
+    future = asyncio.run_coroutine_threadsafe(achat_completion(provider, **params), _get_loop())
+    return _wait(future)
+
+
+def stream_structured_completion(provider: str, on_section=None, on_finish=None, **params) -> str:
+    """
+    Blocking wrapper around astream_structured_completion.
+    Retries up to LLM_STREAM_MAX_RETRIES times when the stream is malformed, then falls back
+    to one non-streamed completion and returns its full output (sections and the finish
+    reason are still reported).
+    """
+    for attempt in range(LLM_STREAM_MAX_RETRIES + 1):
+        future = asyncio.run_coroutine_threadsafe(
+            astream_structured_completion(provider, on_section=on_section, on_finish=on_finish, **params), _get_loop()
+        )
+        try:
+            return _wait(future)
+        except MalformedOutputError as e:
+            logger.warning(f"🔁 Malformed {provider} stream ({e}), attempt {attempt + 1}/{LLM_STREAM_MAX_RETRIES + 1}.")
+            if attempt >= LLM_STREAM_MAX_RETRIES:
+                break
+
+    logger.warning(f"⚠️ {provider} stream still malformed, using a non-streamed completion.")
+    response = chat_completion(provider, **params)
+    output = (response.choices[0].message.content or "").strip()
+    if on_section:
+        parse_sections(output, on_section=on_section)
+    if on_finish:
+        on_finish(response.choices[0].finish_reason)
+    return output
+
+
+def chat_completions_many(requests_list):
+    """
+    Runs several completions concurrently and returns results in input order.
+
+    Args:
+        requests_list (list): List of (provider, params_dict) tuples.
+
+    Returns:
+        list: Response objects, or the Exception raised for that request.
+    """
+    loop = _get_loop()
+    futures = [
+        asyncio.run_coroutine_threadsafe(achat_completion(provider, **params), loop)
+        for provider, params in requests_list
+    ]
+    results = []
+    for future in futures:
+        try:
+            results.append(_wait(future))
+        except Exception as e:
+            logger.error(f"❌ LLM request failed in batch: {e}")
+            results.append(e)
+    return results
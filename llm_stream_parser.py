@@ -0,0 +1,135 @@
+# llm_stream_parser.py
+
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# STRUCTURED SECTION LABELS
+# ---------------------------------- #
+# Same English labels the chatgpt/deepseek description prompts ask for.
+SECTION_LABELS = ["Product Title", "Short Introduction", "Product Advantages", "Call to Action"]
+
+# Accepted spellings per label, including the localized ones the models write when answering
+# "strictly in the target language" (same set post_processing_engine.SECTION_LABEL_RE accepts).
+LABEL_PATTERNS = {
+    "Product Title": r"Product[ \t]+Title|Produkt[- \t]?Titel|Title",
+    "Short Introduction": r"Short[ \t]+Introduction|Kurze[ \t]+Einführung",
+    "Product Advantages": r"Product[ \t]+Advantages|Produktvorteile",
+    "Call to Action": r"Call[ \t]+to[ \t]+Action|Handlungsaufforderung",
+}
+_GROUP_LABELS = {f"l{i}": label for i, label in enumerate(SECTION_LABELS)}
+
+# Matches a label at the start of a line, tolerating markdown like "**Product Title:**" or "### Call to Action:"
+SECTION_LABEL_RE = re.compile(
+    r"^[ \t]*(?:[#>*\-][ \t]*)*\**[ \t]*(?:"
+    + "|".join(f"(?P<{group}>{LABEL_PATTERNS[label]})" for group, label in _GROUP_LABELS.items())
+    + r")[ \t]*\**[ \t]*:[ \t]*\**",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# If this many characters arrive without a single label, the output is not in the expected format.
+MALFORMED_PROBE_CHARS = 400
+
+
+class MalformedOutputError(Exception):
+    """Raised when a streamed completion clearly does not follow the structured format."""
+    pass
+
+
+class SectionStreamParser:
+    """
+    Incremental parser for the structured description format:
+
+        Product Title: ...
+        Short Introduction: ...
+        Product Advantages:
+        - Feature: detail
+        Call to Action: ...
+
+    Feed it chunks as they stream in. Each section is emitted through on_section(label, text)
+    as soon as it is known to be complete (the next label starts, or the final Call to Action
+    line is terminated). `is_complete` turns True once every section has been emitted,
+    which lets the caller stop the stream early.
+    """
+
+    def __init__(self, on_section=None):
+        self.on_section = on_section
+        self.buffer = ""
+        self.sections = {}          # canonical label -> text
+        self._labels_seen = []      # (canonical label, content start offset) in order of appearance
+        self._scan_pos = 0          # offset up to which complete lines have been scanned
+        self.malformed_reason = None
+
+    @property
+    def is_complete(self):
+        return all(label in self.sections for label in SECTION_LABELS)
+
+    @property
+    def is_malformed(self):
+        return self.malformed_reason is not None
+
+    def _emit(self, label, text):
+        if label in self.sections:
+            return
+        text = text.strip()
+        self.sections[label] = text
+        logger.debug(f"📋 Stream section complete: {label} ({len(text)} chars)")
+        if self.on_section:
+            try:
+                self.on_section(label, text)
+            except Exception as e:
+                logger.warning(f"⚠️ on_section callback failed for '{label}': {e}")
+
+    def feed(self, chunk):
+        """Adds a streamed chunk and emits any sections that became complete."""
+        if not chunk or self.is_complete:
+            return
+        self.buffer += chunk
+
+        # Only scan complete lines so a label split across chunks is never half-matched
+        last_newline = self.buffer.rfind("\n")
+        if last_newline >= self._scan_pos:
+            for match in SECTION_LABEL_RE.finditer(self.buffer, self._scan_pos, last_newline + 1):
+                label = _GROUP_LABELS[match.lastgroup]
+                if any(seen == label for seen, _ in self._labels_seen):
+                    self.malformed_reason = f"label '{label}' repeated"
+                    return
+                if self._labels_seen:
+                    prev_label, prev_start = self._labels_seen[-1]
+                    self._emit(prev_label, self.buffer[prev_start:match.start()])
+                self._labels_seen.append((label, match.end()))
+            self._scan_pos = last_newline + 1
+
+        if not self._labels_seen and len(self.buffer) >= MALFORMED_PROBE_CHARS:
+            self.malformed_reason = f"no section label in first {MALFORMED_PROBE_CHARS} chars"
+            return
+
+        # Call to Action is the last section: complete once its first line is terminated
+        if self._labels_seen and self._labels_seen[-1][0] == "Call to Action":
+            tail = self.buffer[self._labels_seen[-1][1]:].lstrip()
+            if tail and "\n" in tail:
+                self._emit("Call to Action", tail.split("\n", 1)[0])
+
+    def finish(self):
+        """Flushes the last open section at end of stream. Returns the parsed sections dict."""
+        if self.buffer and not self.buffer.endswith("\n"):
+            self.feed("\n")  # Scan the unterminated last line (e.g. a final "Call to Action: ...")
+        if self._labels_seen and not self.is_malformed:
+            last_label, last_start = self._labels_seen[-1]
+            self._emit(last_label, self.buffer[last_start:])
+        return self.sections
+
+
+def parse_sections(text, on_section=None):
+    """Runs a complete (non-streamed or cached) output through the parser. Returns the sections dict."""
+    parser = SectionStreamParser(on_section=on_section)
+    parser.feed(text)
+    return parser.finish()
+
+
+def is_complete_output(text):
+    """True if a full output contains every structured section (safe to cache and reuse)."""
+    sections = parse_sections(text or "")
+    return all(sections.get(label) for label in SECTION_LABELS)
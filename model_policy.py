@@ -0,0 +1,142 @@
+# model_policy.py
+
+import os
+import json
+import logging
+from dotenv import load_dotenv
+load_dotenv()
+from prompt_compaction import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# DEFAULT PER-FIELD MODEL POLICY
+# ---------------------------------- #
+# Descriptions keep the large model; short fields go to the cheaper/faster tier.
+DEFAULT_MODEL_POLICY = {
+    "openai": {
+        "description": "gpt-4",
+        "title": "gpt-4o-mini",
+        "tags": "gpt-4o-mini",
+        "handle": "gpt-4o-mini",
+        "variants": "gpt-4o-mini",
+        "type": "gpt-4o-mini",
+        "default": "gpt-4",
+    },
+    "deepseek": {
+        "default": "deepseek-chat",
+    },
+}
+
+# (min, max) completion tokens per field. "product" is the combined structured output
+# (title + introduction + advantages + call to action) generated in one call.
+MAX_TOKENS_BOUNDS = {
+    "product": (int(os.getenv("LLM_STRUCTURED_MIN_TOKENS", "1000")), 1500),
+    "description": (400, 1500),
+    "title": (40, 120),
+    "tags": (30, 200),
+    "handle": (20, 60),
+    "variants": (20, 200),
+    "type": (10, 60),
+}
+
+# Fixed tokens for labels/structure the output adds on top of the translated content
+STRUCTURE_OVERHEAD = {
+    "product": 400,
+    "description": 300,  # Product Title / Short Introduction / Product Advantages / Call to Action
+    "title": 20,
+    "tags": 10,
+    "handle": 10,
+    "variants": 10,
+    "type": 20,
+}
+
+# Fields that use another field's model and policy entries when they have none of their own
+FIELD_FALLBACK = {"product": "description"}
+
+# Rewrites into German/Danish/Spanish typically run longer than the source
+OUTPUT_EXPANSION = float(os.getenv("LLM_OUTPUT_EXPANSION", "1.4"))
+
+# Global overrides, same shape as a store's "model_policy" entry in SHOPIFY_STORES_CONFIG
+_env_policy = {}
+if os.getenv("LLM_MODEL_POLICY"):
+    try:
+        _env_policy = json.loads(os.getenv("LLM_MODEL_POLICY"))
+    except json.JSONDecodeError as e:
+        logger.error(f"❌ Invalid LLM_MODEL_POLICY JSON, using defaults: {e}")
+
+
+def _normalize_field(field_type):
+    field = (field_type or "description").lower()
+    if field in ("body_html", "body", "desc"):
+        return "description"
+    if field in ("variant", "options", "option_values"):
+        return "variants"
+    return field
+
+
+def resolve_model(provider: str, field_type: str = "description", model_policy: dict = None) -> str:
+    """
+    Picks the model for a provider/field.
+
+    Lookup order: store policy (model_policy[provider][field]) → LLM_MODEL_POLICY env →
+    defaults, each falling back to that provider's "default" entry.
+
+    A store's entry in SHOPIFY_STORES_CONFIG may contain for example:
+        "model_policy": {"openai": {"title": "gpt-4o-mini", "description": "gpt-4o"},
+                         "max_tokens": {"description": 1200}}
+    """
+    field = _normalize_field(field_type)
+    for policy in (model_policy or {}, _env_policy, DEFAULT_MODEL_POLICY):
+        provider_policy = policy.get(provider) or {}
+        model = (provider_policy.get(field) or provider_policy.get(FIELD_FALLBACK.get(field))
+                 or provider_policy.get("default"))
+        if model:
+            return model
+    raise ValueError(f"No model configured for provider '{provider}'")
+
+
+def resolve_max_tokens(field_type: str, input_text: str, model_policy: dict = None) -> int:
+    """
+    Sizes max_tokens from the input length and the expected output structure,
+    clamped to the field's bounds. A store's "max_tokens" entry caps the result.
+    Structured title+description generations use field_type="product": its floor fits the
+    whole structure even when the input is just a title.
+    """
+    field = _normalize_field(field_type)
+    low, high = MAX_TOKENS_BOUNDS.get(field, MAX_TOKENS_BOUNDS["description"])
+    overhead = STRUCTURE_OVERHEAD.get(field, STRUCTURE_OVERHEAD["description"])
+
+    for policy in (model_policy or {}, _env_policy):
+        caps = policy.get("max_tokens") or {}
+        cap = caps.get(field) or caps.get(FIELD_FALLBACK.get(field))
+        if cap:
+            high = int(cap)
+            low = min(low, high)
+            break
+
+    estimated = int(estimate_tokens(input_text or "") * OUTPUT_EXPANSION) + overhead
+    return max(low, min(high, estimated))
+
+
+def store_model_policy(store_value: str = None, store_url: str = None) -> dict:
+    """
+    The "model_policy" of a store in SHOPIFY_STORES_CONFIG, matched by its "value" or, failing
+    that, its shop URL (the dashboard's own SHOPIFY_STORE_URL). None if the store has none.
+    """
+    try:
+        stores = json.loads(os.getenv("SHOPIFY_STORES_CONFIG") or "[]")
+    except json.JSONDecodeError as e:
+        logger.error(f"❌ Invalid SHOPIFY_STORES_CONFIG JSON, no store model policy: {e}")
+        return None
+
+    def _host(url):
+        return (url or "").lower().replace("https://", "").replace("http://", "").strip("/")
+
+    for store in stores if isinstance(stores, list) else []:
+        if not isinstance(store, dict):
+            continue
+        if (store_value and store.get("value") == store_value) or (
+                not store_value and store_url and _host(store.get("shopify_store_url")) == _host(store_url)):
+            return store.get("model_policy")
+    return None
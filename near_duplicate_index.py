@@ -0,0 +1,303 @@
+# near_duplicate_index.py
+
+import os
+import re
+import json
+import time
+import html
+import random
+import hashlib
+import logging
+import sqlite3
+import threading
+from array import array
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# CONFIGURATION
+# ---------------------------------- #
+NEAR_DUP_DB = os.getenv("NEAR_DUP_DB", "near_duplicates.db")
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.95"))    # Estimated Jaccard needed to reuse
+NEAR_DUP_DISABLED = os.getenv("NEAR_DUP_DISABLED", "false").lower() in ("1", "true", "yes")
+NEAR_DUP_MIN_WORDS = int(os.getenv("NEAR_DUP_MIN_WORDS", "20"))         # Shorter sources are always translated
+
+NUM_PERM = 128           # MinHash signature length
+LSH_BANDS = 16           # 16 bands x 8 rows: candidates from roughly 0.7 similarity upwards
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_SIZE = 3         # Word 3-grams
+MERSENNE_PRIME = (1 << 61) - 1
+COLOR_TOKEN = "zzcolorzz"  # Placeholder word for masked colors
+
+_rng = random.Random(1337)  # Fixed seed so signatures stay comparable across runs
+_PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+TAG_RE = re.compile(r"<[^>]+>")
+WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?")
+
+_conn = None
+_lock = threading.Lock()
+_color_patterns = {}
+
+stats = {"lookups": 0, "reuses": 0, "adds": 0}
+
+
+def _default_glossary():
+    """The color glossary used for variant options (English name -> {lang: name})."""
+    try:
+        from variants_utils2 import COLOR_NAME_MAP
+        return COLOR_NAME_MAP
+    except Exception as e:
+        logger.warning(f"⚠️ Color glossary unavailable, near-duplicate color patching disabled: {e}")
+        return {}
+
+
+def _color_pattern(glossary):
+    """Regex matching every glossary surface form (all languages), longest first."""
+    key = id(glossary)
+    if key not in _color_patterns:
+        forms = {}
+        for english, translations in glossary.items():
+            forms[english.lower()] = english
+            for value in translations.values():
+                forms.setdefault(value.lower(), english)
+        alternatives = sorted(forms, key=len, reverse=True)
+        pattern = re.compile(r"(?<![^\W_])(" + "|".join(re.escape(a) for a in alternatives) + r")(?![^\W_])", re.IGNORECASE) if alternatives else None
+        _color_patterns[key] = (pattern, forms)
+    return _color_patterns[key]
+
+
+# ---------------------------------- #
+# NORMALIZATION & SIGNATURES
+# ---------------------------------- #
+def _plain_text(source):
+    return html.unescape(TAG_RE.sub(" ", source or ""))
+
+
+def detect_colors(source, glossary=None):
+    """Distinct glossary colors (English keys) in order of first appearance."""
+    glossary = _default_glossary() if glossary is None else glossary
+    pattern, forms = _color_pattern(glossary)
+    if not pattern:
+        return []
+    colors = []
+    for match in pattern.finditer(_plain_text(source)):
+        english = forms[match.group(1).lower()]
+        if english not in colors:
+            colors.append(english)
+    return colors
+
+
+def normalize_source(source, glossary=None):
+    """Lowercased plain-text words with color names masked, so color-only variants compare equal."""
+    glossary = _default_glossary() if glossary is None else glossary
+    text = _plain_text(source).lower()
+    pattern, _forms = _color_pattern(glossary)
+    if pattern:
+        text = pattern.sub(f" {COLOR_TOKEN} ", text)
+    return WORD_RE.findall(text)
+
+
+def _shingle_hashes(words):
+    if len(words) <= SHINGLE_SIZE:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") % MERSENNE_PRIME for s in shingles]
+
+
+def minhash_signature(words):
+    """MinHash signature (NUM_PERM ints) of the word-shingle set."""
+    hashes = _shingle_hashes(words)
+    return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def estimate_similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity: share of equal signature slots."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / float(NUM_PERM)
+
+
+def _band_keys(signature):
+    keys = []
+    for band in range(LSH_BANDS):
+        chunk = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        keys.append((band, hashlib.blake2b(array("Q", chunk).tobytes(), digest_size=8).hexdigest()))
+    return keys
+
+
+# ---------------------------------- #
+# PERSISTENT INDEX
+# ---------------------------------- #
+def _get_conn():
+    """Lazily opens the index database (shared by all threads, guarded by _lock)."""
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(NEAR_DUP_DB, check_same_thread=False)
+        _conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scope TEXT,
+                product_id TEXT,
+                signature BLOB,
+                colors TEXT,
+                numbers TEXT,
+                required_name TEXT,
+                translation TEXT,
+                created_at REAL,
+                UNIQUE(scope, product_id)
+            );
+            CREATE TABLE IF NOT EXISTS bands (
+                scope TEXT,
+                band INTEGER,
+                bucket TEXT,
+                entry_id INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_bands_lookup ON bands(scope, band, bucket);
+            CREATE INDEX IF NOT EXISTS idx_bands_entry ON bands(entry_id);
+        """)
+        _conn.commit()
+        logger.info(f"✅ Near-duplicate index opened: {NEAR_DUP_DB}")
+    return _conn
+
+
+def make_scope(*parts) -> str:
+    """Scope key: translations are only reused within the same method/language/prompt/store."""
+    return hashlib.sha256(json.dumps([p or "" for p in parts], ensure_ascii=False).encode("utf-8")).hexdigest()[:24]
+
+
+def _prepare(source, glossary):
+    words = normalize_source(source, glossary)
+    if len(words) < NEAR_DUP_MIN_WORDS:
+        return None, None
+    return words, minhash_signature(words)
+
+
+def add(scope, product_id, source, translation, required_name=None, glossary=None):
+    """Records a successful translation of `source` (the raw, pre-post-processing output)."""
+    if NEAR_DUP_DISABLED or not translation:
+        return
+    glossary = _default_glossary() if glossary is None else glossary
+    words, signature = _prepare(source, glossary)
+    if signature is None:
+        return
+    colors = detect_colors(source, glossary)
+    numbers = sorted(set(NUMBER_RE.findall(_plain_text(source))))
+    try:
+        with _lock:
+            conn = _get_conn()
+            old = conn.execute("SELECT id FROM entries WHERE scope = ? AND product_id = ?", (scope, str(product_id))).fetchone()
+            if old:
+                conn.execute("DELETE FROM bands WHERE entry_id = ?", (old[0],))
+                conn.execute("DELETE FROM entries WHERE id = ?", (old[0],))
+            cursor = conn.execute(
+                "INSERT INTO entries (scope, product_id, signature, colors, numbers, required_name, translation, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (scope, str(product_id), array("Q", signature).tobytes(), json.dumps(colors), json.dumps(numbers), required_name, translation, time.time()),
+            )
+            conn.executemany(
+                "INSERT INTO bands (scope, band, bucket, entry_id) VALUES (?, ?, ?, ?)",
+                [(scope, band, bucket, cursor.lastrowid) for band, bucket in _band_keys(signature)],
+            )
+            conn.commit()
+            stats["adds"] += 1
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Near-duplicate index write failed: {e}")
+
+
+def find_similar(scope, source, product_id=None, threshold=None, glossary=None):
+    """
+    Looks up the most similar already-translated source in this scope.
+
+    Returns:
+        dict with product_id, similarity, colors, required_name and translation, or None.
+        Matches whose numbers (sizes, quantities, dimensions) differ are never returned.
+    """
+    if NEAR_DUP_DISABLED:
+        return None
+    threshold = NEAR_DUP_THRESHOLD if threshold is None else threshold
+    glossary = _default_glossary() if glossary is None else glossary
+    words, signature = _prepare(source, glossary)
+    if signature is None:
+        return None
+    numbers = sorted(set(NUMBER_RE.findall(_plain_text(source))))
+    stats["lookups"] += 1
+
+    try:
+        with _lock:
+            conn = _get_conn()
+            candidate_ids = set()
+            for band, bucket in _band_keys(signature):
+                for (entry_id,) in conn.execute("SELECT entry_id FROM bands WHERE scope = ? AND band = ? AND bucket = ?", (scope, band, bucket)):
+                    candidate_ids.add(entry_id)
+            rows = [conn.execute("SELECT product_id, signature, colors, numbers, required_name, translation FROM entries WHERE id = ?", (entry_id,)).fetchone()
+                    for entry_id in candidate_ids]
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Near-duplicate index read failed: {e}")
+        return None
+
+    best = None
+    for row in rows:
+        if not row or (product_id is not None and row[0] == str(product_id)):
+            continue
+        if json.loads(row[3]) != numbers:
+            continue
+        similarity = estimate_similarity(signature, array("Q", row[1]).tolist())
+        if similarity >= threshold and (best is None or similarity > best["similarity"]):
+            best = {"product_id": row[0], "similarity": similarity, "colors": json.loads(row[2]),
+                    "required_name": row[4], "translation": row[5]}
+    return best
+
+
+# ---------------------------------- #
+# PATCHING
+# ---------------------------------- #
+def _match_case(replacement, original):
+    if original.isupper():
+        return replacement.upper()
+    if original[:1].islower():
+        return replacement.lower()
+    return replacement
+
+
+def patch_translation(match, source, target_language, required_name=None, glossary=None):
+    """
+    Adapts a matched translation to the new product: swaps the stored required_name for the
+    new one and each differing color for its glossary translation in target_language.
+
+    Returns:
+        The patched text, or None when the differences cannot be patched safely
+        (different number of colors, or a name that cannot be swapped).
+    """
+    glossary = _default_glossary() if glossary is None else glossary
+    translation = match["translation"]
+    replacements = {}
+
+    old_name = match.get("required_name")
+    if required_name and old_name != required_name:
+        if not old_name:
+            return None
+        replacements[old_name] = required_name
+
+    old_colors, new_colors = match.get("colors") or [], detect_colors(source, glossary)
+    if old_colors != new_colors:
+        if len(old_colors) != len(new_colors):
+            return None
+        for old, new in zip(old_colors, new_colors):
+            if old == new:
+                continue
+            old_forms = {old, glossary.get(old, {}).get(target_language, old)}
+            new_form = glossary.get(new, {}).get(target_language, new)
+            for form in old_forms:
+                replacements[form] = new_form
+
+    stats["reuses"] += 1
+    logger.info(f"♻️ Reusing translation of near-duplicate {match['product_id']} (similarity {match['similarity']:.2f}), patches: {replacements}")
+    if not replacements:
+        return translation
+
+    # One pass so swaps (Black <-> White) do not chain into each other
+    lookup = {k.lower(): v for k, v in replacements.items()}
+    pattern = re.compile(r"(?<![^\W_])(" + "|".join(re.escape(k) for k in sorted(replacements, key=len, reverse=True)) + r")(?![^\W_])", re.IGNORECASE)
+    return pattern.sub(lambda m: _match_case(lookup[m.group(1).lower()], m.group(1)), translation)
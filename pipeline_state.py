@@ -0,0 +1,165 @@
+# pipeline_state.py
+
+import os
+import time
+import logging
+import sqlite3
+import threading
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# CONFIGURATION
+# ---------------------------------- #
+PIPELINE_STATE_DB = os.getenv("PIPELINE_STATE_DB", "pipeline_state.db")
+
+_conn = None
+_lock = threading.Lock()
+
+stats = {"writes": 0, "pulled": 0, "human_edits": 0, "synced": 0}
+
+_COLUMNS = "product_id, store, status, gid, title, updated_at, synced_at, sheet_status, sheet_gid, sheet_title"
+
+
+def _get_conn():
+    """Lazily opens the state database (shared by all threads, guarded by _lock)."""
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(PIPELINE_STATE_DB, check_same_thread=False)
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS product_store_state (
+                product_id TEXT,
+                store TEXT,
+                status TEXT,
+                gid TEXT,
+                title TEXT,
+                updated_at REAL,
+                synced_at REAL,
+                sheet_status TEXT,
+                sheet_gid TEXT,
+                sheet_title TEXT,
+                PRIMARY KEY (product_id, store)
+            )
+        """)
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_state_dirty ON product_store_state (synced_at, updated_at)")
+        _conn.commit()
+        logger.info(f"✅ Pipeline state store opened: {PIPELINE_STATE_DB}")
+    return _conn
+
+
+def _to_dict(row):
+    return dict(zip([c.strip() for c in _COLUMNS.split(",")], row)) if row else None
+
+
+def set_state(product_id, store, status, gid=None, title=None):
+    """Records a pipeline status change locally; it reaches the sheet with the next push."""
+    with _lock:
+        conn = _get_conn()
+        conn.execute(
+            """INSERT INTO product_store_state (product_id, store, status, gid, title, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT (product_id, store) DO UPDATE SET
+                   status = excluded.status, gid = excluded.gid, title = excluded.title, updated_at = excluded.updated_at""",
+            (str(product_id).strip(), store, str(status or ""), str(gid or ""), str(title or ""), time.time()),
+        )
+        conn.commit()
+        stats["writes"] += 1
+
+
+def get(product_id, store):
+    """{'status', 'gid', 'title', ...} for one product/store, or None if unknown."""
+    with _lock:
+        row = _get_conn().execute(
+            f"SELECT {_COLUMNS} FROM product_store_state WHERE product_id = ? AND store = ?",
+            (str(product_id).strip(), store),
+        ).fetchone()
+    return _to_dict(row)
+
+
+def get_product(product_id):
+    """{store: state} for every store the product has state for."""
+    with _lock:
+        rows = _get_conn().execute(
+            f"SELECT {_COLUMNS} FROM product_store_state WHERE product_id = ?", (str(product_id).strip(),)
+        ).fetchall()
+    return {row[1]: _to_dict(row) for row in rows}
+
+
+def pending_sync(limit=None):
+    """States changed locally since they were last mirrored to the sheet (oldest first)."""
+    sql = (f"SELECT {_COLUMNS} FROM product_store_state "
+           "WHERE synced_at IS NULL OR updated_at > synced_at ORDER BY updated_at")
+    with _lock:
+        rows = _get_conn().execute(sql + (" LIMIT ?" if limit else ""), (limit,) if limit else ()).fetchall()
+    return [_to_dict(row) for row in rows]
+
+
+def mark_synced(states, synced_at):
+    """
+    Marks pushed states as mirrored. A state changed again after synced_at (i.e. while the
+    push was in flight) stays pending.
+    """
+    with _lock:
+        conn = _get_conn()
+        conn.executemany(
+            """UPDATE product_store_state
+               SET synced_at = ?, sheet_status = ?, sheet_gid = ?, sheet_title = ?
+               WHERE product_id = ? AND store = ? AND updated_at <= ?""",
+            [(synced_at, s["status"], s["gid"], s["title"], s["product_id"], s["store"], synced_at) for s in states],
+        )
+        conn.commit()
+        stats["synced"] += len(states)
+
+
+def merge_from_sheet(rows):
+    """
+    Pulls sheet values in: rows is an iterable of (product_id, store, status, gid, title).
+    Unknown products are adopted as-is. For known ones, a sheet value that differs from what
+    was last mirrored is an edit made on the sheet (e.g. APPROVED by a reviewer) and wins over
+    the local state; otherwise the local state is kept (it may still be waiting to be pushed).
+    Returns the number of states changed.
+    """
+    now = time.time()
+    changed = 0
+    with _lock:
+        conn = _get_conn()
+        for product_id, store, status, gid, title in rows:
+            product_id = str(product_id).strip()
+            sheet_values = (str(status or ""), str(gid or ""), str(title or ""))
+            current = conn.execute(
+                "SELECT status, gid, title, sheet_status, sheet_gid, sheet_title FROM product_store_state WHERE product_id = ? AND store = ?",
+                (product_id, store),
+            ).fetchone()
+            if current and tuple(current[3:]) == sheet_values:
+                continue  # Sheet unchanged since the last sync
+            if current and (tuple(current[:3]) == sheet_values or current[3] is None):
+                # Already in agreement, or written locally before it was ever mirrored: keep local, remember the sheet
+                conn.execute(
+                    "UPDATE product_store_state SET sheet_status = ?, sheet_gid = ?, sheet_title = ? WHERE product_id = ? AND store = ?",
+                    (*sheet_values, product_id, store),
+                )
+                continue
+            if current:
+                stats["human_edits"] += 1
+                logger.info(f"📥 [{product_id}] {store}: sheet edit '{current[3]}' -> '{sheet_values[0]}' overrides local '{current[0]}'.")
+            conn.execute(
+                f"INSERT OR REPLACE INTO product_store_state ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (product_id, store, *sheet_values, now, now, *sheet_values),
+            )
+            changed += 1
+        conn.commit()
+    stats["pulled"] += changed
+    return changed
+
+
+def forget(product_id, store=None):
+    """Drops local state, e.g. once a product was archived to Sheet2."""
+    with _lock:
+        conn = _get_conn()
+        if store is None:
+            conn.execute("DELETE FROM product_store_state WHERE product_id = ?", (str(product_id).strip(),))
+        else:
+            conn.execute("DELETE FROM product_store_state WHERE product_id = ? AND store = ?", (str(product_id).strip(), store))
+        conn.commit()
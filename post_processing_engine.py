@@ -0,0 +1,285 @@
+# post_processing_engine.py
+
+import re
+import html
+import logging
+from functools import lru_cache
+import html_utils
+import description_templates
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# PRECOMPILED PATTERNS & TABLES
+# ---------------------------------- #
+# One named group per section; the first label found at a line start opens that section
+SECTION_LABEL_RE = re.compile(
+    r"^\s*(?:\*\*)*\s*(?:"
+    r"(?P<title>Product Title|Produkt[-\s]?Titel|Title)"
+    r"|(?P<introduction>Short Introduction|Kurze Einführung)"
+    r"|(?P<advantages>Product Advantages|Produktvorteile)"
+    r"|(?P<cta>Call to Action|Handlungsaufforderung)"
+    r")\s*:?\s*(?:\*\*)*",
+    flags=re.IGNORECASE | re.MULTILINE,
+)
+BULLET_LINE_RE = re.compile(r"^\s*[-*•]\s*(.+)", re.MULTILINE)
+HTML_HINT_RE = re.compile(r"<[a-zA-Z/][^>]*>")
+CHECKMARK_RE = re.compile(r"(&#x2714;|&#10003;|&#9989;|\u2714|\u2713|\u2705|✔️|✔|✓|✅)[ \t]*")
+BOLD_MARKER_RE = re.compile(r"\*\*")
+BOLD_SPAN_RE = re.compile(r"\*\*(.*?)\*\*")
+BULLET_LEAD_RE = re.compile(r"^[✔️•\-* ]+")
+FEATURE_PREFIX_RE = re.compile(r"(?i)^Feature \d+:\s*")
+BULLET_SPLIT_RE = re.compile(r"[:\-]")
+NAME_SPLIT_RE = re.compile(r"\s*[\|–\-]\s*")
+TITLE_NOISE_RE = re.compile(r"<.*?>|\(Note:.*?\)|:\s*$", re.IGNORECASE)
+# Likely placeholder name: capitalized word right before a product-type word
+WRAPPED_HTML_RE = re.compile(r"\s*<div[^>]*max-width:\s*800px")
+NAME_PLACEHOLDER_RE = re.compile(r"\b([A-Z][a-z]{3,})\b(?=\s+(?:3-teilige|Set|Collection|Outfit|Mode|Kapuzenpullover|Lingerie|Dessous|Besteckset|Spitzenset))")
+
+TRANSLATED_IMAGE_BLOCK = '<div style="text-align:center; margin:{margin} 0;"><img src="{src}" style="width:480px; max-width:100%;" loading="lazy" alt="{alt}"/></div>'
+
+LOCALIZED_LABELS = {
+    'en': {'advantages': 'Product Advantages', 'cta': 'Buy Now!'},
+    'de': {'advantages': 'Produktvorteile', 'cta': 'Jetzt kaufen!'},
+    'es': {'advantages': 'Ventajas del producto', 'cta': '¡Compra ahora!'},
+    'fr': {'advantages': 'Avantages du produit', 'cta': 'Achetez maintenant !'},
+    'it': {'advantages': 'Vantaggi del prodotto', 'cta': 'Acquista ora!'},
+    'nl': {'advantages': 'Productvoordelen', 'cta': 'Koop nu!'},
+    'pt': {'advantages': 'Vantagens do produto', 'cta': 'Compre agora!'},
+    'ru': {'advantages': 'Преимущества товара', 'cta': 'Купить сейчас!'},
+    'ja': {'advantages': '製品の特長', 'cta': '今すぐ購入！'},
+    'zh': {'advantages': '产品优势', 'cta': '立即购买！'},
+    'da': {'advantages': 'Produktfordele', 'cta': 'Køb nu!'},
+}
+
+stats = {"calls": 0, "parses": 0}
+
+
+# ---------------------------------- #
+# PARSING (memoized per LLM output)
+# ---------------------------------- #
+@lru_cache(maxsize=512)
+def _parse_cached(ai_text):
+    stats["parses"] += 1
+    text = ai_text
+    if HTML_HINT_RE.search(text):
+        try:
+            text = html_utils.strip_text(text, separator="\n", strip=False)
+        except Exception as e:
+            logger.warning(f"HTML cleaning failed: {e}. Using raw.")
+    text = text.lstrip('\ufeff').strip()
+    if not text:
+        return "", "", (), ""
+
+    sections = {"title": "", "introduction": "", "advantages": "", "cta": ""}
+    matches = list(SECTION_LABEL_RE.finditer(text))
+    if not matches:
+        lines = [line.strip() for line in text.split("\n") if line.strip()]
+        return (lines[0] if lines else ""), "\n".join(lines[1:]), (), ""
+
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        sections[match.lastgroup] = text[match.end():end].strip().strip('*').strip()
+
+    features = tuple(
+        line.strip().strip('*').strip()
+        for line in BULLET_LINE_RE.findall(sections["advantages"]) if line.strip()
+    )
+    return sections["title"], sections["introduction"], features, sections["cta"]
+
+
+def parse_description(ai_text):
+    """
+    Splits a ChatGPT/DeepSeek description into title, introduction, features and CTA.
+    Each distinct output is parsed once; repeated calls return a fresh copy of the cached result.
+    """
+    if not ai_text:
+        return {'title': '', 'introduction': '', 'features': [], 'cta': ''}
+    title, introduction, features, cta = _parse_cached(ai_text)
+    return {'title': title, 'introduction': introduction, 'features': list(features), 'cta': cta}
+
+
+# ---------------------------------- #
+# HELPERS
+# ---------------------------------- #
+def get_localized_labels(target_lang):
+    """Localized 'Product Advantages' heading and fallback CTA."""
+    return LOCALIZED_LABELS.get((target_lang or 'en').lower(), LOCALIZED_LABELS['en'])
+
+
+def split_bullet_points(features):
+    """Feature lines → [{"label", "text"}]; the label is the part before the first ':' or '-'."""
+    bullets = []
+    for line in features:
+        line = FEATURE_PREFIX_RE.sub("", BOLD_SPAN_RE.sub(r"\1", BULLET_LEAD_RE.sub("", line)))
+        parts = BULLET_SPLIT_RE.split(line, maxsplit=1)
+        if len(parts) == 2:
+            bullets.append({"label": parts[0].strip(), "text": parts[1].strip()})
+        else:
+            bullets.append({"label": "", "text": line.strip()})
+    return bullets
+
+
+def get_first_two_images(product_data):
+    """URLs of the first two product images, or empty strings."""
+    imgs = (product_data or {}).get('images') or []
+    image1_url = imgs[0].get('src', '') if len(imgs) > 0 and isinstance(imgs[0], dict) else ""
+    image2_url = imgs[1].get('src', '') if len(imgs) > 1 and isinstance(imgs[1], dict) else ""
+    return image1_url, image2_url
+
+
+def _name_from_title(title):
+    if not title:
+        return None
+    parts = NAME_SPLIT_RE.split(TITLE_NOISE_RE.sub("", title).strip(), maxsplit=1)
+    return parts[0].strip() if len(parts) > 1 else None
+
+
+def _replace_placeholder_name(text, name_to_use, product_id):
+    match = NAME_PLACEHOLDER_RE.search(text)
+    if match and match.group(1).lower() != name_to_use.lower():
+        logger.info(f"[{product_id}] Replacing name: '{match.group(1)}' -> '{name_to_use}'")
+        return re.sub(r'\b' + re.escape(match.group(1)) + r'\b', name_to_use, text, count=1), True
+    return text, False
+
+
+def _clean_output(new_html):
+    return BOLD_MARKER_RE.sub('', CHECKMARK_RE.sub('', html.unescape(new_html)))
+
+
+# ---------------------------------- #
+# BUILDERS
+# ---------------------------------- #
+def _build_context(parsed, product_id, labels, name_to_use, final_product_title, images):
+    """Template context for the structured layout (see templates/descriptions/)."""
+    description_h3_title = final_product_title or parsed["title"].strip()
+    if not description_h3_title:
+        logger.warning(f"[{product_id}] No title determined for H3.")
+
+    introduction = parsed["introduction"].strip()
+    if name_to_use and introduction:
+        introduction, _ = _replace_placeholder_name(introduction, name_to_use, product_id)
+
+    image1_url, image2_url = images
+    return {
+        "title": description_h3_title,
+        "introduction": introduction,
+        "image1_url": image1_url,
+        "image2_url": image2_url,
+        "alt_text_base": f"{name_to_use} product image" if name_to_use else "Product image",
+        "bullets": split_bullet_points(parsed["features"]),
+        "cta": parsed["cta"].strip(),
+        "labels": labels,
+    }
+
+
+def _build_translated_html(new_html, product_id, name_to_use, images):
+    """Google/DeepL output: drop old images, fix the name, re-insert the product images, wrap."""
+    def _fix_name(text):
+        new_text, replaced = _replace_placeholder_name(text, name_to_use, product_id)
+        return new_text if replaced else None
+
+    output = html_utils.replace_text_nodes(new_html, _fix_name if name_to_use else (lambda text: None), remove_tags=("img",))
+
+    image1_url, image2_url = images
+    alt_text_base = html.escape(f"{name_to_use} product image" if name_to_use else "Product image")
+    output = html_utils.insert_around_paragraphs(
+        output,
+        after_first=TRANSLATED_IMAGE_BLOCK.format(margin="1em", src=html.escape(image1_url), alt=f"{alt_text_base} 1") if image1_url else None,
+        before_last=TRANSLATED_IMAGE_BLOCK.format(margin="2em", src=html.escape(image2_url), alt=f"{alt_text_base} 2") if image2_url else None,
+    )
+
+    if WRAPPED_HTML_RE.match(output):
+        return output.strip()
+    return f'<div style="text-align: center; margin: 0 auto; max-width: 800px;">{output}</div>'.strip()
+
+
+# ---------------------------------- #
+# PUBLIC API
+# ---------------------------------- #
+def _post_process(original_html, new_html, method, product_data=None, target_lang='en',
+                  final_product_title=None, product_name=None, list_layout="wrapped", store=None):
+    """Returns finished HTML, or a description_templates render item for the structured path."""
+    product_id = product_data.get("id", "UnknownID") if product_data else "UnknownID"
+    stats["calls"] += 1
+    if not new_html:
+        logger.warning(f"[{product_id}] post_process_description: new_html input was empty or None.")
+        return ""
+    try:
+        method_name = (method.get("method", "") if isinstance(method, dict) else str(method)).lower()
+        name_to_use = product_name or _name_from_title((product_data or {}).get("title", ""))
+        cleaned = _clean_output(new_html)
+        images = get_first_two_images(product_data)
+
+        if method_name in ("chatgpt", "deepseek"):
+            parsed = parse_description(cleaned)
+            if not parsed["introduction"] and not parsed["features"]:
+                logger.error(f"[{product_id}] PARSING FAILED for {method_name}.")
+                return cleaned
+            context = _build_context(parsed, product_id, get_localized_labels(target_lang), name_to_use,
+                                     final_product_title, images)
+            return {"context": context, "layout": list_layout, "store": store, "target_lang": target_lang,
+                    "fallback": cleaned, "product_id": product_id}
+        if method_name in ("google", "deepl"):
+            output = _build_translated_html(cleaned, product_id, name_to_use, images)
+            logger.info(f"✅ [{product_id}] Post-processed description ({method_name}). Length: {len(output)}")
+            return output
+        logger.warning(f"⚠️ [{product_id}] Unknown method '{method_name}'.")
+        return cleaned
+    except Exception as e:
+        logger.exception(f"❌ [{product_id}] Exception in post_process_description: {e}")
+        try:
+            return _clean_output(new_html).strip()
+        except Exception:
+            return new_html
+
+
+def _render_one(item):
+    try:
+        output = description_templates.render_description(item["context"], item["layout"], item["store"], item["target_lang"])
+        logger.info(f"✅ [{item['product_id']}] Post-processed description (template). Length: {len(output)}")
+        return output
+    except Exception as e:
+        logger.exception(f"❌ [{item['product_id']}] Description template rendering failed: {e}")
+        return item["fallback"]
+
+
+def post_process_description(original_html, new_html, method, product_data=None, target_lang='en',
+                             final_product_title=None, product_name=None, list_layout="wrapped", store=None):
+    """
+    Post-process a translated product description:
+    - ChatGPT & DeepSeek: structured HTML rendered from templates/descriptions/<list_layout>.html
+      (per-store/per-language variants, see description_templates). final_product_title (if given)
+      replaces the parsed title in the H3.
+    - Google/DeepL: cleaned HTML with product images re-inserted and wrapped.
+
+    Returns the cleaned input if anything fails, "" for empty input.
+    """
+    result = _post_process(original_html, new_html, method, product_data, target_lang,
+                           final_product_title, product_name, list_layout, store)
+    return _render_one(result) if isinstance(result, dict) else result
+
+
+def post_process_batch(items):
+    """
+    Post-processes many descriptions in one call.
+
+    Args:
+        items: iterable of dicts with post_process_description keyword arguments
+               (original_html, new_html, method, product_data, target_lang, store, ...).
+
+    Returns:
+        list of HTML strings in input order. Identical LLM outputs are parsed only once and
+        structured descriptions are rendered together through description_templates.render_batch.
+    """
+    results = [_post_process(**item) for item in items]
+    pending = [i for i, result in enumerate(results) if isinstance(result, dict)]
+    if pending:
+        try:
+            rendered = description_templates.render_batch([results[i] for i in pending])
+        except Exception as e:
+            logger.warning(f"⚠️ Batch rendering failed ({e}); rendering one by one.")
+            rendered = [_render_one(results[i]) for i in pending]
+        for i, output in zip(pending, rendered):
+            results[i] = output
+    return results
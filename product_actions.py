@@ -6,6 +6,11 @@ import logging
 import time
 import argparse
 from openai import OpenAI
+import llm_client
+import llm_cache
+from prompt_compaction import compact_description
+from model_policy import resolve_model, resolve_max_tokens
+import type_classifier
 from dotenv import load_dotenv
 
 # --- Logging Setup ---
@@ -102,11 +107,22 @@ ALLOWED_PRODUCT_TYPES = {
 }
 
 # --- AI Function ---
-def get_ai_type_from_description(product_description, allowed_types_list, product_title=""):
+def get_ai_type_from_description(product_description, allowed_types_list, product_title="", bypass_cache=False, model_policy=None,
+                                 product_tags=None, product_gender=None, use_local_classifier=True):
     """
     Uses the initialized DeepSeek client (via OpenAI library) to determine the
     best product type based PRIMARILY on the product description.
+    The local classifier (type_classifier.py) answers first when title/tags make the type obvious.
     """
+    # --- 0. Local fast path (keyword rules, optional trained model) ---
+    if use_local_classifier:
+        local_type = type_classifier.classify_locally(
+            title=product_title, tags=product_tags, description=product_description,
+            gender=product_gender, allowed_types=allowed_types_list
+        )
+        if local_type:
+            return local_type
+
     logger.info(f"Attempting DeepSeek categorization based on description...")
 
     # --- 1. Check if DeepSeek client is available ---
@@ -121,7 +137,7 @@ def get_ai_type_from_description(product_description, allowed_types_list, produc
 
     # --- 3. Prepare Prompt for DeepSeek ---
     allowed_types_str = ", ".join(list(allowed_types_list)) # Use passed-in list
-    description_snippet = product_description[:1000]
+    description_snippet = compact_description(product_description, max_chars=1000, label="type classification")
 
     prompt = f"""Analyze the following product description:
 --- DESCRIPTION START ---
@@ -141,26 +157,38 @@ Category:"""
     determined_type = None
     llm_response_text = None
 
-    try:
-        # --- 5. Call DeepSeek API ---
-        logger.debug("Calling deepseek_client.chat.completions.create for categorization...")
-        response = deepseek_client.chat.completions.create(
-            model="deepseek-chat", # Or specific model name
-            messages=messages,
-            max_tokens=60,
-            temperature=0.1,
-            n=1,
-            stream=False
-        )
-        # --- 6. Extract Response ---
-        if response.choices and len(response.choices) > 0:
-             message = response.choices[0].message
-             if message and message.content:
-                  llm_response_text = message.content.strip()
-                  logger.debug(f"Raw DeepSeek classification response: '{llm_response_text}'")
+    # --- 5a. Check completion cache ---
+    model = resolve_model("deepseek", "type", model_policy)
+    cache_key = llm_cache.make_key(model, "", prompt, 0.1, None)
+    if not bypass_cache:
+        llm_response_text = llm_cache.get(cache_key)
 
-    except Exception as e:
-        logger.error(f"Error during DeepSeek API call for categorization: {e}", exc_info=True)
+    if llm_response_text is None:
+        try:
+            # --- 5. Call DeepSeek API ---
+            logger.debug("Calling llm_client.chat_completion for categorization...")
+            response = llm_client.chat_completion(
+                "deepseek",
+                model=model, # Per-field policy, see model_policy.py
+                messages=messages,
+                max_tokens=resolve_max_tokens("type", "", model_policy),
+                temperature=0.1,
+                n=1,
+                stream=False
+            )
+            # --- 6. Extract Response ---
+            if response.choices and len(response.choices) > 0:
+                 message = response.choices[0].message
+                 if message and message.content:
+                      llm_response_text = message.content.strip()
+                      logger.debug(f"Raw DeepSeek classification response: '{llm_response_text}'")
+
+        except Exception as e:
+            logger.error(f"Error during DeepSeek API call for categorization: {e}", exc_info=True)
+
+        # Only cache answers that validate, so a bad answer is not replayed
+        if llm_response_text and llm_response_text in allowed_types_list:
+            llm_cache.put(cache_key, llm_response_text)
 
     # --- 7. Validate Response ---
     if llm_response_text:
@@ -0,0 +1,101 @@
+# prompt_compaction.py
+
+import os
+import re
+import logging
+import html_utils
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# CONFIGURATION
+# ---------------------------------- #
+PROMPT_MAX_CHARS = int(os.getenv("PROMPT_MAX_CHARS", "4000"))  # Cap for the compacted source text
+
+# Elements that never carry translatable copy
+NOISE_TAGS = ["script", "style", "img", "svg", "picture", "video", "iframe", "noscript", "figure", "source", "button", "form", "input"]
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+BLOCK_TAGS = {"p", "div", "section", "article", "blockquote", "td", "th", "tr", "table", "ul", "ol", "dl", "dt", "dd", "br", "hr"}
+
+WHITESPACE_RE = re.compile(r"\s+")
+HTML_HINT_RE = re.compile(r"<[a-zA-Z/][^>]*>")
+SENTENCE_END_RE = re.compile(r"[.!?…](?=\s|$)")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap local token estimate (~4 characters per token for Latin scripts).
+    Good enough to compare prompt sizes without calling a tokenizer.
+    """
+    if not text:
+        return 0
+    return max(1, len(text) // 4)
+
+
+def _clean(text: str) -> str:
+    return WHITESPACE_RE.sub(" ", text).strip()
+
+
+def _format_block(kind, text):
+    """One prompt line per html_utils.text_blocks block: '## ' headings, '- ' bullets."""
+    text = _clean(text)
+    if not text:
+        return ""
+    return {"heading": f"## {text}", "item": f"- {text}"}.get(kind, text)
+
+
+def _cap_length(text: str, max_chars: int) -> str:
+    """Cuts overlong text at the last sentence or line boundary before max_chars."""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    boundary = max(cut.rfind("\n"), max((m.end() for m in SENTENCE_END_RE.finditer(cut)), default=-1))
+    if boundary > max_chars // 2:
+        cut = cut[:boundary]
+    return cut.rstrip()
+
+
+def compact_description(text: str, max_chars: int = None, label: str = "description") -> str:
+    """
+    Reduces product HTML to plain structured text for LLM prompts: '## ' headings,
+    paragraphs and '- ' bullets, one per line. Images, inline styles, attributes and
+    repeated whitespace are dropped and the result is capped at max_chars.
+
+    Args:
+        text (str): Source description (HTML or plain text).
+        max_chars (int): Length cap, defaults to PROMPT_MAX_CHARS.
+        label (str): Name used in the before/after log line.
+
+    Returns:
+        str: Compacted text, or the original text if compaction fails or yields nothing.
+    """
+    if not text or not text.strip():
+        return text
+    max_chars = max_chars or PROMPT_MAX_CHARS
+
+    try:
+        if HTML_HINT_RE.search(text):
+            blocks = html_utils.text_blocks(text, HEADING_TAGS, BLOCK_TAGS, remove_tags=NOISE_TAGS)
+            lines = [_format_block(kind, block) for kind, block in blocks]
+            lines = [line for line in lines if line]
+        else:
+            lines = [_clean(line) for line in text.splitlines()]
+            lines = [line for line in lines if line]
+
+        # Drop consecutive duplicates (supplier copy often repeats blocks)
+        deduped = []
+        for line in lines:
+            if not deduped or deduped[-1] != line:
+                deduped.append(line)
+
+        compacted = _cap_length("\n".join(deduped), max_chars)
+    except Exception as e:
+        logger.warning(f"⚠️ Prompt compaction failed for {label}, sending original text: {e}")
+        return text
+
+    if not compacted:
+        return text
+
+    before, after = estimate_tokens(text), estimate_tokens(compacted)
+    logger.info(f"✂️ Prompt compaction ({label}): ~{before} → ~{after} tokens ({len(text)} → {len(compacted)} chars)")
+    return compacted
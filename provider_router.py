@@ -0,0 +1,198 @@
+# provider_router.py
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# CONFIGURATION
+# ---------------------------------- #
+ROUTER_WINDOW = int(os.getenv("ROUTER_WINDOW", "200"))                  # Calls kept per provider for stats
+ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", "10"))         # Samples needed before hedging on p95
+ROUTER_MAX_WORKERS = int(os.getenv("ROUTER_MAX_WORKERS", "16"))
+ROUTER_HEDGING = os.getenv("ROUTER_HEDGING", "true").lower() in ("1", "true", "yes")
+ROUTER_UNHEALTHY_ERROR_RATE = float(os.getenv("ROUTER_UNHEALTHY_ERROR_RATE", "0.5"))  # Demote primary above this
+
+# Which methods may stand in for each other, per field. LLM rewrites are only
+# interchangeable with other LLM rewrites; machine translation with machine translation.
+DEFAULT_EQUIVALENCE_POLICY = {
+    "default": [["deepseek", "chatgpt"], ["google", "deepl"]],
+    "handle": [["google", "deepl"]],
+    "tags": [["google", "deepl"]],
+    "variants": [["google", "deepl"]],
+}
+
+EQUIVALENCE_POLICY = dict(DEFAULT_EQUIVALENCE_POLICY)
+if os.getenv("ROUTER_EQUIVALENCE_POLICY"):
+    try:
+        EQUIVALENCE_POLICY.update(json.loads(os.getenv("ROUTER_EQUIVALENCE_POLICY")))
+    except json.JSONDecodeError as e:
+        logger.error(f"❌ Invalid ROUTER_EQUIVALENCE_POLICY JSON, using defaults: {e}")
+
+# Env var that must be set for a method to be usable (google needs no key)
+PROVIDER_KEYS = {
+    "chatgpt": "OPENAI_API_KEY",
+    "deepseek": "DEEPSEEK_API_KEY",
+    "deepl": "DEEPL_API_KEY",
+}
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class ProviderRouter:
+    """
+    Routes a translation call to its primary provider and, when needed, to an equivalent one.
+
+    - Keeps a rolling window of (latency, success) per provider for p50/p95 and error rate.
+    - Hedging: if the primary has not answered by its own p95, the next equivalent provider
+      is started in parallel and whichever succeeds first wins.
+    - Fallback: if the primary raises, the next equivalent provider is tried. Providers are
+      called in their raise_errors mode, so only a real exception counts as a failure; unchanged
+      text is a valid answer (sizes, SKUs, brand names often are).
+    """
+
+    def __init__(self, window=ROUTER_WINDOW, min_samples=ROUTER_MIN_SAMPLES, equivalence=None):
+        self.window = window
+        self.min_samples = min_samples
+        self.equivalence = equivalence or EQUIVALENCE_POLICY
+        self._samples = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=ROUTER_MAX_WORKERS, thread_name_prefix="provider-router")
+
+    # --- Stats ---
+    def record(self, provider, latency, ok):
+        with self._lock:
+            self._samples.setdefault(provider, deque(maxlen=self.window)).append((latency, ok))
+
+    def stats(self, provider):
+        """Returns {'samples', 'p50', 'p95', 'error_rate'} for a provider."""
+        with self._lock:
+            samples = list(self._samples.get(provider, ()))
+        latencies = sorted(latency for latency, ok in samples if ok)
+        errors = sum(1 for _, ok in samples if not ok)
+        return {
+            "samples": len(samples),
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "error_rate": (errors / len(samples)) if samples else 0.0,
+        }
+
+    def all_stats(self):
+        with self._lock:
+            providers = list(self._samples)
+        return {provider: self.stats(provider) for provider in providers}
+
+    # --- Candidate selection ---
+    @staticmethod
+    def is_available(provider):
+        key_name = PROVIDER_KEYS.get(provider)
+        return key_name is None or bool(os.getenv(key_name))
+
+    def candidates(self, field_type, primary):
+        """Primary first, then its equivalents for this field ordered by health."""
+        groups = self.equivalence.get((field_type or "default").lower(), self.equivalence.get("default", []))
+        alternates = []
+        for group in groups:
+            if primary in group:
+                alternates = [p for p in group if p != primary and self.is_available(p)]
+                break
+        alternates.sort(key=lambda p: (self.stats(p)["error_rate"], self.stats(p)["p50"] or 0))
+
+        primary_stats = self.stats(primary)
+        if alternates and (not self.is_available(primary) or (
+                primary_stats["samples"] >= self.min_samples
+                and primary_stats["error_rate"] > ROUTER_UNHEALTHY_ERROR_RATE)):
+            logger.warning(f"⚠️ Primary '{primary}' unavailable/unhealthy ({primary_stats}), demoting it.")
+            return alternates + [primary]
+        return [primary] + alternates
+
+    def _hedge_delay(self, provider):
+        stats = self.stats(provider)
+        if not ROUTER_HEDGING or stats["samples"] < self.min_samples:
+            return None
+        return stats["p95"]
+
+    # --- Execution ---
+    def _timed_call(self, provider, fn, original_text):
+        start = time.monotonic()
+        try:
+            result, ok = fn(), True
+        except Exception as e:
+            logger.error(f"❌ Provider '{provider}' raised: {e}")
+            result, ok = None, False
+        self.record(provider, time.monotonic() - start, ok)
+        return ok, result
+
+    def call(self, field_type, primary, calls, original_text):
+        """
+        Args:
+            field_type (str): "title", "description", "tags", ... (selects the equivalence policy).
+            primary (str): Requested method ("deepseek", "chatgpt", "google", "deepl").
+            calls (dict): method -> zero-argument callable returning the translated text and
+                raising on failure (translation.py providers with raise_errors=True).
+            original_text: The input, returned unchanged if every provider fails.
+
+        Returns:
+            The first successful result, or original_text.
+        """
+        order = [p for p in self.candidates(field_type, primary) if p in calls]
+        if not order:
+            return original_text
+
+        pending = {}
+        queue = list(order)
+
+        def launch():
+            provider = queue.pop(0)
+            pending[self._executor.submit(self._timed_call, provider, calls[provider], original_text)] = provider
+            return provider
+
+        first = launch()
+        hedge_delay = self._hedge_delay(first)
+
+        while pending:
+            timeout = hedge_delay if (hedge_delay and queue) else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                hedge_delay = None  # Hedge once
+                hedged = launch()
+                logger.warning(f"🔁 '{first}' past p95 for {field_type}, hedging with '{hedged}'.")
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                ok, result = future.result()
+                if ok:
+                    if provider != primary:
+                        logger.info(f"✅ {field_type} served by '{provider}' instead of '{primary}'.")
+                    return result
+
+            if not pending and queue:
+                fallback = launch()
+                logger.warning(f"🔁 Falling back to '{fallback}' for {field_type}.")
+
+        logger.warning(f"⚠️ No provider returned a translation for {field_type} (tried {order}), keeping original.")
+        return original_text
+
+
+# Shared router so stats accumulate across requests and batch runs
+router = ProviderRouter()
+
+
+def route_translation(field_type, primary, calls, original_text):
+    """Module-level shortcut for router.call()."""
+    return router.call(field_type, primary, calls, original_text)
@@ -1,6 +1,6 @@
 # random_name.py
 import random
-from bs4 import BeautifulSoup # Make sure BeautifulSoup is imported
+import html_utils
 import re
 import logging
 
@@ -1202,9 +1202,7 @@ def simple_html_strip(html_content):
     if not html_content:
         return ""
     try:
-        # Use BeautifulSoup for more robust stripping
-        soup = BeautifulSoup(html_content, "html.parser")
-        return soup.get_text(separator=' ', strip=True)
+        return html_utils.strip_text(html_content, separator=' ')
     except Exception:
         # Fallback regex (less reliable)
         return re.sub(r'<[^>]+>', ' ', html_content)
@@ -0,0 +1,182 @@
+# rate_limiter.py
+
+import os
+import re
+import time
+import random
+import asyncio
+import logging
+import threading
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# CONFIGURATION
+# ---------------------------------- #
+# Requests / tokens per minute per provider. 0 disables that dimension.
+DEFAULT_LIMITS = {
+    "openai": {"rpm": 500, "tpm": 150000},
+    "deepseek": {"rpm": 300, "tpm": 300000},
+    "google": {"rpm": 300, "tpm": 0},
+    "deepl": {"rpm": 120, "tpm": 0},
+}
+
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "5"))
+RATE_LIMIT_BASE_DELAY = float(os.getenv("RATE_LIMIT_BASE_DELAY", "2.0"))   # Seconds, doubled per 429
+RATE_LIMIT_MAX_DELAY = float(os.getenv("RATE_LIMIT_MAX_DELAY", "60.0"))
+
+DURATION_PART_RE = re.compile(r"([\d.]+)(ms|s|m|h)")
+
+
+def _env_limit(provider, kind):
+    value = os.getenv(f"{provider.upper()}_{kind.upper()}")
+    return (int(value), True) if value else (DEFAULT_LIMITS.get(provider, {}).get(kind, 0), False)
+
+
+def parse_reset_duration(value):
+    """Parses reset values like '1s', '120ms', '6m0s' or plain seconds into seconds."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    for number, unit in DURATION_PART_RE.findall(value):
+        total += float(number) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return total or None
+
+
+class _Bucket:
+    """Token bucket refilled continuously at capacity-per-minute."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        if self.capacity > 0:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def reserve(self, amount, now):
+        """Takes `amount` (may go negative) and returns how long the caller must wait."""
+        if self.capacity <= 0:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)  # A single oversized call must still be able to run
+        self.level -= amount
+        return 0.0 if self.level >= 0 else -self.level * 60.0 / self.capacity
+
+    def set_capacity(self, per_minute):
+        self.capacity = float(per_minute)
+        self.level = min(self.level, self.capacity)
+
+
+class ProviderLimiter:
+    """Requests-per-minute and tokens-per-minute buckets plus a shared pause after 429s."""
+
+    def __init__(self, provider):
+        self.provider = provider
+        rpm, self._rpm_explicit = _env_limit(provider, "rpm")
+        tpm, self._tpm_explicit = _env_limit(provider, "tpm")
+        self.requests = _Bucket(rpm)
+        self.tokens = _Bucket(tpm)
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self, tokens=0):
+        """Reserves one request (+ tokens) and returns the delay to wait before sending."""
+        with self.lock:
+            now = time.monotonic()
+            wait = max(self.requests.reserve(1, now), self.tokens.reserve(tokens, now))
+            return max(wait, self.paused_until - now, 0.0)
+
+    def refund_tokens(self, amount):
+        """Returns over-reserved tokens once the real usage is known."""
+        if amount > 0 and self.tokens.capacity > 0:
+            with self.lock:
+                self.tokens.level = min(self.tokens.capacity, self.tokens.level + amount)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def observe_headers(self, headers):
+        """
+        Applies x-ratelimit-* headers when the provider sends them: adopts the reported limits
+        (unless set explicitly in env) and pauses until reset when a quota is exhausted.
+        """
+        if not headers:
+            return
+        try:
+            limit_requests = headers.get("x-ratelimit-limit-requests")
+            limit_tokens = headers.get("x-ratelimit-limit-tokens")
+            with self.lock:
+                if limit_requests and not self._rpm_explicit:
+                    self.requests.set_capacity(int(limit_requests))
+                if limit_tokens and not self._tpm_explicit:
+                    self.tokens.set_capacity(int(limit_tokens))
+
+            for kind in ("requests", "tokens"):
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                if remaining is not None and int(remaining) <= 0:
+                    reset = parse_reset_duration(headers.get(f"x-ratelimit-reset-{kind}")) or 1.0
+                    logger.warning(f"⚠️ {self.provider} {kind} quota exhausted, pausing {reset:.1f}s.")
+                    self.pause(reset)
+        except (ValueError, TypeError) as e:
+            logger.debug(f"Could not parse rate-limit headers for {self.provider}: {e}")
+
+
+# ---------------------------------- #
+# SHARED LIMITERS
+# ---------------------------------- #
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider):
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(provider)
+            if limiter is None:
+                limiter = ProviderLimiter(provider)
+                _limiters[provider] = limiter
+    return limiter
+
+
+def acquire(provider, tokens=0):
+    """Blocking acquire for sync callers (Google/DeepL)."""
+    delay = get_limiter(provider).reserve(tokens)
+    if delay > 0:
+        logger.debug(f"⏳ {provider} rate limiter: waiting {delay:.2f}s")
+        time.sleep(delay)
+
+
+async def aacquire(provider, tokens=0):
+    """Async acquire for the LLM client event loop."""
+    delay = get_limiter(provider).reserve(tokens)
+    if delay > 0:
+        logger.debug(f"⏳ {provider} rate limiter: waiting {delay:.2f}s")
+        await asyncio.sleep(delay)
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Delay before retrying a 429: Retry-After if given, else exponential with full jitter."""
+    parsed = parse_reset_duration(retry_after)
+    if parsed:
+        return min(parsed + random.uniform(0, 1), RATE_LIMIT_MAX_DELAY)
+    return random.uniform(0, min(RATE_LIMIT_BASE_DELAY * (2 ** attempt), RATE_LIMIT_MAX_DELAY))
+
+
+def register_429(provider, attempt, retry_after=None):
+    """Pauses every caller of this provider after a 429 and returns the delay used."""
+    delay = backoff_delay(attempt, retry_after)
+    get_limiter(provider).pause(delay)
+    logger.warning(f"🔁 {provider} returned 429 (attempt {attempt + 1}/{RATE_LIMIT_MAX_RETRIES}), backing off {delay:.1f}s.")
+    return delay
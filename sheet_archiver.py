@@ -0,0 +1,103 @@
+# sheet_archiver.py
+
+import re
+import logging
+import sheet_row_index
+import sheets_scheduler
+
+logger = logging.getLogger(__name__)
+
+stats = {"archives": 0, "rows_moved": 0, "delete_ranges": 0}
+
+NUMBER_RE = re.compile(r"^[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?$")
+
+
+def coalesce_rows(row_numbers):
+    """
+    Merges 1-based row numbers into contiguous (first, last) runs, bottom-most run first,
+    so deleting them in order never shifts a run that is still to be deleted.
+    """
+    runs = []
+    for row in sorted(set(int(r) for r in row_numbers if int(r) > 0), reverse=True):
+        if runs and runs[-1][0] == row + 1:
+            runs[-1][0] = row
+        else:
+            runs.append([row, row])
+    return [tuple(run) for run in runs]
+
+
+def build_delete_requests(sheet_numeric_id, row_numbers):
+    """One deleteDimension request per contiguous run of rows (spreadsheets.batchUpdate format)."""
+    return [
+        {"deleteDimension": {"range": {"sheetId": sheet_numeric_id, "dimension": "ROWS",
+                                       "startIndex": first - 1, "endIndex": last}}}
+        for first, last in coalesce_rows(row_numbers)
+    ]
+
+
+def _cell(value):
+    """Cell payload mirroring USER_ENTERED parsing for the values the sheets hold (numbers, formulas, text)."""
+    if isinstance(value, bool):
+        return {"userEnteredValue": {"boolValue": value}}
+    if isinstance(value, (int, float)):
+        return {"userEnteredValue": {"numberValue": value}}
+    text = "" if value is None else str(value)
+    if not text:
+        return {}  # Blank cell
+    if text.startswith("="):
+        return {"userEnteredValue": {"formulaValue": text}}
+    if NUMBER_RE.match(text.strip()):
+        number = int(text) if text.strip().lstrip("+-").isdigit() else float(text)
+        return {"userEnteredValue": {"numberValue": number}}
+    if text.upper() in ("TRUE", "FALSE"):
+        return {"userEnteredValue": {"boolValue": text.upper() == "TRUE"}}
+    return {"userEnteredValue": {"stringValue": text}}
+
+
+def build_append_request(sheet_numeric_id, rows):
+    """appendCells request adding rows after the last row with data."""
+    return {"appendCells": {
+        "sheetId": sheet_numeric_id,
+        "rows": [{"values": [_cell(value) for value in row]} for row in rows],
+        "fields": "userEnteredValue",
+    }}
+
+
+def _call(retry, operation, *args, **kwargs):
+    # Archiving never blocks the pipeline: it yields to queued status writes
+    with sheets_scheduler.priority(sheets_scheduler.LOW):
+        if retry:
+            return retry(operation, *args, **kwargs)
+        sheets_scheduler.acquire_for(operation)
+        return operation(*args, **kwargs)
+
+
+def archive_rows(source, target, row_numbers, rows, retry=None):
+    """
+    Moves rows from the source worksheet to the end of the target worksheet.
+
+    Args:
+        row_numbers: 1-based rows to delete from source.
+        rows: the row values to append to target, in the order they should appear.
+    Both worksheets in one spreadsheet: a single atomic spreadsheets.batchUpdate (appendCells +
+    one deleteDimension per contiguous run). Otherwise one values append plus one batchUpdate.
+    Returns the number of rows moved.
+    """
+    if not row_numbers:
+        return 0
+    delete_requests = build_delete_requests(source.id, row_numbers)
+    if source.spreadsheet.id == target.spreadsheet.id:
+        body = {"requests": [build_append_request(target.id, rows)] + delete_requests}
+        _call(retry, source.spreadsheet.batch_update, body)
+    else:
+        _call(retry, target.append_rows, rows, value_input_option="USER_ENTERED", insert_data_option="INSERT_ROWS")
+        _call(retry, source.spreadsheet.batch_update, {"requests": delete_requests})
+
+    sheet_row_index.note_delete(source, row_numbers)
+    sheet_row_index.note_append(target, [row[0] if row else "" for row in rows])
+    stats["archives"] += 1
+    stats["rows_moved"] += len(rows)
+    stats["delete_ranges"] += len(delete_requests)
+    logger.info(f"🗄️ Archived {len(rows)} rows from '{source.title}' to '{target.title}' "
+                f"({len(delete_requests)} delete range(s), one batch).")
+    return len(rows)
@@ -0,0 +1,196 @@
+# sheet_row_index.py
+
+import os
+import time
+import logging
+import threading
+import sheets_client
+import sheet_write_buffer
+import sheets_scheduler
+import sheet_snapshot
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# CONFIGURATION
+# ---------------------------------- #
+SHEET_ROW_INDEX_TTL = float(os.getenv("SHEET_ROW_INDEX_TTL", "900"))            # Full reload after N seconds (0 = never)
+SHEET_ROW_INDEX_MISS_RELOAD = float(os.getenv("SHEET_ROW_INDEX_MISS_RELOAD", "30"))  # Min seconds between reloads on a miss
+SHEET_ROW_GUARD = os.getenv("SHEET_ROW_GUARD", "true").lower() in ("1", "true", "yes")  # Re-check ID cells before flushing
+
+stats = {"loads": 0, "hits": 0, "misses": 0, "appends": 0, "deletes": 0, "stale_rows": 0}
+
+
+class RowIndex:
+    """
+    Product ID -> row number for one worksheet, built from a single read of the ID column.
+    Appends and deletes made by this process are applied locally, so lookups cost no API calls.
+    Changes made elsewhere (manual edits, other jobs) are caught by check_rows() before buffered
+    writes go out, by the TTL, and by a throttled reload when an ID is not found.
+    """
+
+    def __init__(self, worksheet, id_column=1, retry=None):
+        self.worksheet = worksheet
+        self.id_column = id_column
+        self.retry = retry
+        self._ids = None          # Column values; _ids[i] is the ID in row i + 1
+        self._rows = {}           # product id -> row number (first occurrence)
+        self._loaded_at = 0.0
+        self._lock = threading.RLock()
+
+    def _read_column(self):
+        if self.retry:
+            return self.retry(self.worksheet.col_values, self.id_column) or []
+        sheets_scheduler.acquire("read")
+        return self.worksheet.col_values(self.id_column) or []
+
+    def _rebuild(self):
+        self._rows = {}
+        for i, value in enumerate(self._ids):
+            if value and value not in self._rows:
+                self._rows[value] = i + 1
+
+    def load(self):
+        """(Re)reads the ID column: one API call."""
+        values = [str(v).strip() for v in self._read_column()]
+        with self._lock:
+            self._ids = values
+            self._rebuild()
+            self._loaded_at = time.monotonic()
+            stats["loads"] += 1
+        logger.debug(f"📇 Row index for '{getattr(self.worksheet, 'title', '?')}' loaded: {len(self._rows)} IDs.")
+
+    def _ensure_loaded(self):
+        with self._lock:
+            expired = SHEET_ROW_INDEX_TTL > 0 and time.monotonic() - self._loaded_at > SHEET_ROW_INDEX_TTL
+            if self._ids is None or expired:
+                self.load()
+
+    def get(self, product_id):
+        """Row number of product_id, or None if it is not in the sheet."""
+        key = str(product_id).strip()
+        self._ensure_loaded()
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None and time.monotonic() - self._loaded_at > SHEET_ROW_INDEX_MISS_RELOAD:
+                self.load()  # Maybe added outside this process since the last read
+                row = self._rows.get(key)
+        stats["hits" if row else "misses"] += 1
+        return row
+
+    def note_append(self, product_ids):
+        """Records rows appended at the bottom of the sheet (call after a successful append_rows)."""
+        with self._lock:
+            if self._ids is None:
+                return
+            for product_id in product_ids:
+                key = str(product_id).strip()
+                self._ids.append(key)
+                if key and key not in self._rows:
+                    self._rows[key] = len(self._ids)
+            stats["appends"] += len(product_ids)
+
+    def note_delete(self, rows):
+        """Records deleted rows (1-based row numbers as they were before the deletion)."""
+        with self._lock:
+            if self._ids is None:
+                return
+            for row in sorted(set(rows), reverse=True):
+                if 1 <= row <= len(self._ids):
+                    del self._ids[row - 1]
+            self._rebuild()
+            stats["deletes"] += len(rows)
+
+    def check_rows(self, expected):
+        """
+        Validator for sheet_write_buffer: re-reads the ID column once and returns
+        {row: new_row or None} for every row whose ID cell no longer holds the expected product.
+        """
+        self.load()
+        moved = {}
+        with self._lock:
+            for row, product_id in expected.items():
+                if row <= len(self._ids) and self._ids[row - 1] == product_id:
+                    continue
+                moved[row] = self._rows.get(product_id)
+        if moved:
+            stats["stale_rows"] += len(moved)
+            logger.warning(f"⚠️ {len(moved)} buffered row(s) in '{getattr(self.worksheet, 'title', '?')}' moved since queued; remapping.")
+        return moved
+
+    def invalidate(self):
+        with self._lock:
+            self._ids = None
+            self._rows = {}
+
+
+# ---------------------------------- #
+# REGISTRY & HELPERS
+# ---------------------------------- #
+_indexes = {}
+_registry_lock = threading.Lock()
+
+
+def get_row_index(worksheet, id_column=1, retry=None):
+    """Shared row index for this worksheet's ID column."""
+    key = (sheets_client.worksheet_key(worksheet), id_column)
+    with _registry_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = RowIndex(worksheet, id_column=id_column, retry=retry)
+        elif retry and not index.retry:
+            index.retry = retry
+    return index
+
+
+def find_row(worksheet, product_id, id_column=1, retry=None):
+    """Drop-in for worksheet.find(product_id, in_column=id_column).row; None if absent."""
+    return get_row_index(worksheet, id_column, retry).get(product_id)
+
+
+def get_guarded_buffer(worksheet, id_column=1, retry=None):
+    """The worksheet's write buffer, with guarded cells re-checked against this index before each flush."""
+    validator = get_row_index(worksheet, id_column, retry).check_rows if SHEET_ROW_GUARD else None
+    return sheet_write_buffer.get_buffer(worksheet, retry=retry, validator=validator)
+
+
+def queue_row_updates(worksheet, product_id, updates, id_column=1, retry=None):
+    """
+    Looks up the product's row and buffers {column_number: value} into it, guarded by the
+    product ID so the write follows the row if it moves before the flush.
+    Returns the row number, or None if the product is not in the sheet.
+    """
+    from gspread.utils import rowcol_to_a1
+    row = find_row(worksheet, product_id, id_column, retry)
+    if row is None:
+        return None
+    buffer = get_guarded_buffer(worksheet, id_column, retry)
+    guard = str(product_id).strip() if SHEET_ROW_GUARD else None
+    for col, value in updates.items():
+        buffer.queue(rowcol_to_a1(row, col), value, guard=guard)
+    return row
+
+
+def note_append(worksheet, product_ids, id_column=1):
+    index = _indexes.get((sheets_client.worksheet_key(worksheet), id_column))
+    if index:
+        index.note_append(product_ids)
+
+
+def note_delete(worksheet, rows, id_column=1):
+    sheet_snapshot.invalidate(worksheet)  # Rows below the deletion moved up
+    index = _indexes.get((sheets_client.worksheet_key(worksheet), id_column))
+    if index:
+        index.note_delete(rows)
+
+
+def invalidate(worksheet=None):
+    """Forgets cached rows for one worksheet, or all of them."""
+    with _registry_lock:
+        indexes = list(_indexes.values()) if worksheet is None else [
+            index for key, index in _indexes.items() if key[0] == sheets_client.worksheet_key(worksheet)
+        ]
+    for index in indexes:
+        index.invalidate()
@@ -0,0 +1,151 @@
+# sheet_snapshot.py
+
+import os
+import re
+import time
+import logging
+import threading
+import sheets_client
+import sheets_scheduler
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# CONFIGURATION
+# ---------------------------------- #
+SHEET_SNAPSHOT_ENABLED = os.getenv("SHEET_SNAPSHOT_ENABLED", "true").lower() in ("1", "true", "yes")
+SHEET_SNAPSHOT_TTL = float(os.getenv("SHEET_SNAPSHOT_TTL", "600"))  # Seconds a remembered cell value is trusted
+# Data rows (status, GIDs) are edited by people too: only elide a write against a very recent value there
+SHEET_SNAPSHOT_DATA_TTL = float(os.getenv("SHEET_SNAPSHOT_DATA_TTL", "15"))
+
+_snapshots = {}   # worksheet key -> {A1: (value, time.monotonic() when seen)}
+_lock = threading.Lock()
+
+stats = {"elided": 0, "written": 0, "recorded": 0}
+
+
+def _col_letter(col):
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def a1(row, col):
+    return f"{_col_letter(col)}{row}"
+
+
+def _normalize(value):
+    return "" if value is None else str(value)
+
+
+def record(worksheet, cells):
+    """Remembers {A1: value} as the sheet's current content (after a read or a successful write)."""
+    if not SHEET_SNAPSHOT_ENABLED or not cells:
+        return
+    now = time.monotonic()
+    key = sheets_client.worksheet_key(worksheet)
+    with _lock:
+        snapshot = _snapshots.setdefault(key, {})
+        for cell, value in cells.items():
+            snapshot[cell.upper()] = (_normalize(value), now)
+        stats["recorded"] += len(cells)
+
+
+def record_written(worksheet, cells):
+    """record() for cells this process just wrote; counted in the per-run report."""
+    stats["written"] += len(cells)
+    record(worksheet, cells)
+
+
+def forget(worksheet, cells):
+    """Drops remembered values of cells whose content is about to change (e.g. a write in flight)."""
+    with _lock:
+        snapshot = _snapshots.get(sheets_client.worksheet_key(worksheet))
+        if snapshot:
+            for cell in cells:
+                snapshot.pop(cell.upper(), None)
+
+
+def record_rows(worksheet, rows, start_row=1, width=None):
+    """Remembers a grid read with get_all_values()/get_values() starting at column A of start_row."""
+    cells = {}
+    for r, row in enumerate(rows):
+        for c in range(max(len(row), width or 0)):
+            cells[a1(start_row + r, c + 1)] = row[c] if c < len(row) else ""
+    record(worksheet, cells)
+
+
+def known(worksheet, cell, max_age=None):
+    """Last known value of a cell, or None if never seen or older than max_age (default SHEET_SNAPSHOT_TTL)."""
+    if not SHEET_SNAPSHOT_ENABLED:
+        return None
+    with _lock:
+        entry = _snapshots.get(sheets_client.worksheet_key(worksheet), {}).get(cell.upper())
+    if entry is None or time.monotonic() - entry[1] > (SHEET_SNAPSHOT_TTL if max_age is None else max_age):
+        return None
+    return entry[0]
+
+
+def known_row(worksheet, row, width):
+    """Known values of cells A..width in a row, or None if any of them is unknown."""
+    values = [known(worksheet, a1(row, col)) for col in range(1, width + 1)]
+    return None if any(value is None for value in values) else values
+
+
+def is_noop(worksheet, cell, value):
+    """
+    True (and counted as elided) if the sheet is known to hold this value already.
+    The header row is trusted for SHEET_SNAPSHOT_TTL; any other range only for SHEET_SNAPSHOT_DATA_TTL,
+    since a person may have changed e.g. a status cell since it was read.
+    """
+    max_age = SHEET_SNAPSHOT_TTL if re.fullmatch(r"[A-Za-z]+1", cell.strip()) else SHEET_SNAPSHOT_DATA_TTL
+    if known(worksheet, cell, max_age) == _normalize(value):
+        stats["elided"] += 1
+        return True
+    return False
+
+
+def invalidate(worksheet=None):
+    """Forgets remembered values, e.g. after rows were inserted/deleted and A1 addresses shifted."""
+    with _lock:
+        if worksheet is None:
+            _snapshots.clear()
+        else:
+            _snapshots.pop(sheets_client.worksheet_key(worksheet), None)
+
+
+def write_row_diff(worksheet, row, expected, current, retry=None):
+    """
+    Makes a row read as `expected` by writing only the cells that differ from `current`
+    (cells beyond `expected` that hold something are cleared). Returns the number of cells written.
+    """
+    updates = []
+    for col in range(1, max(len(expected), len(current)) + 1):
+        want = _normalize(expected[col - 1]) if col <= len(expected) else ""
+        have = _normalize(current[col - 1]) if col <= len(current) else ""
+        if want == have:
+            stats["elided"] += 1
+        else:
+            updates.append({"range": a1(row, col), "values": [[want]]})
+    if updates:
+        if retry:
+            retry(worksheet.batch_update, updates, value_input_option="USER_ENTERED")
+        else:
+            sheets_scheduler.acquire("write")
+            worksheet.batch_update(updates, value_input_option="USER_ENTERED")
+        record_written(worksheet, {u["range"]: u["values"][0][0] for u in updates})
+    return len(updates)
+
+
+def report(reset=True):
+    """Logs (and by default resets) how many cell writes were elided as no-ops this run."""
+    total = stats["elided"] + stats["written"]
+    logger.info(f"✂️ Sheet snapshot: elided {stats['elided']} of {total} cell writes ({stats['written']} written).")
+    summary = dict(stats)
+    if reset:
+        stats.update({"elided": 0, "written": 0, "recorded": 0})
+    return summary
@@ -0,0 +1,220 @@
+# sheet_write_buffer.py
+
+import os
+import re
+import time
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+import sheets_client
+import sheets_scheduler
+import sheet_snapshot
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# CONFIGURATION
+# ---------------------------------- #
+SHEET_WRITE_BEHIND = os.getenv("SHEET_WRITE_BEHIND", "true").lower() in ("1", "true", "yes")
+SHEET_WRITE_BATCH_SIZE = int(os.getenv("SHEET_WRITE_BATCH_SIZE", "200"))          # Cells per values.batchUpdate
+SHEET_WRITE_FLUSH_SECONDS = float(os.getenv("SHEET_WRITE_FLUSH_SECONDS", "10"))   # Max age of a buffered cell
+
+stats = {"queued": 0, "collapsed": 0, "flushes": 0, "cells_written": 0, "failed_flushes": 0,
+         "remapped": 0, "dropped": 0}
+
+A1_CELL_RE = re.compile(r"^([A-Za-z]+)(\d+)$")
+
+
+class SheetWriteBuffer:
+    """
+    Write-behind buffer for one worksheet. Cell updates are keyed by A1 range, so repeated
+    writes to the same cell collapse into the last value. Everything pending goes out as one
+    worksheet.batch_update (a single values.batchUpdate call).
+
+    Cells queued with guard=<product id> are checked right before the flush: the optional
+    validator({row: product_id}) returns {row: new_row or None} for rows whose ID cell no
+    longer matches, and those cells are moved to the new row or dropped.
+    """
+
+    def __init__(self, worksheet, retry=None, value_input_option="USER_ENTERED",
+                 batch_size=None, flush_seconds=None):
+        self.worksheet = worksheet
+        self.retry = retry
+        self.value_input_option = value_input_option
+        self.batch_size = batch_size or SHEET_WRITE_BATCH_SIZE
+        self.flush_seconds = SHEET_WRITE_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self._pending = OrderedDict()  # A1 range -> value
+        self._guards = {}              # A1 range -> product id expected in that row
+        self._oldest = None            # time.monotonic() of the oldest pending cell
+        self.validator = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def queue(self, a1_range, value, guard=None):
+        """Buffers one cell write; flushes when the batch is full (or immediately if write-behind is off)."""
+        with self._lock:
+            if sheet_snapshot.is_noop(self.worksheet, a1_range, value):
+                # The sheet already holds this value: nothing to send (and an older pending value is moot)
+                self._pending.pop(a1_range, None)
+                self._guards.pop(a1_range, None)
+                return
+            if a1_range in self._pending:
+                stats["collapsed"] += 1
+                del self._pending[a1_range]  # Re-insert so the cell keeps its latest position
+            self._pending[a1_range] = "" if value is None else str(value)
+            if guard is not None:
+                self._guards[a1_range] = str(guard).strip()
+            else:
+                self._guards.pop(a1_range, None)
+            self._oldest = self._oldest or time.monotonic()
+            stats["queued"] += 1
+            full = len(self._pending) >= self.batch_size
+        if full or not SHEET_WRITE_BEHIND:
+            self.flush()
+
+    def queue_many(self, updates, guard=None):
+        """Buffers [{"range": A1, "values": [[value]]}, ...] (the gspread batch_update format)."""
+        for update in updates:
+            self.queue(update["range"], update["values"][0][0], guard=guard)
+
+    def due(self):
+        with self._lock:
+            return bool(self._pending) and time.monotonic() - self._oldest >= self.flush_seconds
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Sends all pending cells in one batch_update. Failed cells stay buffered for the next flush."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return True
+                batch, self._pending, self._oldest = self._pending, OrderedDict(), None
+                guards, self._guards = self._guards, {}
+                sheet_snapshot.forget(self.worksheet, batch)  # In flight: not a no-op baseline until written
+            try:
+                # Status writes unblock the pipeline: they go ahead of other queued Sheets calls
+                with sheets_scheduler.priority(sheets_scheduler.HIGH):
+                    if guards and self.validator:
+                        batch, guards = self._revalidate(batch, guards)
+                    data = [{"range": a1, "values": [[value]]} for a1, value in batch.items()]
+                    if not data:
+                        return True
+                    if self.retry:
+                        self.retry(self.worksheet.batch_update, data, value_input_option=self.value_input_option)
+                    else:
+                        sheets_scheduler.acquire("write")
+                        self.worksheet.batch_update(data, value_input_option=self.value_input_option)
+                stats["flushes"] += 1
+                stats["cells_written"] += len(data)
+                sheet_snapshot.record_written(self.worksheet, batch)
+                logger.info(f"📝 Flushed {len(data)} buffered cell updates to '{getattr(self.worksheet, 'title', '?')}'.")
+                return True
+            except Exception as e:
+                stats["failed_flushes"] += 1
+                logger.error(f"❌ Buffered sheet write failed ({len(batch)} cells kept for retry): {e}")
+                with self._lock:
+                    # Newer values queued meanwhile win over the failed ones
+                    for a1, value in batch.items():
+                        if a1 not in self._pending:
+                            self._pending[a1] = value
+                            if a1 in guards:
+                                self._guards[a1] = guards[a1]
+                    self._oldest = self._oldest or time.monotonic()
+                return False
+
+    def _revalidate(self, batch, guards):
+        """Moves guarded cells whose row shifted since they were queued; drops cells whose product is gone."""
+        expected = {}
+        for a1, product_id in guards.items():
+            match = A1_CELL_RE.match(a1)
+            if match:
+                expected[int(match.group(2))] = product_id
+        moved = self.validator(expected) or {}
+        if not moved:
+            return batch, guards
+        sheet_snapshot.invalidate(self.worksheet)  # Rows shifted: remembered A1 values are off
+        new_batch, new_guards = OrderedDict(), {}
+        for a1, value in batch.items():
+            guard = guards.get(a1)
+            match = A1_CELL_RE.match(a1) if guard is not None else None
+            row = int(match.group(2)) if match else None
+            if row in moved:
+                if moved[row] is None:
+                    stats["dropped"] += 1
+                    logger.warning(f"⚠️ Dropped buffered write to {a1}: product {guard} is no longer in the sheet.")
+                    continue
+                a1 = f"{match.group(1)}{moved[row]}"
+                stats["remapped"] += 1
+            new_batch[a1] = value
+            if guard is not None:
+                new_guards[a1] = guard
+        return new_batch, new_guards
+
+
+# ---------------------------------- #
+# REGISTRY & BACKGROUND FLUSHER
+# ---------------------------------- #
+_buffers = {}
+_registry_lock = threading.Lock()
+_flusher = None
+_stop = threading.Event()
+
+
+def get_buffer(worksheet, retry=None, validator=None):
+    """Shared buffer for this worksheet (one per spreadsheet/worksheet across the whole pipeline)."""
+    key = sheets_client.worksheet_key(worksheet)
+    with _registry_lock:
+        buffer = _buffers.get(key)
+        if buffer is None:
+            buffer = _buffers[key] = SheetWriteBuffer(worksheet, retry=retry)
+            _start_flusher()
+        elif retry and not buffer.retry:
+            buffer.retry = retry
+        if validator and not buffer.validator:
+            buffer.validator = validator
+    return buffer
+
+
+def _flush_loop():
+    while not _stop.wait(max(0.5, SHEET_WRITE_FLUSH_SECONDS / 4)):
+        with _registry_lock:
+            buffers = list(_buffers.values())
+        for buffer in buffers:
+            if buffer.due():
+                buffer.flush()
+
+
+def _start_flusher():
+    global _flusher
+    if _flusher is None and SHEET_WRITE_BEHIND and SHEET_WRITE_FLUSH_SECONDS > 0:
+        _flusher = threading.Thread(target=_flush_loop, name="sheet-write-flusher", daemon=True)
+        _flusher.start()
+
+
+def flush_all():
+    """Flushes every buffer. Call at job completion and before reading rows this run may have written."""
+    with _registry_lock:
+        buffers = list(_buffers.values())
+    return all([buffer.flush() for buffer in buffers])
+
+
+def pending_count():
+    with _registry_lock:
+        buffers = list(_buffers.values())
+    return sum(buffer.pending_count() for buffer in buffers)
+
+
+def _shutdown():
+    _stop.set()
+    if pending_count():
+        logger.info("📝 Flushing buffered sheet writes before exit...")
+        flush_all()
+
+
+atexit.register(_shutdown)
@@ -0,0 +1,149 @@
+# sheets_client.py
+
+import os
+import logging
+import threading
+import gspread
+import sheets_scheduler
+from google.oauth2 import service_account
+from google.auth.transport.requests import Request
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# CONFIGURATION
+# ---------------------------------- #
+GOOGLE_CREDENTIALS_FILE = os.getenv("GOOGLE_CREDENTIALS_FILE", "credentials.json")
+GOOGLE_CREDENTIALS_FALLBACK_FILE = os.getenv(
+    "GOOGLE_CREDENTIALS_FALLBACK_FILE", os.path.expanduser("~/.config/gspread/service_account.json")
+)
+SHEETS_BACKEND = os.getenv("SHEETS_BACKEND", "google").lower()  # "fake": in-process fake_sheets (offline benchmarks/tests)
+SHEETS_SCOPES = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+
+_lock = threading.RLock()
+_credentials = {}   # credentials file -> google-auth credentials
+_clients = {}       # credentials file -> gspread.Client
+_spreadsheets = {}  # (credentials file, sheet id) -> gspread.Spreadsheet
+_worksheets = {}    # (credentials file, sheet id, worksheet name) -> gspread.Worksheet
+_services = threading.local()  # Discovery clients (httplib2) are not thread-safe: one per thread
+
+stats = {"authorizations": 0, "spreadsheet_opens": 0, "worksheet_opens": 0, "cache_hits": 0}
+
+
+def _resolve_credentials_file(credentials_file=None):
+    if credentials_file:
+        return credentials_file
+    if os.path.exists(GOOGLE_CREDENTIALS_FILE) or not os.path.exists(GOOGLE_CREDENTIALS_FALLBACK_FILE):
+        return GOOGLE_CREDENTIALS_FILE
+    logger.warning(f"⚠️ {GOOGLE_CREDENTIALS_FILE} not found, using {GOOGLE_CREDENTIALS_FALLBACK_FILE}")
+    return GOOGLE_CREDENTIALS_FALLBACK_FILE
+
+
+def get_credentials(credentials_file=None):
+    """Service-account credentials (loaded once per file), refreshed when the token is expired."""
+    path = _resolve_credentials_file(credentials_file)
+    with _lock:
+        creds = _credentials.get(path)
+        if creds is None:
+            creds = service_account.Credentials.from_service_account_file(path, scopes=SHEETS_SCOPES)
+            _credentials[path] = creds
+        if not creds.valid:
+            creds.refresh(Request())
+            logger.debug(f"🔐 Refreshed Google access token ({path})")
+    return creds
+
+
+def get_client(credentials_file=None):
+    """Shared, lazily authorized gspread client. Raises if the credentials cannot be loaded."""
+    if SHEETS_BACKEND == "fake":
+        import fake_sheets
+        return fake_sheets.get_client()
+    path = _resolve_credentials_file(credentials_file)
+    client = _clients.get(path)
+    if client is not None:
+        get_credentials(path)  # Keeps the token fresh for long-running jobs
+        return client
+    with _lock:
+        if path not in _clients:
+            _clients[path] = gspread.authorize(get_credentials(path))
+            stats["authorizations"] += 1
+            logger.info(f"🔐 Google Sheets client authorized using: {path}")
+        return _clients[path]
+
+
+def get_spreadsheet(sheet_id, credentials_file=None):
+    """Cached spreadsheet handle (one open_by_key per process)."""
+    path = _resolve_credentials_file(credentials_file)
+    key = (path, sheet_id)
+    spreadsheet = _spreadsheets.get(key)
+    if spreadsheet is not None:
+        stats["cache_hits"] += 1
+        return spreadsheet
+    client = get_client(path)
+    sheets_scheduler.acquire("read")  # Outside the lock: a quota wait must not stall other threads' opens
+    with _lock:
+        if key not in _spreadsheets:  # Re-check: another thread may have opened it while we waited
+            _spreadsheets[key] = client.open_by_key(sheet_id)
+            stats["spreadsheet_opens"] += 1
+        return _spreadsheets[key]
+
+
+def get_worksheet(worksheet_name, sheet_id, credentials_file=None):
+    """Cached worksheet handle. Raises gspread.WorksheetNotFound like Spreadsheet.worksheet()."""
+    path = _resolve_credentials_file(credentials_file)
+    key = (path, sheet_id, worksheet_name)
+    worksheet = _worksheets.get(key)
+    if worksheet is not None:
+        stats["cache_hits"] += 1
+        return worksheet
+    spreadsheet = get_spreadsheet(sheet_id, path)
+    sheets_scheduler.acquire("read")  # Outside the lock: a quota wait must not stall other threads' opens
+    with _lock:
+        if key not in _worksheets:  # Re-check: another thread may have opened it while we waited
+            _worksheets[key] = spreadsheet.worksheet(worksheet_name)
+            stats["worksheet_opens"] += 1
+        return _worksheets[key]
+
+
+def get_sheets_service(credentials_file=None):
+    """Sheets API v4 discovery client for the current thread, sharing the cached credentials."""
+    if SHEETS_BACKEND == "fake":
+        import fake_sheets
+        return fake_sheets.get_service()
+    from googleapiclient.discovery import build
+    path = _resolve_credentials_file(credentials_file)
+    services = getattr(_services, "by_path", None)
+    if services is None:
+        services = _services.by_path = {}
+    if path not in services:
+        services[path] = build("sheets", "v4", credentials=get_credentials(path), cache_discovery=False)
+        logger.debug(f"Google Sheets API service built for thread {threading.current_thread().name}")
+    return services[path]
+
+
+def worksheet_key(worksheet):
+    """Stable identity of a worksheet handle: (spreadsheet id, worksheet id or title)."""
+    spreadsheet_id = getattr(worksheet, "spreadsheet_id", None) or getattr(getattr(worksheet, "spreadsheet", None), "id", None)
+    worksheet_id = getattr(worksheet, "id", None)
+    return (spreadsheet_id, worksheet_id if worksheet_id is not None else getattr(worksheet, "title", None))
+
+
+def invalidate(sheet_id=None, worksheet_name=None):
+    """
+    Drops cached handles, e.g. after a worksheet was renamed/recreated or a call failed with a stale handle.
+    No arguments clears everything, including clients.
+    """
+    with _lock:
+        if sheet_id is None and worksheet_name is None:
+            _clients.clear()
+            _spreadsheets.clear()
+            _worksheets.clear()
+            _credentials.clear()
+            return
+        for key in [k for k in _worksheets if (sheet_id is None or k[1] == sheet_id) and (worksheet_name is None or k[2] == worksheet_name)]:
+            del _worksheets[key]
+        if worksheet_name is None:
+            for key in [k for k in _spreadsheets if k[1] == sheet_id]:
+                del _spreadsheets[key]
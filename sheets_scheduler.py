@@ -0,0 +1,148 @@
+# sheets_scheduler.py
+
+import os
+import time
+import heapq
+import logging
+import itertools
+import threading
+from collections import deque
+from contextlib import contextmanager
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# CONFIGURATION
+# ---------------------------------- #
+# Google Sheets API quotas are per minute, per user (a service account is one user) and per project.
+# The defaults are the per-user quotas, the tighter of the two.
+SHEETS_READS_PER_MINUTE = int(os.getenv("SHEETS_READS_PER_MINUTE", "60"))
+SHEETS_WRITES_PER_MINUTE = int(os.getenv("SHEETS_WRITES_PER_MINUTE", "60"))
+SHEETS_QUOTA_HEADROOM = float(os.getenv("SHEETS_QUOTA_HEADROOM", "0.9"))  # Use at most this share of each quota
+SHEETS_429_PAUSE = float(os.getenv("SHEETS_429_PAUSE", "10"))             # Seconds a 429 pauses its quota
+
+WINDOW_SECONDS = 60.0
+
+# Priorities: lower runs first when calls are queued on the same quota
+HIGH = 0     # Status writes/flushes that unblock the pipeline
+NORMAL = 1
+LOW = 2      # Bulk reads, archiving, header maintenance
+
+READ_OPERATIONS = {
+    "get_all_values", "get_all_records", "get_values", "col_values", "row_values", "cell", "acell",
+    "find", "findall", "batch_get", "get", "open_by_key", "worksheet", "worksheets", "fetch_sheet_metadata",
+}
+
+stats = {"acquired": 0, "queued": 0, "waited_seconds": 0.0, "throttled_429": 0}
+
+
+class _Quota:
+    """Sliding 60 s window of request timestamps, with a priority queue of waiting callers."""
+
+    def __init__(self, name, per_minute):
+        self.name = name
+        self.limit = max(1, int(per_minute * SHEETS_QUOTA_HEADROOM))
+        self.sent = deque()          # time.monotonic() of requests in the current window
+        self.waiting = []            # heap of (priority, seq)
+        self.paused_until = 0.0
+        self.cond = threading.Condition()
+
+    def _expire(self, now):
+        while self.sent and now - self.sent[0] >= WINDOW_SECONDS:
+            self.sent.popleft()
+
+    def _delay(self, now):
+        self._expire(now)
+        delay = self.paused_until - now
+        if len(self.sent) >= self.limit:
+            delay = max(delay, self.sent[0] + WINDOW_SECONDS - now)
+        return max(delay, 0.0)
+
+    def acquire(self, priority):
+        ticket = (priority, next(_sequence))
+        started = time.monotonic()
+        with self.cond:
+            heapq.heappush(self.waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = self._delay(now)
+                    if self.waiting[0] == ticket and delay <= 0:
+                        self.sent.append(now)
+                        break
+                    # Wake on our turn or when the window frees up (a newcomer may outrank us meanwhile)
+                    self.cond.wait(timeout=delay if self.waiting[0] == ticket else None)
+            finally:
+                self.waiting.remove(ticket)
+                heapq.heapify(self.waiting)
+                self.cond.notify_all()
+        waited = time.monotonic() - started
+        stats["acquired"] += 1
+        if waited > 0.01:
+            stats["queued"] += 1
+            stats["waited_seconds"] += waited
+            logger.debug(f"⏳ Sheets {self.name} quota: waited {waited:.2f}s ({len(self.sent)}/{self.limit} in window)")
+
+    def pause(self, seconds):
+        with self.cond:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.cond.notify_all()
+
+    def usage(self):
+        with self.cond:
+            now = time.monotonic()
+            self._expire(now)
+            return {
+                "used": len(self.sent),
+                "limit": self.limit,
+                "waiting": len(self.waiting),
+                "paused_for": round(max(self.paused_until - now, 0.0), 2),
+            }
+
+
+_sequence = itertools.count()
+_quotas = {"read": _Quota("read", SHEETS_READS_PER_MINUTE), "write": _Quota("write", SHEETS_WRITES_PER_MINUTE)}
+_local = threading.local()
+
+
+def kind_of(operation):
+    """'read' or 'write' for a gspread/API callable, by its name."""
+    return "read" if getattr(operation, "__name__", "") in READ_OPERATIONS else "write"
+
+
+def current_priority():
+    return getattr(_local, "priority", NORMAL)
+
+
+@contextmanager
+def priority(level):
+    """Runs the Sheets calls made inside the block (in this thread) at the given priority."""
+    previous = current_priority()
+    _local.priority = level
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+
+def acquire(kind, level=None):
+    """Blocks until one request of this kind ('read'/'write') fits in the quota window."""
+    _quotas[kind].acquire(current_priority() if level is None else level)
+
+
+def acquire_for(operation):
+    acquire(kind_of(operation))
+
+
+def register_429(kind):
+    """A 429 means the window estimate was off (other clients share the project): pause the quota briefly."""
+    stats["throttled_429"] += 1
+    _quotas[kind].pause(SHEETS_429_PAUSE)
+    logger.warning(f"🔁 Sheets {kind} quota exceeded (429), pausing {kind}s for {SHEETS_429_PAUSE:.0f}s.")
+
+
+def usage():
+    """Current per-minute usage per quota plus scheduler counters."""
+    return {"read": _quotas["read"].usage(), "write": _quotas["write"].usage(), "stats": dict(stats)}
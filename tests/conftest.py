@@ -0,0 +1,29 @@
+# tests/conftest.py
+# Runs the Sheets logic against the in-process fake_sheets backend (no network, no credentials).
+import os
+import sys
+
+os.environ["SHEETS_BACKEND"] = "fake"
+os.environ.setdefault("SHEETS_READS_PER_MINUTE", "1000000")
+os.environ.setdefault("SHEETS_WRITES_PER_MINUTE", "1000000")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture
+def fake_sheets():
+    """Fresh fake spreadsheets and empty handle/row caches for every test."""
+    import fake_sheets
+    import sheets_client
+    import sheet_row_index
+    import sheet_snapshot
+    fake_sheets.reset()
+    sheets_client.invalidate()
+    sheet_row_index.invalidate()
+    sheet_snapshot.invalidate()
+    yield fake_sheets
+    fake_sheets.reset()
+    sheets_client.invalidate()
+    sheet_row_index.invalidate()
+    sheet_snapshot.invalidate()
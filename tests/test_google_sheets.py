@@ -0,0 +1,55 @@
+# tests/test_google_sheets.py
+import pytest
+
+pytest.importorskip("pandas")
+import google_sheets
+
+
+def test_diff_sales_against_sheets():
+    sales = [
+        {"product_id": "1", "title": "New", "sales_count": 5},
+        {"product_id": "2", "title": "Pending", "sales_count": 3},
+        {"product_id": "3", "title": "Done", "sales_count": 7},
+        {"product_id": "4", "title": "Archived", "sales_count": 1},
+        {"product_id": "5", "title": "Unchanged", "sales_count": 2},
+        {"product_id": "", "title": "No id", "sales_count": 9},
+    ]
+    sheet1 = [
+        {"Product ID": "2", "Status": "PENDING", "Sales Count": 1},
+        {"Product ID": "3", "Status": "done", "Sales Count": 2},
+        {"Product ID": "5", "Status": "PROCESSING", "Sales Count": "2"},
+    ]
+    sheet2 = [{"Product ID": "4"}]
+
+    new_rows, updates = google_sheets._diff_sales_against_sheets(sales, sheet1, sheet2)
+
+    assert new_rows == [["1", "New", 5, "PENDING", "", "", ""]]
+    assert updates == [{"range": "C2", "values": [[3]]}]
+
+
+def test_diff_sales_keeps_last_duplicate_and_blank_count():
+    sales = [
+        {"product_id": "7", "title": "First", "sales_count": 1},
+        {"product_id": "7", "title": "Last", "sales_count": None},
+    ]
+    new_rows, updates = google_sheets._diff_sales_against_sheets(sales, [], [])
+    assert new_rows == [["7", "Last", "", "PENDING", "", "", ""]]
+    assert updates == []
+
+
+def test_move_done_to_sheet2_forgets_archived_products(fake_sheets, tmp_path, monkeypatch):
+    import pipeline_state
+    monkeypatch.setattr(pipeline_state, "PIPELINE_STATE_DB", str(tmp_path / "pipeline_state.db"))
+    monkeypatch.setattr(pipeline_state, "_conn", None)
+    header = ["Product ID", "Product Title", "Status"]
+    fake_sheets.seed(google_sheets.GOOGLE_SHEET_ID, "Sheet1", [header, ["1", "A", "DONE"], ["2", "B", "PENDING"]])
+    fake_sheets.seed(google_sheets.GOOGLE_SHEET_ID, "Sheet2", [header])
+    pipeline_state.set_state("1", "store_de", "DONE")
+    pipeline_state.set_state("2", "store_de", "PENDING")
+
+    google_sheets.move_done_to_sheet2()
+
+    assert fake_sheets.contents(google_sheets.GOOGLE_SHEET_ID, "Sheet2") == [header, ["1", "A", "DONE"]]
+    assert pipeline_state.get_product("1") == {}
+    assert pipeline_state.get("2", "store_de")["status"] == "PENDING"
+    pipeline_state._conn.close()
@@ -0,0 +1,53 @@
+# tests/test_llm_batch.py
+import os
+import pytest
+
+import llm_batch
+from llm_stream_parser import is_complete_output
+
+COMPLETE = "Product Title: A | B\nShort Introduction: Hi\nProduct Advantages:\n- x: y\nCall to Action: Buy\n"
+
+
+@pytest.fixture
+def batch_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_batch, "LLM_BATCH_DIR", str(tmp_path))
+    monkeypatch.setattr(llm_batch, "LLM_BATCH_STATE_FILE", os.path.join(str(tmp_path), "pending_batch.json"))
+    return tmp_path
+
+
+def _submit(provider, custom_ids):
+    requests_list = [llm_batch.build_request(cid, "deepseek-chat", [{"role": "user", "content": cid}]) for cid in custom_ids]
+    items = {cid: {"pid": cid, "store": "store_de", "kind": "description"} for cid in custom_ids}
+    return llm_batch.submit_batch(requests_list, items, provider=provider)
+
+
+def test_non_openai_requests_never_use_the_openai_batch_api():
+    assert isinstance(llm_batch.get_batch_provider("auto", "deepseek"), llm_batch.LocalFileBatchProvider)
+    provider = llm_batch.get_batch_provider("openai", "deepseek")
+    assert isinstance(provider, llm_batch.LocalFileBatchProvider)
+    assert provider.llm_provider == "deepseek"
+
+
+def test_truncated_and_incomplete_outputs_are_dropped(batch_dir):
+    answers = {
+        "ok": COMPLETE,
+        "cut": (COMPLETE[:40], "length"),
+        "partial": COMPLETE.split("Call to Action")[0],
+    }
+    provider = llm_batch.LocalFileBatchProvider(responder=lambda body: answers[body["messages"][0]["content"]])
+    _submit(provider, list(answers))
+
+    collected = llm_batch.collect_pending_batch(provider=provider, validate=is_complete_output)
+
+    assert collected["ok"]["output"] == COMPLETE.strip()
+    assert collected["cut"]["output"] is None
+    assert collected["partial"]["output"] is None
+
+
+def test_state_survives_collection_until_cleared(batch_dir):
+    provider = llm_batch.LocalFileBatchProvider(responder=lambda body: COMPLETE)
+    _submit(provider, ["p1"])
+    assert llm_batch.collect_pending_batch(provider=provider)["p1"]["output"]
+    assert llm_batch.load_pending_batch()["llm_provider"] == "deepseek"
+    llm_batch.clear_pending_batch()
+    assert llm_batch.load_pending_batch() is None
@@ -0,0 +1,60 @@
+# tests/test_llm_stream_parser.py
+from llm_stream_parser import SectionStreamParser, SECTION_LABELS, MALFORMED_PROBE_CHARS, is_complete_output, parse_sections
+
+OUTPUT = (
+    "**Product Title:** Anna | Leichte Sommerjacke\n"
+    "Short Introduction: Perfekt für warme Abende.\n"
+    "Product Advantages:\n"
+    "- Atmungsaktiv: luftiger Stoff\n"
+    "- Leicht: nur 200 g\n"
+    "Call to Action: Jetzt bestellen!\n"
+)
+
+
+def _feed(parser, text, size=7):
+    for i in range(0, len(text), size):
+        parser.feed(text[i:i + size])
+
+
+def test_sections_emitted_in_order_and_complete_before_finish():
+    seen = []
+    parser = SectionStreamParser(on_section=lambda label, text: seen.append(label))
+    _feed(parser, OUTPUT)
+    assert parser.is_complete and not parser.is_malformed
+    assert seen == SECTION_LABELS
+    assert parser.sections["Product Title"] == "Anna | Leichte Sommerjacke"
+    assert parser.sections["Product Advantages"].splitlines() == ["- Atmungsaktiv: luftiger Stoff", "- Leicht: nur 200 g"]
+
+
+def test_last_section_needs_line_end_or_finish():
+    parser = SectionStreamParser()
+    _feed(parser, OUTPUT.rstrip("\n"))
+    assert not parser.is_complete
+    assert parser.finish()["Call to Action"] == "Jetzt bestellen!"
+    assert parser.is_complete
+
+
+def test_localized_labels():
+    text = ("Produkttitel: Anna | Jacke\nKurze Einführung: Hallo\n"
+            "Produktvorteile:\n- A: b\nHandlungsaufforderung: Kaufen\n")
+    assert set(parse_sections(text)) == set(SECTION_LABELS)
+
+
+def test_no_label_is_malformed():
+    parser = SectionStreamParser()
+    _feed(parser, "Hier ist Ihre Übersetzung ohne jede Struktur. " * (MALFORMED_PROBE_CHARS // 20))
+    assert parser.is_malformed
+    assert "no section label" in parser.malformed_reason
+
+
+def test_repeated_label_is_malformed():
+    parser = SectionStreamParser()
+    _feed(parser, "Product Title: A\nShort Introduction: B\nProduct Title: C\n")
+    assert parser.is_malformed
+    assert "repeated" in parser.malformed_reason
+
+
+def test_is_complete_output():
+    assert is_complete_output(OUTPUT)
+    assert not is_complete_output(OUTPUT.split("Call to Action")[0])
+    assert not is_complete_output("")
@@ -0,0 +1,29 @@
+# tests/test_model_policy.py
+import json
+
+from model_policy import store_model_policy, resolve_model
+
+STORES = [
+    {"value": "store_de", "shopify_store_url": "https://de-shop.myshopify.com", "model_policy": {"openai": {"title": "gpt-4o-mini"}}},
+    {"value": "store_es", "shopify_store_url": "es-shop.myshopify.com/"},
+]
+
+
+def test_store_model_policy_by_value_and_url(monkeypatch):
+    monkeypatch.setenv("SHOPIFY_STORES_CONFIG", json.dumps(STORES))
+    assert store_model_policy(store_value="store_de") == STORES[0]["model_policy"]
+    assert store_model_policy(store_url="de-shop.myshopify.com") == STORES[0]["model_policy"]
+    assert store_model_policy(store_url="https://es-shop.myshopify.com") is None
+    assert store_model_policy(store_value="store_xx", store_url="de-shop.myshopify.com") is None
+
+
+def test_store_policy_drives_model_choice(monkeypatch):
+    monkeypatch.setenv("SHOPIFY_STORES_CONFIG", json.dumps(STORES))
+    assert resolve_model("openai", "title", store_model_policy(store_url="https://de-shop.myshopify.com")) == "gpt-4o-mini"
+
+
+def test_missing_or_invalid_config(monkeypatch):
+    monkeypatch.delenv("SHOPIFY_STORES_CONFIG", raising=False)
+    assert store_model_policy(store_value="store_de") is None
+    monkeypatch.setenv("SHOPIFY_STORES_CONFIG", "{not json")
+    assert store_model_policy(store_value="store_de") is None
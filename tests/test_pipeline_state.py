@@ -0,0 +1,51 @@
+# tests/test_pipeline_state.py
+import time
+import pytest
+
+import pipeline_state
+
+
+@pytest.fixture
+def state_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline_state, "PIPELINE_STATE_DB", str(tmp_path / "pipeline_state.db"))
+    monkeypatch.setattr(pipeline_state, "_conn", None)
+    yield pipeline_state
+    if pipeline_state._conn is not None:
+        pipeline_state._conn.close()
+
+
+def _sync(state_db):
+    state_db.mark_synced(state_db.pending_sync(), time.time() + 1)
+
+
+def test_unknown_product_is_adopted(state_db):
+    assert state_db.merge_from_sheet([("100", "store_de", "PENDING", "", "")]) == 1
+    assert state_db.get("100", "store_de")["status"] == "PENDING"
+
+
+def test_unmirrored_local_state_wins(state_db):
+    state_db.set_state("100", "store_de", "DONE", gid="gid://shopify/Product/1", title="Titel")
+    assert state_db.merge_from_sheet([("100", "store_de", "PENDING", "", "")]) == 0
+    assert state_db.get("100", "store_de")["status"] == "DONE"
+    assert state_db.pending_sync()  # Still waiting to be pushed
+
+
+def test_human_edit_on_sheet_wins_over_local(state_db):
+    state_db.set_state("100", "store_de", "DONE", gid="g1", title="Titel")
+    _sync(state_db)
+
+    assert state_db.merge_from_sheet([("100", "store_de", "APPROVED", "g1", "Titel")]) == 1
+    state = state_db.get("100", "store_de")
+    assert state["status"] == "APPROVED"
+    assert state["sheet_status"] == "APPROVED"
+    assert not state_db.pending_sync()  # Adopted from the sheet, nothing to push back
+
+
+def test_unchanged_sheet_keeps_newer_local_state(state_db):
+    state_db.set_state("100", "store_de", "PROCESSING")
+    _sync(state_db)
+    time.sleep(0.01)
+    state_db.set_state("100", "store_de", "DONE", gid="g1", title="Titel")
+
+    assert state_db.merge_from_sheet([("100", "store_de", "PROCESSING", "", "")]) == 0
+    assert state_db.get("100", "store_de")["status"] == "DONE"
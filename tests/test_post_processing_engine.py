@@ -0,0 +1,24 @@
+# tests/test_post_processing_engine.py
+import pytest
+
+pytest.importorskip("jinja2")
+from post_processing_engine import post_process_batch, post_process_description
+
+STRUCTURED = ("Product Title: Anna | Sommerjacke\nShort Introduction: Leicht und luftig.\n"
+              "Product Advantages:\n- Atmungsaktiv: luftiger Stoff\n- Leicht: nur 200 g\n"
+              "Call to Action: Jetzt bestellen!\n")
+PRODUCT = {"id": 1, "title": "Anna | Summer jacket", "images": [{"src": "https://cdn.example.com/a.jpg"}]}
+
+
+def test_batch_matches_single_calls_in_order():
+    items = [
+        {"original_html": "<p>x</p>", "new_html": STRUCTURED, "method": "deepseek", "product_data": PRODUCT, "target_lang": "de"},
+        {"original_html": "<p>x</p>", "new_html": "<p>Hallo Welt</p>", "method": "google", "product_data": PRODUCT, "target_lang": "de"},
+        {"original_html": "<p>x</p>", "new_html": "", "method": "chatgpt", "product_data": PRODUCT, "target_lang": "de"},
+        {"original_html": "<p>x</p>", "new_html": STRUCTURED, "method": "chatgpt", "product_data": PRODUCT, "target_lang": "de"},
+    ]
+    assert post_process_batch(items) == [post_process_description(**item) for item in items]
+
+
+def test_batch_of_nothing():
+    assert post_process_batch([]) == []
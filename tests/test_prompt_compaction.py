@@ -0,0 +1,26 @@
+# tests/test_prompt_compaction.py
+import pytest
+
+pytest.importorskip("bs4")
+import html_utils
+import prompt_compaction
+
+DESCRIPTION = ("<h2>Title <b>bold</b></h2><p>Intro <span>inline</span> text.<img src='x.jpg'></p>"
+               "<ul><li>One <em>a</em></li><li>Two</li></ul><div>Loose<p>Nested</p>tail</div>"
+               "<!-- note --><script>track()</script><p>Intro <span>inline</span> text.</p>")
+
+
+@pytest.mark.parametrize("backend", ["lxml", "html.parser"])
+def test_compact_description_structure(backend, monkeypatch):
+    if backend == "lxml" and html_utils.lxml_html is None:
+        pytest.skip("lxml not installed")
+    monkeypatch.setattr(html_utils, "WRITE_BACKEND", backend)
+    assert prompt_compaction.compact_description(DESCRIPTION) == (
+        "## Title bold\nIntro inline text.\n- One a\n- Two\nLoose\nNested\ntail\nIntro inline text."
+    )
+
+
+def test_compact_description_plain_text_and_cap():
+    assert prompt_compaction.compact_description("plain\n\n  text   here\nplain") == "plain\ntext here\nplain"
+    long_text = "First sentence here. " * 10
+    assert prompt_compaction.compact_description(long_text, max_chars=50) == "First sentence here. First sentence here."
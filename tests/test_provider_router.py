@@ -0,0 +1,40 @@
+# tests/test_provider_router.py
+import pytest
+
+import provider_router
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setenv("DEEPL_API_KEY", "test")
+    monkeypatch.setattr(provider_router, "ROUTER_HEDGING", False)
+    return provider_router.ProviderRouter(min_samples=2, equivalence={"default": [["google", "deepl"]]})
+
+
+def _fail():
+    raise RuntimeError("503 from provider")
+
+
+def test_failing_primary_falls_back_to_equivalent(router):
+    result = router.call("description", "google", {"google": _fail, "deepl": lambda: "Hallo"}, "Hello")
+    assert result == "Hallo"
+    assert router.stats("google")["error_rate"] == 1.0
+    assert router.stats("google")["p95"] is None  # Failures never count as latency samples
+    assert router.stats("deepl")["error_rate"] == 0.0
+
+
+def test_every_provider_failing_keeps_original(router):
+    assert router.call("description", "google", {"google": _fail, "deepl": _fail}, "Hello") == "Hello"
+
+
+def test_unchanged_text_is_a_success(router):
+    calls = {"google": lambda: "XL", "deepl": _fail}
+    assert router.call("variants", "google", calls, "XL") == "XL"
+    assert router.stats("google")["error_rate"] == 0.0
+    assert router.stats("deepl")["samples"] == 0
+
+
+def test_unhealthy_primary_is_demoted(router):
+    for _ in range(2):
+        router.call("description", "google", {"google": _fail, "deepl": lambda: "Hallo"}, "Hello")
+    assert router.candidates("description", "google") == ["deepl", "google"]
@@ -0,0 +1,45 @@
+# tests/test_sheet_archiver.py
+import sheet_archiver
+import sheets_client
+
+HEADER = ["Product ID", "Product Title", "Status"]
+
+
+def test_coalesce_rows_bottom_run_first():
+    assert sheet_archiver.coalesce_rows([2, 3, 4, 7, 9, 10, 3]) == [(9, 10), (7, 7), (2, 4)]
+
+
+def test_coalesce_rows_ignores_header_offsets_and_strings():
+    assert sheet_archiver.coalesce_rows(["5", 0, -1, "6"]) == [(5, 6)]
+    assert sheet_archiver.coalesce_rows([]) == []
+
+
+def test_build_delete_requests_are_zero_based_half_open():
+    requests = sheet_archiver.build_delete_requests(7, [2, 3, 5])
+    ranges = [r["deleteDimension"]["range"] for r in requests]
+    assert [(r["startIndex"], r["endIndex"]) for r in ranges] == [(4, 5), (1, 3)]
+    assert all(r["sheetId"] == 7 and r["dimension"] == "ROWS" for r in ranges)
+
+
+def test_archive_rows_keeps_row_order(fake_sheets):
+    rows = [HEADER] + [[str(1000000 + i), f"Product {i}", "DONE" if i % 2 else "PENDING"] for i in range(1, 9)]
+    fake_sheets.seed("sheet-id", "Sheet1", rows)
+    fake_sheets.seed("sheet-id", "Sheet2", [HEADER])
+    source = sheets_client.get_worksheet("Sheet1", "sheet-id")
+    target = sheets_client.get_worksheet("Sheet2", "sheet-id")
+
+    done = [(n, row) for n, row in enumerate(rows, start=1) if row[2] == "DONE"]
+    moved = sheet_archiver.archive_rows(source, target, [n for n, _ in done], [row for _, row in done])
+
+    assert moved == 4
+    assert fake_sheets.contents("sheet-id", "Sheet2") == [HEADER] + [row for _, row in done]
+    assert fake_sheets.contents("sheet-id", "Sheet1") == [HEADER] + [row for row in rows[1:] if row[2] != "DONE"]
+
+
+def test_archive_rows_without_rows_is_a_noop(fake_sheets):
+    fake_sheets.seed("sheet-id", "Sheet1", [HEADER, ["1000001", "A", "DONE"]])
+    fake_sheets.seed("sheet-id", "Sheet2", [HEADER])
+    source = sheets_client.get_worksheet("Sheet1", "sheet-id")
+    target = sheets_client.get_worksheet("Sheet2", "sheet-id")
+    assert sheet_archiver.archive_rows(source, target, [], []) == 0
+    assert fake_sheets.contents("sheet-id", "Sheet1") == [HEADER, ["1000001", "A", "DONE"]]
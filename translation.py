@@ -5,15 +5,24 @@ import sys
 from dotenv import load_dotenv
 load_dotenv()
 import uuid
+import time
 from langdetect import detect, LangDetectException # Moved import here
 import requests
 import logging
 import openai # Keep this import
 import re
 from openai import OpenAI # Keep this import
+import llm_client
+import llm_cache
+from llm_stream_parser import parse_sections, is_complete_output
+from prompt_compaction import compact_description
+from model_policy import resolve_model, resolve_max_tokens
+from provider_router import route_translation
 
 # 1) Google Translate from deep_translator
 from deep_translator import GoogleTranslator
+from deep_translator.exceptions import TooManyRequests
+import rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -104,7 +113,8 @@ def detect_language_from_description(description: str) -> str:
 def google_translate(
     text: str,
     source_language: str = "auto",  # "auto" => Google attempts detection (but can override with your own detection)
-    target_language: str = None     # e.g., "en", "de", "fr", "es", etc.
+    target_language: str = None,    # e.g., "en", "de", "fr", "es", etc.
+    raise_errors: bool = False      # Raise instead of returning the original (used by the provider router)
 ) -> str:
     """
     Translate text using `deep_translator`'s GoogleTranslator.
@@ -113,6 +123,7 @@ def google_translate(
         text (str): The text to translate.
         source_language (str): The source language code (e.g., 'en', 'de') or 'auto'.
         target_language (str): The target language code (e.g., 'de', 'en').
+        raise_errors (bool): Re-raise failures so provider_router can fall back.
 
     Returns:
         str: The translated text if successful, otherwise the original text on error.
@@ -127,11 +138,21 @@ def google_translate(
 
     try:
         translator = GoogleTranslator(source=source_language, target=target_language)
-        translated = translator.translate(text)
+        for attempt in range(rate_limiter.RATE_LIMIT_MAX_RETRIES + 1):
+            rate_limiter.acquire("google")
+            try:
+                translated = translator.translate(text)
+                break
+            except TooManyRequests:
+                if attempt >= rate_limiter.RATE_LIMIT_MAX_RETRIES:
+                    raise
+                time.sleep(rate_limiter.register_429("google", attempt))
         logger.info(f"[google_translate] '{text[:30]}...' ({source_language} -> {target_language}) => '{translated[:30]}...'")
         return translated
     except Exception as e:
         logger.error(f"[google_translate] Error: {e}")
+        if raise_errors:
+            raise
         return text  # fallback to original text
 
 # ---------------------------------- #
@@ -223,17 +244,20 @@ def get_default_cta(target_lang):
 def deepl_translate(
     text: str,
     source_language: str = "",    # If blank => auto-detect
-    target_language: str = "DE"   # e.g., "EN", "DE", "FR", ...
+    target_language: str = "DE",  # e.g., "EN", "DE", "FR", ...
+    raise_errors: bool = False    # Raise instead of returning the original (used by the provider router)
 ) -> str:
     """
     Translate text using the DeepL API.
     If source_language is empty => DeepL attempts detection.
-    If DEEPL_API_KEY is missing or there's an error, returns the original text.
+    If DEEPL_API_KEY is missing or there's an error, returns the original text (raises with raise_errors).
     """
     if not text.strip():
         return text
     if not DEEPL_API_KEY:
         logger.warning("[deepl_translate] No DeepL API key found => skipping translation.")
+        if raise_errors:
+            raise RuntimeError("DEEPL_API_KEY is not set")
         return text
 
     url = "https://api-free.deepl.com/v2/translate"
@@ -246,21 +270,46 @@ def deepl_translate(
         params["source_lang"] = source_language.upper()
 
     try:
-        resp = requests.post(url, data=params)
+        for attempt in range(rate_limiter.RATE_LIMIT_MAX_RETRIES + 1):
+            rate_limiter.acquire("deepl")
+            resp = requests.post(url, data=params)
+            if resp.status_code != 429 or attempt >= rate_limiter.RATE_LIMIT_MAX_RETRIES:
+                break
+            time.sleep(rate_limiter.register_429("deepl", attempt, resp.headers.get("Retry-After")))
         if resp.status_code == 200:
             resp_data = resp.json()
             return resp_data.get("translations", [{}])[0].get("text", text)
         else:
             logger.error(f"[deepl_translate] DeepL returned {resp.status_code}: {resp.text}")
+            if raise_errors:
+                raise RuntimeError(f"DeepL returned {resp.status_code}")
             return text
     except Exception as e:
         logger.error(f"[deepl_translate] Request failed: {e}")
+        if raise_errors:
+            raise
         return text
 
+# ---------------------------------- #
+# LLM CACHE GATE
+# ---------------------------------- #
+def _cache_completion(cache_key, output, finish_reason, structured=False):
+    """
+    Caches an LLM output only if it is complete: not cut off by max_tokens and, for the
+    structured description format, containing every section. A bad output is never replayed.
+    """
+    if finish_reason == "length":
+        logger.warning("⚠️ LLM output hit max_tokens; not caching it.")
+        return
+    if structured and not is_complete_output(output):
+        logger.warning("⚠️ LLM output is missing structured sections; not caching it.")
+        return
+    llm_cache.put(cache_key, output)
+
 # ---------------------------------- #
 # CHATGPT TITLE TRANSLATION
 # ---------------------------------- #
-def chatgpt_translate_title(product_title: str, custom_prompt: str = "", target_language: str = "German", required_name: str = None) -> str:
+def chatgpt_translate_title(product_title: str, custom_prompt: str = "", target_language: str = "German", required_name: str = None, bypass_cache: bool = False, model_policy: dict = None) -> str:
     """
     Translate product title with ChatGPT, enforcing constraints like '[Brand] | [Product Name]'.
     Keeps final text ≤ 30 tokens, ≤ 285 chars, and max 6 words in the '[Product Name]' portion.
@@ -298,17 +347,23 @@ def chatgpt_translate_title(product_title: str, custom_prompt: str = "", target_
     ]
 
     try:
-        response = openai_client.chat.completions.create( # Use openai_client
-            model="gpt-4",
-            messages=messages,
-            max_tokens=120
-        )
-
-        if not response.choices or not response.choices[0].message.content:
-            logger.warning("⚠️ Empty ChatGPT title response. Using original title.")
-            return product_title
-
-        raw_title = response.choices[0].message.content.strip()
+        model = resolve_model("openai", "title", model_policy)
+        cache_key = llm_cache.make_key(model, system_instructions, user_content, None, required_name)
+        raw_title = None if bypass_cache else llm_cache.get(cache_key)
+        if raw_title is None:
+            response = llm_client.chat_completion(
+                "openai",
+                model=model,
+                messages=messages,
+                max_tokens=resolve_max_tokens("title", product_title, model_policy)
+            )
+
+            if not response.choices or not response.choices[0].message.content:
+                logger.warning("⚠️ Empty ChatGPT title response. Using original title.")
+                return product_title
+
+            raw_title = response.choices[0].message.content.strip()
+            _cache_completion(cache_key, raw_title, response.choices[0].finish_reason)
         logger.info("🔥 Full ChatGPT Output:\n%s", raw_title)
 
         # Enforce length limits
@@ -344,7 +399,12 @@ def chatgpt_translate(
     target_language: str = "German",
     field_type: str = "description",
     product_title: str = "",
-    required_name: str = None # <<< ADD THIS
+    required_name: str = None, # <<< ADD THIS
+    stream: bool = None,
+    on_section=None,
+    bypass_cache: bool = False,
+    model_policy: dict = None,
+    raise_errors: bool = False
 ) -> str:
     """
     Translate or rewrite product text using ChatGPT with a structured output format.
@@ -355,6 +415,11 @@ def chatgpt_translate(
         target_language (str): The language code for translation (e.g. "en", "de").
         field_type (str): Type of content ("description", "title", etc.) – for potential future usage.
         product_title (str): An optional product title to pass as context to ChatGPT.
+        stream (bool): Stream the completion and parse sections incrementally (defaults to LLM_STREAMING).
+        on_section (callable): Optional callback(label, text) called as each section completes when streaming.
+        bypass_cache (bool): Skip the completion cache lookup to force a fresh generation.
+        model_policy (dict): Optional per-store model/max_tokens policy (see model_policy.py).
+        raise_errors (bool): Raise on API errors or empty output instead of returning the input (provider router).
 
     Returns:
         str: The translated or rewritten text. Returns original text on failure.
@@ -382,10 +447,13 @@ def chatgpt_translate(
         "**IMPORTANT**: Respond exactly in this structure, no missing sections."
     )
 
+    # Send structured plain text instead of raw body_html; post_process_description rebuilds the HTML
+    prompt_text = compact_description(text, label="chatgpt_translate")
+
     user_content = (
         f"{custom_prompt}\n\n"
         f"Original Title:\n{product_title}\n\n"
-        f"Original Description:\n{text}\n\n"
+        f"Original Description:\n{prompt_text}\n\n"
         f"Translate and rewrite clearly into {target_language}, following exactly the structure provided."
     )
 
@@ -395,21 +463,53 @@ def chatgpt_translate(
     ]
 
     try:
-        response = openai_client.chat.completions.create( # Use openai_client
-            model="gpt-4",
-            messages=messages,
-            temperature=0.7,
-            max_tokens=1500,
-            n=1  # Single response 
-        )
-
-        ai_output = response.choices[0].message.content.strip()
+        # The output is always the full structure: title and description fields share its sizing and model
+        if (field_type or "description").lower() in ("title", "description", "product", "body_html"):
+            field_type = "product"
+        model = resolve_model("openai", field_type, model_policy)
+        max_tokens = resolve_max_tokens(field_type, prompt_text, model_policy)
+        cache_key = llm_cache.make_key(model, system_instructions, user_content, 0.7, required_name)
+        ai_output = None if bypass_cache else llm_cache.get(cache_key)
+        if ai_output is not None:
+            if on_section:
+                parse_sections(ai_output, on_section=on_section)
+        else:
+            if stream is None:
+                stream = llm_client.LLM_STREAMING
+
+            finish = {}
+            if stream:
+                ai_output = llm_client.stream_structured_completion(
+                    "openai",
+                    on_section=on_section,
+                    on_finish=lambda reason: finish.update(reason=reason),
+                    model=model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=max_tokens
+                )
+            else:
+                response = llm_client.chat_completion(
+                    "openai",
+                    model=model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=max_tokens,
+                    n=1  # Single response 
+                )
+                ai_output = response.choices[0].message.content.strip()
+                finish["reason"] = response.choices[0].finish_reason
+            _cache_completion(cache_key, ai_output, finish.get("reason"), structured=True)
         logging.info("✅ [chatgpt_translate] ChatGPT response received:\n%s", ai_output)
+        if raise_errors and not ai_output:
+            raise ValueError("empty ChatGPT output")
 
         return ai_output
 
     except Exception as e:
         logging.error(f"[chatgpt_translate] Error: {e}")
+        if raise_errors:
+            raise
         return text  # Fallback
     
 def post_process_title(ai_output: str) -> str:
@@ -435,7 +535,7 @@ def post_process_title(ai_output: str) -> str:
 
 # Inside the deepseek_translate_title function in translation.py
 
-def deepseek_translate_title(product_title: str, custom_prompt: str = "", target_language: str = "German", required_name: str = None) -> str:
+def deepseek_translate_title(product_title: str, custom_prompt: str = "", target_language: str = "German", required_name: str = None, bypass_cache: bool = False, model_policy: dict = None) -> str:
     """Translate product title using DeepSeek API with formatting constraints."""
     # --- ADD Check for client ---
     if not deepseek_client:
@@ -470,14 +570,19 @@ def deepseek_translate_title(product_title: str, custom_prompt: str = "", target
     try:
         # --- THIS IS THE LINE TO CHANGE ---
         # Change 'client' to 'deepseek_client'
-        response = deepseek_client.chat.completions.create( 
-            model="deepseek-chat",
-            messages=messages,
-            max_tokens=120
-        )
+        model = resolve_model("deepseek", "title", model_policy)
+        cache_key = llm_cache.make_key(model, system_instructions, user_content, None, required_name)
+        translated_title = None if bypass_cache else llm_cache.get(cache_key)
+        if translated_title is None:
+            response = llm_client.chat_completion(
+                "deepseek",
+                model=model,
+                messages=messages,
+                max_tokens=resolve_max_tokens("title", product_title, model_policy)
+            )
+            translated_title = response.choices[0].message.content.strip()
+            _cache_completion(cache_key, translated_title, response.choices[0].finish_reason)
         # --- End of change ---
-
-        translated_title = response.choices[0].message.content.strip()
         logging.info("✅ DeepSeek Title Output:\n%s", translated_title) # Changed log message slightly
 
         return translated_title
@@ -489,37 +594,20 @@ def deepseek_translate_title(product_title: str, custom_prompt: str = "", target
         #      logger.error("❌❌❌ It seems 'deepseek_client' was used but not defined correctly at the top of the file.")
         return product_title  # Fallback
 
-def deepseek_translate(
+def build_deepseek_description_prompt(
     text: str,
     custom_prompt: str = "",
     target_language: str = "German",
-    style=None,
-    product_title: str = "", # Added product_title argument
-    required_name: str = None # <<< ADD THIS
-) -> str:
+    product_title: str = "",
+    required_name: str = None
+):
     """
-    Translate product descriptions using the DeepSeek API, aiming for structured output.
-
-    Args:
-        text (str): The product description text to translate.
-        custom_prompt (str): Additional user instructions.
-        target_language (str): Target language (e.g., "German", "French").
-        style: Optional style parameter (currently unused in logic).
-        product_title (str): Optional product title for context.
+    Builds the structured-description prompt used by deepseek_translate (also used by llm_batch
+    so batched requests are identical to the synchronous ones).
 
     Returns:
-        str: The translated text, ideally structured, or original text on failure.
+        tuple: (system_instructions, user_content, compacted prompt_text)
     """
-    # 1. Check if the deepseek_client was initialized
-    if not deepseek_client:
-        logger.error("❌ DeepSeek client is not initialized. Cannot translate using DeepSeek.")
-        return text # Return original text if client is not available
-
-    # 2. Check if input text is empty
-    if not text.strip():
-        logger.warning("⚠️ Input text for DeepSeek translation is empty.")
-        return text
-
     # 3. Define System Instructions (asking for structured output)
     system_instructions = (
             "You are an expert e-commerce copywriter. Clearly rewrite the provided product description "
@@ -544,9 +632,11 @@ def deepseek_translate(
         )
 
     # 4. Define User Content (providing original text and context)
+    # Send structured plain text instead of raw body_html; post_process_description rebuilds the HTML
+    prompt_text = compact_description(text, label="deepseek_translate")
     user_content = f"""
 Original Description:
-{text}
+{prompt_text}
 
 Original Title (for context):
 {product_title}
@@ -557,6 +647,56 @@ User Custom Instructions:
 Translate the original description into {target_language} following the structured format specified precisely.
 """
 
+    return system_instructions, user_content, prompt_text
+
+def deepseek_translate(
+    text: str,
+    custom_prompt: str = "",
+    target_language: str = "German",
+    style=None,
+    product_title: str = "", # Added product_title argument
+    required_name: str = None, # <<< ADD THIS
+    stream: bool = None,
+    on_section=None,
+    bypass_cache: bool = False,
+    model_policy: dict = None,
+    raise_errors: bool = False
+) -> str:
+    """
+    Translate product descriptions using the DeepSeek API, aiming for structured output.
+
+    Args:
+        text (str): The product description text to translate.
+        custom_prompt (str): Additional user instructions.
+        target_language (str): Target language (e.g., "German", "French").
+        style: Optional style parameter (currently unused in logic).
+        product_title (str): Optional product title for context.
+        stream (bool): Stream the completion and parse sections incrementally (defaults to LLM_STREAMING).
+        on_section (callable): Optional callback(label, text) called as each section completes when streaming.
+        bypass_cache (bool): Skip the completion cache lookup to force a fresh generation.
+        model_policy (dict): Optional per-store model/max_tokens policy (see model_policy.py).
+        raise_errors (bool): Raise on API errors or empty output instead of returning the input (provider router).
+
+    Returns:
+        str: The translated text, ideally structured, or original text on failure.
+    """
+    # 1. Check if the deepseek_client was initialized
+    if not deepseek_client:
+        logger.error("❌ DeepSeek client is not initialized. Cannot translate using DeepSeek.")
+        if raise_errors:
+            raise RuntimeError("DeepSeek client is not initialized")
+        return text # Return original text if client is not available
+
+    # 2. Check if input text is empty
+    if not text.strip():
+        logger.warning("⚠️ Input text for DeepSeek translation is empty.")
+        return text
+
+    # 3./4. Build system instructions and user content (structured output)
+    system_instructions, user_content, prompt_text = build_deepseek_description_prompt(
+        text, custom_prompt, target_language, product_title, required_name
+    )
+
     # 5. Prepare messages for the API
     messages = [
         {"role": "system", "content": system_instructions},
@@ -566,19 +706,46 @@ Translate the original description into {target_language} following the structur
     # 6. Make the API Call
     try:
         logger.info(f"Attempting DeepSeek API call for description translation to {target_language}...")
-        response = deepseek_client.chat.completions.create( # Use deepseek_client
-            model="deepseek-chat",
-            messages=messages,
-            temperature=0.5, # Slightly lowered temperature for potentially better structure adherence
-            max_tokens=1500 # Adjust as needed
-        )
-
-        raw_output = response.choices[0].message.content.strip()
+        model = resolve_model("deepseek", "product", model_policy)
+        max_tokens = resolve_max_tokens("product", prompt_text, model_policy)  # Full structure, not just the input
+        cache_key = llm_cache.make_key(model, system_instructions, user_content, 0.5, required_name)
+        raw_output = None if bypass_cache else llm_cache.get(cache_key)
+        if raw_output is not None:
+            if on_section:
+                parse_sections(raw_output, on_section=on_section)
+        else:
+            if stream is None:
+                stream = llm_client.LLM_STREAMING
+
+            finish = {}
+            if stream:
+                raw_output = llm_client.stream_structured_completion(
+                    "deepseek",
+                    on_section=on_section,
+                    on_finish=lambda reason: finish.update(reason=reason),
+                    model=model,
+                    messages=messages,
+                    temperature=0.5,
+                    max_tokens=max_tokens
+                )
+            else:
+                response = llm_client.chat_completion(
+                    "deepseek",
+                    model=model,
+                    messages=messages,
+                    temperature=0.5, # Slightly lowered temperature for potentially better structure adherence
+                    max_tokens=max_tokens # Sized from the input by model_policy
+                )
+                raw_output = response.choices[0].message.content.strip()
+                finish["reason"] = response.choices[0].finish_reason
+            _cache_completion(cache_key, raw_output, finish.get("reason"), structured=True)
         # Log the raw output critically for debugging formatting issues
         logging.critical(f"🔥🔥🔥 RAW DeepSeek Output:\n---\n{raw_output}\n---")
 
         translated_text = raw_output
         logger.info(f"✅ DeepSeek Translation Output received (length: {len(translated_text)}).")
+        if raise_errors and not translated_text:
+            raise ValueError("empty DeepSeek output")
 
         return translated_text
 
@@ -588,6 +755,8 @@ Translate the original description into {target_language} following the structur
         # Check if it's a NameError related to the client, although the check at the start should prevent this
         if isinstance(e, NameError) and 'deepseek_client' in str(e):
              logger.error("❌❌❌ It seems 'deepseek_client' variable was used but not properly defined/initialized.")
+        if raise_errors:
+            raise
         return text  # Fallback to original text on any error
 
     except Exception as e:
@@ -609,12 +778,14 @@ def apply_translation_method(
 ):
     logging.info("Using this apply_translation_method. The one of tranlsation.py")
     """
-    Translates text using the chosen method (google, deepl, or chatgpt).
+    Translates text using the chosen method (google, deepl, chatgpt or deepseek).
+    The call goes through provider_router, which hedges slow calls and falls back to an
+    equivalent provider on failure.
     If source_lang=='auto' and method=='google', attempts language detection from `description`.
 
     Args:
         original_text (str): The text to translate (title, description, etc.).
-        method (str): "google", "deepl", or "chatgpt".
+        method (str): "google", "deepl", "chatgpt" or "deepseek".
         custom_prompt (str): Additional instructions for ChatGPT (if used).
         source_lang (str): Source language (e.g. "auto", "en", "de", ...).
         target_lang (str): Target language code (e.g. "de", "en", ...).
@@ -661,40 +832,33 @@ def apply_translation_method(
 
         method_lower = method.lower()
 
-        # A) ChatGPT
-        if method_lower == "chatgpt":
-            logging.info("[apply_translation_method] Using ChatGPT => target_lang=%s", target_lang)
-            translated_text = chatgpt_translate(original_text, custom_prompt, target_lang, field_type, product_title)
-
-        # B) Google
-        elif method_lower == "google":
-            logging.info("[apply_translation_method] Using Google => source=%s, target=%s", source_lang, target_lang)
-            # If user said "auto" & we have a description => detect
-            if source_lang.lower() == "auto" and description:
-                logging.info("[apply_translation_method] source_lang='auto' => attempting detection from description.")
-                desc = description.strip()
-                if desc:
-                    from langdetect import detect, LangDetectException
-                    try:
-                        detected_lang = detect(desc)
-                        logging.info("[apply_translation_method] Detected => '%s' from description", detected_lang)
-                        if detected_lang != "auto":
-                            source_lang = detected_lang
-                    except LangDetectException:
-                        logging.info("[apply_translation_method] LangDetectException => remain 'auto'")
-                else:
-                    logging.info("[apply_translation_method] description empty => remain 'auto'")
-
-            # Now call google_translate
-            logging.info("[apply_translation_method] final google_translate => source='%s' to '%s'", source_lang, target_lang)
-            translated_text = google_translate(original_text, source_lang, target_lang)
-
-        # C) DeepL
-        elif method_lower == "deepl":
-            logging.info("[apply_translation_method] Using DeepL => source=%s, target=%s", source_lang, target_lang)
-            translated_text = deepl_translate(original_text, source_lang, target_lang)
-
-        # D) Unknown
+        # If user said "auto" & we have a description => detect (Google)
+        if source_lang.lower() == "auto" and description and method_lower == "google":
+            logging.info("[apply_translation_method] source_lang='auto' => attempting detection from description.")
+            desc = description.strip()
+            if desc:
+                from langdetect import detect, LangDetectException
+                try:
+                    detected_lang = detect(desc)
+                    logging.info("[apply_translation_method] Detected => '%s' from description", detected_lang)
+                    if detected_lang != "auto":
+                        source_lang = detected_lang
+                except LangDetectException:
+                    logging.info("[apply_translation_method] LangDetectException => remain 'auto'")
+            else:
+                logging.info("[apply_translation_method] description empty => remain 'auto'")
+
+        # One callable per provider; the router hedges/falls back between equivalent ones
+        provider_calls = {
+            "chatgpt": lambda: chatgpt_translate(original_text, custom_prompt, target_lang, field_type, product_title, raise_errors=True),
+            "deepseek": lambda: deepseek_translate(original_text, custom_prompt, target_language=target_lang, product_title=product_title, raise_errors=True),
+            "google": lambda: google_translate(original_text, source_lang, target_lang, raise_errors=True),
+            "deepl": lambda: deepl_translate(original_text, "" if source_lang.lower() == "auto" else source_lang, target_lang, raise_errors=True),
+        }
+
+        if method_lower in provider_calls:
+            logging.info("[apply_translation_method] Routing via %s => source=%s, target=%s", method_lower, source_lang, target_lang)
+            translated_text = route_translation(field_type, method_lower, provider_calls, original_text)
         else:
             logging.warning("[apply_translation_method] Unknown method='%s' => returning original.", method)
 
@@ -814,7 +978,7 @@ def apply_method(
 
     Args:
         text (str): The text to translate or rewrite.
-        method (str): "google", "deepl", or "chatgpt".
+        method (str): "google", "deepl", "chatgpt" or "deepseek".
         custom_prompt (str): Additional instructions for ChatGPT usage.
         source_language (str): The source language (default 'auto' for Google).
         target_language (str): The target language code (e.g., 'en', 'de').
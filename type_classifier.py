@@ -0,0 +1,264 @@
+# type_classifier.py
+
+import os
+import re
+import sys
+import json
+import math
+import logging
+import argparse
+import threading
+from collections import Counter, defaultdict
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# CONFIGURATION
+# ---------------------------------- #
+TYPE_MODEL_PATH = os.getenv("TYPE_MODEL_PATH", "type_model.json")           # Optional, see train_model()
+TYPE_MODEL_MIN_CONFIDENCE = float(os.getenv("TYPE_MODEL_MIN_CONFIDENCE", "0.85"))
+TYPE_CLASSIFIER_DISABLED = os.getenv("TYPE_CLASSIFIER_DISABLED", "false").lower() in ("1", "true", "yes")
+
+# Where a keyword hit counts for how much. A single title hit is enough to be confident.
+FIELD_WEIGHTS = {"title": 3, "tags": 2, "description": 1}
+MIN_SCORE = 3      # Winning category needs at least this score ...
+MIN_MARGIN = 2     # ... and this lead over the runner-up, otherwise the LLM decides
+
+# Category -> (keyword regex, {gender: product type}). The "any" entry is used when the
+# gender is unknown or has no own type; categories without it need a known gender.
+# German compounds ("Winterjacke", "Strickpullover") are matched by the \w* prefix.
+TYPE_RULES = {
+    "jackets": (r"\bjackets?\b|\bcoats?\b|\bparkas?\b|\bpuffer\b|\banoraks?\b|\bwindbreakers?\b|\w*jacke\b|\w*mantel\b", {"female": "Jackets Women", "male": "Jackets Men"}),
+    "sweater_vests": (r"\bsweater ?vests?\b|\bknit(?:ted)? vests?\b|\bpullunder\b|\w*strickweste\b", {"any": "Sweater vests"}),
+    "knitted_sweaters": (r"\bknit(?:ted)? (?:sweaters?|pullovers?|jumpers?)\b|\bcardigans?\b|\w*strickpullover\b|\w*strickjacke\b", {"female": "Knitted Sweaters Women", "male": "Sweaters Men"}),
+    "sweaters": (r"\bsweaters?\b|\bhoodies?\b|\bpullovers?\b|\bsweatshirts?\b|\bjumpers?\b|\w*pulli\b|\w*kapuzenpullover\b", {"female": "Sweaters Women", "male": "Sweaters Men"}),
+    "hats": (r"\bhats?\b|\bcaps?\b|\bbeanies?\b|\bberets?\b|\bbucket hat\b|\w*mütze\b|\w*hut\b", {"female": "Hat Women", "male": "Hat Men"}),
+    "training_suits": (r"\btrack ?suits?\b|\btraining suits?\b|\bjogging suits?\b|\w*trainingsanzug\b|\w*jogginganzug\b", {"female": "Training suit Women", "male": "Training suit Men"}),
+    "dresses": (r"\bdress(?:es)?\b|\w*kleid(?:er)?\b", {"any": "Dresses"}),
+    "shoes": (r"\bshoes?\b|\bsneakers?\b|\bboots?\b|\bsandals?\b|\bloafers?\b|\bheels\b|\bslippers?\b|\w*schuhe?\b|\w*stiefel\b|\bpumps\b", {"female": "Shoes Women", "male": "Shoes Men"}),
+    "pants": (r"\bpants\b|\btrousers\b|\bjeans\b|\bchinos?\b|\bjoggers\b|\bshorts\b|\b(?!those\b)\w*hose\b", {"female": "Pants Women", "male": "Pants Men"}),
+    "one_pieces": (r"\bjumpsuits?\b|\brompers?\b|\bplaysuits?\b|\boveralls?\b|\beinteiler\b", {"any": "One Pieces Women"}),
+    "blazers": (r"\bblazers?\b|\bsakkos?\b", {"female": "Blazer Women", "male": "Blazer Men"}),
+    "earrings": (r"\bearrings?\b|\bear studs?\b|\w*ohrringe?\b|\w*ohrstecker\b", {"any": "Earrings Women"}),
+    "bags": (r"\bbags?\b|\bhandbags?\b|\bpurses?\b|\btotes?\b|\bclutch\b|\bbackpacks?\b|\w*tasche\b|\w*rucksack\b", {"any": "Bags Women"}),
+    "belts": (r"\bbelts?\b|\w*gürtel\b", {"any": "Belts Women"}),
+    "necklaces": (r"\bnecklaces?\b|\bpendants?\b|\bchokers?\b|\w*halskette\b", {"any": "Necklaces Women"}),
+    "t_shirts": (r"\bt-?shirts?\b|\btees?\b|\bpolo shirts?\b", {"male": "T-shirts Men"}),
+    "hair_accessories": (r"\bhair ?(?:clips?|bands?|pins?|ties?)\b|\bscrunchies?\b|\bheadbands?\b|\w*haarspangen?\b|\w*haarband\b|\w*haarschmuck\b", {"any": "Hair Accessories Women"}),
+    "glasses": (r"\b(?:sun)?glasses\b|\beyewear\b|\w*brille\b", {"any": "Glasses"}),
+    "halloween": (r"\bhalloween\b|\bcostumes?\b|\w*kostüm\b", {"any": "Halloween"}),
+    "bras": (r"\bbras?\b|\bbralettes?\b|\bbh\b|\bpush-?up\b", {"any": "Bras"}),
+    "bikinis": (r"\bbikinis?\b|\bswimsuits?\b|\bswimwear\b|\w*badeanzug\b|\bbademode\b", {"any": "Bikinis"}),
+    "bracelets": (r"\bbracelets?\b|\bbangles?\b|\w*armband\b|\w*armreif\b", {"any": "Bracelets Women"}),
+    "blouses": (r"\bblouses?\b|\btunics?\b|\w*bluse\b|\w*tunika\b", {"any": "Blouses Women"}),
+    "active_wear": (r"\bactive ?wear\b|\bsportswear\b|\byoga\b|\bgym\b|\bleggings\b|\bsports bra\b|\w*sportbekleidung\b", {"any": "Active Wear"}),
+    "skirts": (r"\bskirts?\b|\w*rock\b|\w*röcke\b", {"any": "Skirts Women"}),
+    "sets": (r"\b(?:two|2)-?piece sets?\b|\bco-?ord\b|\bsets?\b|\bzweiteiler\b", {"female": "Sets Women", "male": "Sets Men"}),
+    "accessories": (r"\bscarf\b|\bscarves\b|\bgloves\b|\bwallets?\b|\bkeychains?\b|\bsocks\b|\w*schal\b|\w*handschuhe\b|\w*geldbörse\b", {"any": "Accessories"}),
+}
+
+FEMALE_RE = re.compile(r"\b(?:women|woman|womens|ladies|lady|female|damen|frauen|girls?)\b", re.IGNORECASE)
+MALE_RE = re.compile(r"\b(?:men|man|mens|male|herren|männer|boys?)\b", re.IGNORECASE)
+TOKEN_RE = re.compile(r"[^\W\d_]{2,}", re.UNICODE)
+TAG_RE = re.compile(r"<[^>]+>")
+
+_COMPILED_RULES = [(category, re.compile(pattern, re.IGNORECASE), types) for category, (pattern, types) in TYPE_RULES.items()]
+
+_model = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+stats = {"rules": 0, "model": 0, "llm": 0}
+
+
+def _text(value):
+    if isinstance(value, (list, tuple, set)):
+        value = ", ".join(str(v) for v in value)
+    return TAG_RE.sub(" ", value or "")
+
+
+def detect_gender(*texts):
+    """'female', 'male' or None from explicit gender words in the given texts."""
+    joined = " ".join(_text(t) for t in texts)
+    female, male = bool(FEMALE_RE.search(joined)), bool(MALE_RE.search(joined))
+    if female != male:
+        return "female" if female else "male"
+    return None
+
+
+def _resolve_gender(types, gender):
+    """Picks the product type for a gender, or None when the gender is needed but unknown."""
+    if gender in types:
+        return types[gender]
+    return types.get("any")
+
+
+# ---------------------------------- #
+# RULE TABLE
+# ---------------------------------- #
+def classify_by_rules(title="", tags=None, description="", gender=None, allowed_types=None):
+    """
+    Scores every category by weighted keyword hits in title/tags/description.
+
+    Returns:
+        (product_type, reason) when one category clearly wins, else (None, reason).
+    """
+    fields = {"title": _text(title), "tags": _text(tags), "description": _text(description)[:2000]}
+    scores = Counter()
+    for category, pattern, _types in _COMPILED_RULES:
+        for field, text in fields.items():
+            if text and pattern.search(text):
+                scores[category] += FIELD_WEIGHTS[field]
+    if not scores:
+        return None, "no keyword match"
+
+    ranked = scores.most_common(2)
+    best, best_score = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else 0
+    if best_score < MIN_SCORE or best_score - runner_up < MIN_MARGIN:
+        return None, f"ambiguous {dict(scores)}"
+
+    gender = gender if gender in ("female", "male") else detect_gender(title, tags)
+    product_type = _resolve_gender(TYPE_RULES[best][1], gender)
+    if not product_type:
+        return None, f"'{best}' needs a gender"
+    if allowed_types is not None and product_type not in allowed_types:
+        return None, f"'{product_type}' not allowed"
+    return product_type, f"rule '{best}' (score {best_score} vs {runner_up})"
+
+
+# ---------------------------------- #
+# OPTIONAL MODEL (multinomial naive Bayes)
+# ---------------------------------- #
+def _tokens(title="", tags=None):
+    return [t.lower() for t in TOKEN_RE.findall(f"{_text(title)} {_text(tags)}")]
+
+
+def train_model(samples, path=None):
+    """
+    Trains the naive Bayes model on already-typed products and saves it as JSON.
+
+    Args:
+        samples: iterable of dicts with "title", "tags" and "product_type" (Shopify product JSON works).
+        path (str): Output file, defaults to TYPE_MODEL_PATH.
+    """
+    global _model, _model_loaded
+    class_counts = Counter()
+    token_counts = defaultdict(Counter)
+    for sample in samples:
+        product_type = (sample.get("product_type") or "").strip()
+        tokens = _tokens(sample.get("title"), sample.get("tags"))
+        if not product_type or not tokens:
+            continue
+        class_counts[product_type] += 1
+        token_counts[product_type].update(tokens)
+
+    vocabulary = {t for counts in token_counts.values() for t in counts}
+    model = {
+        "class_counts": dict(class_counts),
+        "token_counts": {k: dict(v) for k, v in token_counts.items()},
+        "vocabulary_size": len(vocabulary),
+    }
+    path = path or TYPE_MODEL_PATH
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(model, f, ensure_ascii=False)
+    with _model_lock:
+        _model, _model_loaded = model, True
+    logger.info(f"✅ Trained type model on {sum(class_counts.values())} products, {len(class_counts)} types → {path}")
+    return model
+
+
+def _load_model():
+    global _model, _model_loaded
+    if not _model_loaded:
+        with _model_lock:
+            if not _model_loaded:
+                if os.path.exists(TYPE_MODEL_PATH):
+                    try:
+                        with open(TYPE_MODEL_PATH, encoding="utf-8") as f:
+                            _model = json.load(f)
+                        logger.info(f"✅ Loaded product type model from {TYPE_MODEL_PATH}")
+                    except (OSError, ValueError) as e:
+                        logger.error(f"❌ Could not load type model {TYPE_MODEL_PATH}: {e}")
+                _model_loaded = True
+    return _model
+
+
+def classify_by_model(title="", tags=None, allowed_types=None):
+    """Returns (product_type, probability) from the trained model, or (None, 0.0) without one."""
+    model = _load_model()
+    tokens = _tokens(title, tags)
+    if not model or not tokens:
+        return None, 0.0
+
+    total = sum(model["class_counts"].values())
+    vocabulary_size = model["vocabulary_size"] or 1
+    log_probs = {}
+    for product_type, count in model["class_counts"].items():
+        if allowed_types is not None and product_type not in allowed_types:
+            continue
+        counts = model["token_counts"].get(product_type, {})
+        denominator = sum(counts.values()) + vocabulary_size
+        log_probs[product_type] = math.log(count / total) + sum(math.log((counts.get(t, 0) + 1) / denominator) for t in tokens)
+    if not log_probs:
+        return None, 0.0
+
+    top = max(log_probs.values())
+    normalizer = sum(math.exp(v - top) for v in log_probs.values())
+    best = max(log_probs, key=log_probs.get)
+    return best, 1.0 / normalizer
+
+
+# ---------------------------------- #
+# ENTRY POINT
+# ---------------------------------- #
+def classify_locally(title="", tags=None, description="", gender=None, allowed_types=None):
+    """
+    Fast path before the LLM: rule table first, then the optional model.
+
+    Returns:
+        str: A confident product type, or None if the LLM should decide.
+    """
+    if TYPE_CLASSIFIER_DISABLED:
+        return None
+    product_type, reason = classify_by_rules(title, tags, description, gender, allowed_types)
+    if product_type:
+        stats["rules"] += 1
+        logger.info(f"🏷️ Local type '{product_type}' from {reason}.")
+        return product_type
+
+    model_type, probability = classify_by_model(title, tags, allowed_types)
+    if model_type and probability >= TYPE_MODEL_MIN_CONFIDENCE:
+        stats["model"] += 1
+        logger.info(f"🏷️ Local type '{model_type}' from model (p={probability:.2f}); rules: {reason}.")
+        return model_type
+
+    stats["llm"] += 1
+    logger.info(f"🏷️ No confident local type ({reason}), falling back to LLM.")
+    return None
+
+
+def hit_rate():
+    """Share of classifications answered locally (rules + model)."""
+    total = sum(stats.values())
+    return (stats["rules"] + stats["model"]) / total if total else 0.0
+
+
+def report():
+    total = sum(stats.values())
+    return f"Local type hit rate: {hit_rate():.0%} ({stats['rules']} rules, {stats['model']} model, {stats['llm']} LLM of {total})"
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Train the local product type model.")
+    parser.add_argument("--train", required=True, help="JSON file with a list of products (title, tags, product_type)")
+    parser.add_argument("--output", default=TYPE_MODEL_PATH, help="Model file to write")
+    args = parser.parse_args()
+    with open(args.train, encoding="utf-8") as f:
+        data = json.load(f)
+    products = data.get("products", data) if isinstance(data, dict) else data
+    train_model(products, args.output)
+    sys.exit(0)
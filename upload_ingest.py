@@ -0,0 +1,142 @@
+# upload_ingest.py
+
+import os
+import re
+import logging
+import pandas as pd
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------- #
+# CONFIGURATION
+# ---------------------------------- #
+UPLOAD_CHUNK_ROWS = int(os.getenv("UPLOAD_CHUNK_ROWS", "2000"))   # CSV rows parsed per chunk
+UPLOAD_BATCH_ROWS = int(os.getenv("UPLOAD_BATCH_ROWS", "500"))    # Valid rows handed to the pipeline per batch
+
+PRODUCT_ID_RE = re.compile(r"^(?:gid://shopify/Product/|.*/products/)?(\d{6,20})(?:\.0)?/?$")
+IMAGE_URL_RE = re.compile(r"^https?://[^\s/$.?#][^\s]*$", re.IGNORECASE)
+ID_HEADERS = ("product id", "product_id", "productid", "id", "shopify id")
+TITLE_HEADERS = ("product title", "title", "product_title", "name")
+
+
+class UploadError(ValueError):
+    """The upload cannot be ingested at all (unsupported file type, bad column letter, no id column)."""
+
+
+def column_index(letter):
+    """0-based index of a column letter ('A' -> 0, 'AB' -> 27)."""
+    index = 0
+    for char in str(letter).strip().upper():
+        if not "A" <= char <= "Z":
+            raise UploadError(f"Invalid column letter: {letter!r}")
+        index = index * 26 + ord(char) - 64
+    if index == 0:
+        raise UploadError(f"Invalid column letter: {letter!r}")
+    return index - 1
+
+
+def normalize_product_id(value):
+    """Numeric Shopify product id from an id, GID or product URL; None if it isn't one."""
+    match = PRODUCT_ID_RE.match(str(value or "").strip())
+    return match.group(1) if match else None
+
+
+def split_image_urls(value):
+    """(valid URLs, invalid entries) of an image cell holding one or more comma/space separated URLs."""
+    parts = [p for p in re.split(r"[,\s]+", str(value or "").strip()) if p]
+    return [p for p in parts if IMAGE_URL_RE.match(p)], [p for p in parts if not IMAGE_URL_RE.match(p)]
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))  # Excel stores long ids as floats
+    return str(value).strip()
+
+
+def iter_rows(file, filename):
+    """
+    Streams (row_number, [cell, ...]) from an uploaded CSV/XLSX without loading it whole:
+    CSV via pandas chunks, XLSX via openpyxl read-only mode. Row numbers are 1-based like the sheet.
+    """
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        row_number = 0
+        for chunk in pd.read_csv(file, header=None, dtype=str, keep_default_na=False,
+                                 chunksize=UPLOAD_CHUNK_ROWS, skip_blank_lines=False):
+            for values in chunk.itertuples(index=False, name=None):
+                row_number += 1
+                yield row_number, [_cell(v) for v in values]
+    elif name.endswith(".xlsx"):
+        from openpyxl import load_workbook
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            for row_number, values in enumerate(workbook.active.iter_rows(values_only=True), start=1):
+                yield row_number, [_cell(v) for v in values]
+        finally:
+            workbook.close()
+    elif name.endswith(".xls"):
+        logger.warning("⚠️ Legacy .xls uploads cannot be streamed; loading the whole file.")
+        for row_number, values in enumerate(pd.read_excel(file, header=None, dtype=str).fillna("").values.tolist(), start=1):
+            yield row_number, [_cell(v) for v in values]
+    else:
+        raise UploadError(f"Unsupported file type: {filename}")
+
+
+def _find_header(header, names):
+    lowered = [h.strip().lower() for h in header]
+    for name in names:
+        if name in lowered:
+            return lowered.index(name)
+    return None
+
+
+def iter_products(file, filename, image_column="A", starting_row=2, id_column=None):
+    """
+    Streams validated rows as {"row", "product_id", "title", "images"} dicts, and rejected ones
+    as {"row", "error"} dicts, in file order. Row 1 is the header; data starts at starting_row.
+    The product id column is id_column (letter), else found by header name; UploadError if neither.
+    """
+    rows = iter_rows(file, filename)
+    first = next(rows, None)
+    if first is None:
+        return
+    header = first[1]
+    id_idx = column_index(id_column) if id_column else _find_header(header, ID_HEADERS)
+    if id_idx is None:
+        # No guessing column A: it is also the default image column, and every row would be rejected
+        raise UploadError(f"No product id column: add one of the headers {ID_HEADERS} or choose the id column.")
+    title_idx = _find_header(header, TITLE_HEADERS)
+    image_idx = column_index(image_column) if image_column else None
+
+    for row_number, values in rows:
+        if row_number < starting_row or not any(values):
+            continue
+        raw_id = values[id_idx] if id_idx < len(values) else ""
+        product_id = normalize_product_id(raw_id)
+        if not product_id:
+            yield {"row": row_number, "error": f"invalid product id {raw_id!r}"}
+            continue
+        images = []
+        if image_idx is not None and image_idx != id_idx:
+            images, bad = split_image_urls(values[image_idx] if image_idx < len(values) else "")
+            if bad:
+                yield {"row": row_number, "error": f"invalid image URL(s) {bad[:3]}"}
+                continue
+        title = values[title_idx] if title_idx is not None and title_idx < len(values) else ""
+        yield {"row": row_number, "product_id": product_id, "title": title, "images": images}
+
+
+def iter_batches(items, size=None):
+    """Groups an iterator into lists of at most `size` items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= (size or UPLOAD_BATCH_ROWS):
+            yield batch
+            batch = []
+    if batch:
+        yield batch